@@ -0,0 +1,111 @@
+"""
+Backlog de reprocessamento: o que falhou numa execução fica guardado para ser refeito sozinho
+
+Cada entrada é (id_pncp, etapa) - um recurso da API (itens, historico, arquivos, orgao) ou o edital
+inteiro. Na próxima execução só essa parte é refeita, em vez de extrair o edital de novo. Gravações
+no banco e uploads ao storage não passam por aqui: a outbox (outbox.py) é quem os refaz; entradas
+"persistencia" e "storage" de versões anteriores são entregues a ela no reprocessamento.
+Gravado em JSON (arquivo temporário + rename), como o cache de órgãos.
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from collections import Counter
+
+from .config import settings
+
+
+class BacklogReprocessamento:
+    """Pendências por (id_pncp, etapa), com número de tentativas e dados para refazer"""
+
+    def __init__(self, arquivo=None, max_tentativas=None):
+        arquivo = settings.BACKLOG_FILE if arquivo is None else arquivo
+        self.arquivo = os.path.expanduser(arquivo) if arquivo else None
+        self.max_tentativas = max_tentativas or settings.BACKLOG_MAX_TENTATIVAS
+        self._itens = {}
+        self._lock = threading.Lock()
+        self._alterado = False
+        self.descartados = 0
+
+        if self.arquivo:
+            self._carregar()
+            atexit.register(self.salvar)
+
+    @staticmethod
+    def _chave(id_pncp, etapa):
+        return f"{etapa}:{id_pncp}"
+
+    def registrar(self, id_pncp, etapa, erro, dados=None):
+        """Guarda (ou atualiza) uma pendência; desiste depois de max_tentativas"""
+        chave = self._chave(id_pncp, etapa)
+        with self._lock:
+            entrada = self._itens.get(chave) or {
+                "id_pncp": id_pncp, "etapa": etapa, "tentativas": 0, "registrado_em": time.time()
+            }
+            entrada["tentativas"] += 1
+            entrada["erro"] = str(erro)[:300]
+            entrada["atualizado_em"] = time.time()
+            if dados is not None:
+                entrada["dados"] = dados
+            if entrada["tentativas"] > self.max_tentativas:
+                self._itens.pop(chave, None)
+                self.descartados += 1
+                print(f"Backlog: {etapa} de {id_pncp} descartado apos {self.max_tentativas} tentativas")
+            else:
+                self._itens[chave] = entrada
+            self._alterado = True
+
+    def resolver(self, id_pncp, etapa):
+        with self._lock:
+            if self._itens.pop(self._chave(id_pncp, etapa), None) is not None:
+                self._alterado = True
+                return True
+        return False
+
+    def pendentes(self, limite=None):
+        """Entradas mais antigas primeiro"""
+        with self._lock:
+            entradas = sorted(self._itens.values(), key=lambda e: e["registrado_em"])
+        return entradas[:limite] if limite else entradas
+
+    def __len__(self):
+        return len(self._itens)
+
+    def status(self):
+        with self._lock:
+            por_etapa = Counter(e["etapa"] for e in self._itens.values())
+        return {"total": sum(por_etapa.values()), "por_etapa": dict(por_etapa), "descartados": self.descartados}
+
+    def salvar(self):
+        if not self.arquivo:
+            return False
+        with self._lock:
+            if not self._alterado:
+                return False
+            entradas = list(self._itens.values())
+            self._alterado = False
+        try:
+            os.makedirs(os.path.dirname(self.arquivo), exist_ok=True)
+            temporario = f"{self.arquivo}.tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(entradas, f, ensure_ascii=False, default=str)
+            os.replace(temporario, self.arquivo)
+            return True
+        except OSError as e:
+            print(f" Nao foi possivel gravar o backlog: {e}")
+            return False
+
+    def _carregar(self):
+        try:
+            with open(self.arquivo, encoding="utf-8") as f:
+                entradas = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for entrada in entradas:
+                if isinstance(entrada, dict) and entrada.get("id_pncp") and entrada.get("etapa"):
+                    self._itens[self._chave(entrada["id_pncp"], entrada["etapa"])] = entrada
+        print(f"Backlog carregado: {len(self._itens)} pendencias")
@@ -0,0 +1,121 @@
+"""
+Acesso à tabela editais_completos: consultas em lote e contagem de idas ao banco
+
+Cada chamada ao PostgREST é uma requisição HTTP; o contador registra quantas foram feitas por
+operação (e quantas linhas elas moveram) para medir o custo de cada execução no banco.
+"""
+
+import time
+import threading
+from itertools import islice
+
+import httpx
+import requests
+
+from .disjuntores import CircuitoAberto
+
+
+# Sem resposta do servidor: conexão recusada/caída, timeout
+ERROS_REDE = (ConnectionError, TimeoutError, httpx.TransportError, requests.ConnectionError, requests.Timeout)
+
+# PostgREST sem conexão com o banco (respondidos com 503/504)
+PGRST_TRANSITORIOS = ("PGRST000", "PGRST001", "PGRST002", "PGRST003")
+
+# SQLSTATE (prefixo) de falhas que passam sozinhas: conexão (08), falta de recursos (53), statement
+# timeout, servidor reiniciando, conflito de serialização e deadlock
+SQLSTATE_TRANSITORIOS = ("08", "53", "57014", "57P01", "57P02", "57P03", "40001", "40P01")
+
+
+class ContadorBanco:
+    """Idas ao banco por operação (consulta, insert, update...), com linhas e tempo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operacoes = {}
+
+    def registrar(self, operacao, linhas=0, segundos=0.0, bytes_enviados=0):
+        with self._lock:
+            contagem = self._operacoes.setdefault(operacao, {"idas": 0, "linhas": 0, "bytes_enviados": 0, "tempo_s": 0.0})
+            contagem["idas"] += 1
+            contagem["linhas"] += linhas
+            contagem["bytes_enviados"] += bytes_enviados
+            contagem["tempo_s"] += segundos
+
+    def limpar(self):
+        with self._lock:
+            self._operacoes.clear()
+
+    def resumo(self):
+        with self._lock:
+            operacoes = {nome: {**c, "tempo_s": round(c["tempo_s"], 3)} for nome, c in sorted(self._operacoes.items())}
+        return {
+            "idas": sum(c["idas"] for c in operacoes.values()),
+            "bytes_enviados": sum(c["bytes_enviados"] for c in operacoes.values()),
+            "operacoes": operacoes
+        }
+
+
+def em_lotes(valores, tamanho):
+    """Divide em listas de até tamanho itens (limite da URL do filtro in_); aceita geradores"""
+    iterador = iter(valores)
+    while True:
+        lote = list(islice(iterador, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+def _status_http(erro):
+    """Status HTTP da falha, se houver (resposta anexada ou code de 3 dígitos, como o postgrest
+    usa quando o corpo do erro não é JSON)"""
+    status = getattr(getattr(erro, "response", None), "status_code", None)
+    if status is None:
+        codigo = str(getattr(erro, "code", "") or "")
+        status = int(codigo) if len(codigo) == 3 and codigo.isdigit() else None
+    return status
+
+
+def erro_transitorio(erro):
+    """Falha que passa sozinha (rede, timeout, 5xx, 429, disjuntor aberto) - vale tentar de novo
+
+    Decide pelo tipo, pelo status HTTP ou pelo código do PostgREST/SQLSTATE; qualquer outro erro
+    (regra/permissão, coluna inexistente, dado inválido, 4xx) falharia igual na próxima tentativa.
+    """
+    if isinstance(erro, (CircuitoAberto,) + ERROS_REDE):
+        return True
+    status = _status_http(erro)
+    if status is not None:
+        return status >= 500 or status == 429
+    codigo = str(getattr(erro, "code", "") or "")
+    return codigo in PGRST_TRANSITORIOS or codigo.startswith(SQLSTATE_TRANSITORIOS)
+
+
+# Bytes dos corpos enviados pela thread atual (somados pelo gancho de contar_bytes_enviados)
+_enviados = threading.local()
+
+
+def contar_bytes_enviados(sessao):
+    """Soma, por thread, o corpo de cada requisição do cliente httpx do PostgREST
+
+    O tamanho é o do corpo que o próprio cliente já serializou: nada é convertido em JSON de novo
+    só para medir. medir() zera a soma antes da chamada e a registra no contador depois.
+    """
+    def ao_enviar(requisicao):
+        _enviados.bytes = getattr(_enviados, "bytes", 0) + len(requisicao.content)
+
+    ganchos = sessao.event_hooks
+    sessao.event_hooks = {**ganchos, "request": list(ganchos.get("request", [])) + [ao_enviar]}
+
+
+def medir(contador, operacao, executar):
+    """Executa a chamada ao banco e registra a ida no contador (mesmo se falhar)"""
+    inicio = time.perf_counter()
+    resultado = None
+    _enviados.bytes = 0
+    try:
+        resultado = executar()
+        return resultado
+    finally:
+        dados = getattr(resultado, "data", None)
+        linhas = len(dados) if isinstance(dados, list) else 0
+        contador.registrar(operacao, linhas, time.perf_counter() - inicio, _enviados.bytes)
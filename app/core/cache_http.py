@@ -0,0 +1,220 @@
+"""
+Cache HTTP com revalidação condicional (ETag / Last-Modified) para as APIs do PNCP
+
+Montado na session do extrator: respostas GET da API são guardadas em SQLite junto com os
+validadores; nas próximas buscas vai If-None-Match / If-Modified-Since e um 304 é respondido
+com o corpo guardado (marcado com nao_modificado=True, o que permite pular a gravação no banco).
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from requests.structures import CaseInsensitiveDict
+
+from .config import settings
+from .transporte import AdaptadorTransporte
+
+
+class ArmazemRespostas:
+    """Corpos e validadores por URL em SQLite (":memory:" quando não há arquivo)"""
+
+    def __init__(self, arquivo=None, max_entradas=50000):
+        self.arquivo = os.path.expanduser(arquivo) if arquivo else ":memory:"
+        self.max_entradas = max_entradas
+        if self.arquivo != ":memory:":
+            os.makedirs(os.path.dirname(self.arquivo), exist_ok=True)
+        self._lock = threading.Lock()
+        self._gravacoes = 0
+        self._conexao = sqlite3.connect(self.arquivo, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS respostas ("
+            " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT,"
+            " headers TEXT, corpo BLOB, gravado_em REAL)"
+        )
+
+    def obter(self, url):
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT etag, last_modified, headers, corpo FROM respostas WHERE url = ?", (url,)
+            ).fetchone()
+        if not linha:
+            return None
+        etag, last_modified, headers, corpo = linha
+        return {"etag": etag, "last_modified": last_modified, "headers": json.loads(headers), "corpo": corpo}
+
+    def guardar(self, url, etag, last_modified, headers, corpo):
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, json.dumps(headers), corpo, time.time())
+            )
+            self._gravacoes += 1
+            if self._gravacoes % 500 == 0:
+                # Mantém só as entradas mais recentes
+                self._conexao.execute(
+                    "DELETE FROM respostas WHERE url NOT IN "
+                    "(SELECT url FROM respostas ORDER BY gravado_em DESC LIMIT ?)", (self.max_entradas,)
+                )
+            self._conexao.commit()
+
+    def remover(self, url):
+        with self._lock:
+            self._conexao.execute("DELETE FROM respostas WHERE url = ?", (url,))
+            self._conexao.commit()
+
+
+class LeitorComCopia:
+    """Envolve response.raw: repassa o corpo (decodificado) a quem lê e guarda uma cópia até limite bytes
+
+    No fim do corpo chama ao_terminar(corpo, bytes lidos), com corpo None se passou do limite: a
+    cópia é abandonada e o corpo segue sendo lido em streaming normalmente.
+    """
+
+    def __init__(self, raw, limite, ao_terminar):
+        self._raw = raw
+        self._limite = limite
+        self._ao_terminar = ao_terminar
+        self._partes = []
+        self._excedeu = False
+        self._terminado = False
+        self.lidos = 0
+
+    def __getattr__(self, nome):
+        return getattr(self._raw, nome)
+
+    def read(self, amt=None, decode_content=None, **kwargs):
+        # A cópia guardada é o corpo decodificado, que é o que .content devolveria
+        dados = self._raw.read(amt, decode_content=True, **kwargs)
+        self.lidos += len(dados)
+        if dados and not self._excedeu:
+            if self.lidos > self._limite:
+                self._excedeu = True
+                self._partes = []
+            else:
+                self._partes.append(dados)
+        # read(0) (o ijson testa o tipo do arquivo assim) não é fim do corpo
+        fim = amt is None or (amt > 0 and not dados)
+        if fim and not self._terminado:
+            self._terminado = True
+            self._ao_terminar(None if self._excedeu else b"".join(self._partes), self.lidos)
+            self._partes = []
+        return dados
+
+    def readinto(self, b):
+        # O backend C do ijson lê por readinto: sem isso a leitura iria direto ao raw, sem cópia
+        dados = self.read(len(b))
+        b[:len(dados)] = dados
+        return len(dados)
+
+    def stream(self, amt=2 ** 16, decode_content=None):
+        while True:
+            dados = self.read(amt)
+            if not dados:
+                break
+            yield dados
+
+
+class AdaptadorCacheHTTP(AdaptadorTransporte):
+    """Adaptador de transporte que revalida GETs da API com ETag/Last-Modified e conta o que foi economizado"""
+
+    def __init__(self, armazem=None, prefixos=None, max_corpo_kb=None, **kwargs):
+        super().__init__(**kwargs)
+        self.armazem = armazem or ArmazemRespostas(settings.HTTP_CACHE_FILE or None)
+        self.prefixos = tuple(prefixos if prefixos is not None else (settings.PNCP_API_URL,))
+        self.max_corpo = (max_corpo_kb if max_corpo_kb is not None else settings.HTTP_CACHE_MAX_KB) * 1024
+        self._lock_metricas = threading.Lock()
+        self.limpar()
+
+    def send(self, request, stream=False, **kwargs):
+        if request.method != "GET" or not request.url.startswith(self.prefixos):
+            return super().send(request, stream=stream, **kwargs)
+
+        guardada = self.armazem.obter(request.url)
+        if guardada:
+            if guardada["etag"]:
+                request.headers["If-None-Match"] = guardada["etag"]
+            if guardada["last_modified"]:
+                request.headers["If-Modified-Since"] = guardada["last_modified"]
+
+        response = super().send(request, stream=stream, **kwargs)
+        response.nao_modificado = False
+
+        if response.status_code == 304 and guardada:
+            response.content  # corpo vazio: devolve a conexão ao pool
+            self._registrar(condicional=True, nao_modificado=True, economizados=len(guardada["corpo"]))
+            return self._resposta_do_cache(response, guardada)
+
+        recebidos = 0
+        if response.status_code == 200:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            tamanho = response.headers.get("Content-Length")
+            tamanho = int(tamanho) if tamanho and tamanho.isdigit() else None
+            headers = {k: v for k, v in response.headers.items() if k.lower() in ("content-type", "etag", "last-modified")}
+            if (etag or last_modified) and tamanho is not None and tamanho <= self.max_corpo:
+                # Tamanho conhecido e pequeno: lê o corpo para guardar (.content/.json() continuam valendo)
+                corpo = response.content
+                response.lido_pelo_cache = True
+                recebidos = len(corpo)
+                if len(corpo) <= self.max_corpo:
+                    self.armazem.guardar(request.url, etag, last_modified, headers, corpo)
+            elif (etag or last_modified) and tamanho is None:
+                # Sem Content-Length (chunked): o corpo segue em streaming e a cópia é guardada no
+                # fim da leitura, só se couber em max_corpo
+                def ao_terminar(corpo, lidos, url=request.url):
+                    if corpo is not None:
+                        self.armazem.guardar(url, etag, last_modified, headers, corpo)
+                    self._registrar_recebidos(lidos)
+                response.raw = LeitorComCopia(response.raw, self.max_corpo, ao_terminar)
+            else:
+                recebidos = tamanho or 0
+        elif guardada and response.status_code == 404:
+            self.armazem.remover(request.url)
+
+        self._registrar(condicional=bool(guardada), recebidos=recebidos)
+        return response
+
+    def _resposta_do_cache(self, response_304, guardada):
+        """Resposta 200 montada com o corpo guardado"""
+        response = response_304
+        response.status_code = 200
+        response.reason = "OK (cache)"
+        headers = CaseInsensitiveDict(guardada["headers"])
+        headers.update(response_304.headers)
+        response.headers = headers
+        response._content = guardada["corpo"]
+        response._content_consumed = True
+        response.nao_modificado = True
+        response.lido_pelo_cache = True
+        return response
+
+    def _registrar(self, condicional=False, nao_modificado=False, recebidos=0, economizados=0):
+        with self._lock_metricas:
+            self.metricas["requisicoes"] += 1
+            self.metricas["condicionais"] += int(condicional)
+            self.metricas["nao_modificados"] += int(nao_modificado)
+            self.metricas["bytes_recebidos"] += recebidos
+            self.metricas["bytes_economizados"] += economizados
+
+    def _registrar_recebidos(self, recebidos):
+        with self._lock_metricas:
+            self.metricas["bytes_recebidos"] += recebidos
+
+    def limpar(self):
+        with self._lock_metricas:
+            self.metricas = dict.fromkeys(
+                ("requisicoes", "condicionais", "nao_modificados", "bytes_recebidos", "bytes_economizados"), 0
+            )
+
+    def resumo(self):
+        with self._lock_metricas:
+            m = dict(self.metricas)
+        m["taxa_304"] = round(m["nao_modificados"] / m["condicionais"], 3) if m["condicionais"] else None
+        total = m["bytes_recebidos"] + m["bytes_economizados"]
+        m["economia_banda"] = round(m["bytes_economizados"] / total, 3) if total else None
+        m["mb_economizados"] = round(m["bytes_economizados"] / (1024 * 1024), 2)
+        return m
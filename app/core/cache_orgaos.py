@@ -0,0 +1,138 @@
+"""
+Cache dos dados de órgão (GET /orgaos/{cnpj}) por CNPJ
+
+LRU limitado com TTL, opcionalmente gravado em disco (JSON) para sobreviver a reinícios
+e às execuções do scheduler. Os mesmos compradores publicam dezenas de editais por dia.
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from collections import OrderedDict
+
+from .config import settings
+
+
+class CacheOrgaos:
+    """LRU + TTL dos dados de órgão, com contadores de acerto/falha"""
+
+    def __init__(self, max_itens=None, ttl_horas=None, arquivo=None, gravar_a_cada=25):
+        self.max_itens = max(1, max_itens if max_itens is not None else settings.ORGAO_CACHE_MAX)
+        self.ttl = (ttl_horas if ttl_horas is not None else settings.ORGAO_CACHE_TTL_HORAS) * 3600
+        arquivo = settings.ORGAO_CACHE_FILE if arquivo is None else arquivo
+        self.arquivo = os.path.expanduser(arquivo) if arquivo else None
+        self.gravar_a_cada = gravar_a_cada
+
+        self._itens = OrderedDict()  # cnpj -> (dados, gravado_em)
+        self._lock = threading.Lock()
+        self._alterados = 0
+
+        # Métricas
+        self.acertos = 0
+        self.falhas = 0
+        self.expirados = 0
+
+        if self.arquivo:
+            self._carregar()
+            atexit.register(self.salvar)
+
+    def obter(self, cnpj):
+        """Dados do órgão em cache (ou None se ausente/expirado)"""
+        with self._lock:
+            entrada = self._itens.get(cnpj)
+            if entrada is None:
+                self.falhas += 1
+                return None
+
+            dados, gravado_em = entrada
+            if self.ttl and time.time() - gravado_em > self.ttl:
+                del self._itens[cnpj]
+                self.expirados += 1
+                self.falhas += 1
+                return None
+
+            self._itens.move_to_end(cnpj)
+            self.acertos += 1
+            return dados
+
+    def guardar(self, cnpj, dados):
+        """Guarda os dados de um órgão (respostas vazias não são guardadas)"""
+        if not cnpj or not dados:
+            return
+        with self._lock:
+            self._itens[cnpj] = (dados, time.time())
+            self._itens.move_to_end(cnpj)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+            self._alterados += 1
+            gravar = self.arquivo and self._alterados >= self.gravar_a_cada
+
+        if gravar:
+            self.salvar()
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._alterados += 1
+
+    def salvar(self):
+        """Grava as entradas válidas em disco (arquivo temporário + rename)"""
+        if not self.arquivo:
+            return False
+
+        with self._lock:
+            if not self._alterados:
+                return False
+            agora = time.time()
+            entradas = {
+                cnpj: {"dados": dados, "gravado_em": gravado_em}
+                for cnpj, (dados, gravado_em) in self._itens.items()
+                if not self.ttl or agora - gravado_em <= self.ttl
+            }
+            self._alterados = 0
+
+        try:
+            os.makedirs(os.path.dirname(self.arquivo), exist_ok=True)
+            temporario = f"{self.arquivo}.tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(entradas, f, ensure_ascii=False)
+            os.replace(temporario, self.arquivo)
+            return True
+        except OSError as e:
+            print(f" Nao foi possivel gravar cache de orgaos: {e}")
+            return False
+
+    def status(self):
+        with self._lock:
+            tamanho = len(self._itens)
+        consultas = self.acertos + self.falhas
+        return {
+            "tamanho": tamanho,
+            "max_itens": self.max_itens,
+            "ttl_horas": round(self.ttl / 3600, 2),
+            "arquivo": self.arquivo,
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "expirados": self.expirados,
+            "taxa_acerto": round(self.acertos / consultas, 3) if consultas else None
+        }
+
+    def _carregar(self):
+        try:
+            with open(self.arquivo, encoding="utf-8") as f:
+                entradas = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        agora = time.time()
+        validas = sorted(
+            ((cnpj, e["dados"], e.get("gravado_em", 0)) for cnpj, e in entradas.items()
+             if isinstance(e, dict) and e.get("dados") and (not self.ttl or agora - e.get("gravado_em", 0) <= self.ttl)),
+            key=lambda entrada: entrada[2]
+        )
+        with self._lock:
+            for cnpj, dados, gravado_em in validas[-self.max_itens:]:
+                self._itens[cnpj] = (dados, gravado_em)
+        print(f"Cache de orgaos carregado: {len(self._itens)} orgaos")
@@ -0,0 +1,124 @@
+"""
+Índice rótulo -> valor da página de detalhe do edital
+
+A página é segmentada uma única vez (blocos "<strong>Rótulo:</strong> valor" do DOM, ou o texto
+visível quebrado nos rótulos conhecidos) e todos os campos são respondidos a partir do índice.
+"""
+
+import re
+import unicodedata
+
+from .parsers import extrair_blocos_detalhe, texto_detalhe
+
+
+# Campo -> rótulos aceitos (o primeiro presente na página vence)
+ROTULOS = (
+    ("data_divulgacao_pncp", ("Data de divulgação no PNCP",)),
+    ("ultima_atualizacao", ("Última atualização",)),
+    ("orgao", ("Órgão",)),
+    ("local", ("Local",)),
+    ("modalidade", ("Modalidade da contratação",)),
+    ("amparo_legal", ("Amparo legal",)),
+    ("tipo", ("Tipo",)),
+    ("modo_disputa", ("Modo de disputa",)),
+    ("data_inicio_propostas", ("Data de início de recebimento de propostas",)),
+    ("data_fim_propostas", ("Data fim de recebimento de propostas",)),
+    ("data_abertura", ("Data de abertura das propostas", "Data de abertura da proposta", "Data da sessão")),
+    ("situacao", ("Situação",)),
+    ("objeto", ("Objeto",)),
+    ("registro_preco", ("Registro de preço",)),
+    ("fonte_orcamentaria", ("Fonte orçamentária",)),
+    ("unidade_compradora", ("Unidade compradora",)),
+    ("id_contratacao_pncp", ("Id contratação PNCP",)),
+    ("fonte", ("Fonte",)),
+)
+
+# Tamanho máximo de cada campo texto (mesmos limites das regex antigas)
+LIMITES = {
+    "orgao": 200, "local": 100, "modalidade": 100, "amparo_legal": 200, "tipo": 100,
+    "modo_disputa": 100, "situacao": 100, "objeto": 500, "registro_preco": 50,
+    "fonte_orcamentaria": 200, "unidade_compradora": 200, "id_contratacao_pncp": 100, "fonte": 200,
+}
+
+_RE_DATA = re.compile(r"\d{2}/\d{2}/\d{4}")
+_RE_DATA_HORA = re.compile(r"\d{2}/\d{2}/\d{4}\s+\d{2}:\d{2}")
+_RE_DATA_HORA_OPCIONAL = re.compile(r"\d{2}/\d{2}/\d{4}(?:\s+\d{2}:\d{2})?")
+
+# Campos de data: padrão exigido e valor quando ausente
+DATAS = {
+    "data_divulgacao_pncp": (_RE_DATA, None),
+    "ultima_atualizacao": (_RE_DATA, None),
+    "data_inicio_propostas": (_RE_DATA_HORA, ""),
+    "data_fim_propostas": (_RE_DATA_HORA, ""),
+    "data_abertura": (_RE_DATA_HORA_OPCIONAL, None),
+}
+
+
+def normalizar_rotulo(rotulo):
+    """Minúsculo, sem acentos e com espaços colapsados"""
+    sem_acento = unicodedata.normalize("NFKD", rotulo).encode("ascii", "ignore").decode("ascii")
+    return " ".join(sem_acento.lower().split())
+
+
+# Campo -> rótulos já normalizados (consultas no índice)
+_CHAVES = {campo: tuple(normalizar_rotulo(r) for r in rotulos) for campo, rotulos in ROTULOS}
+
+_TODOS_ROTULOS = sorted({r for _, rotulos in ROTULOS for r in rotulos}, key=len, reverse=True)
+
+# Fallback em texto: uma alternação com os rótulos mais longos primeiro ("Fonte orçamentária" antes de "Fonte")
+_RE_ROTULOS_TEXTO = re.compile(
+    r"(?<!\w)(" + "|".join(r"\s+".join(map(re.escape, r.split())) for r in _TODOS_ROTULOS) + r")\s*:",
+    re.IGNORECASE
+)
+
+
+def segmentar_texto(texto):
+    """Quebra o texto visível nos rótulos conhecidos; cada valor vai até o próximo rótulo"""
+    pares = []
+    ocorrencias = list(_RE_ROTULOS_TEXTO.finditer(texto))
+    for i, match in enumerate(ocorrencias):
+        fim = ocorrencias[i + 1].start() if i + 1 < len(ocorrencias) else len(texto)
+        pares.append((match.group(1), texto[match.end():fim].strip()))
+    return pares
+
+
+class IndiceDetalhe:
+    """Rótulos da página de detalhe indexados pelo nome normalizado"""
+
+    def __init__(self, pares):
+        self.indice = {}
+        for rotulo, valor in pares:
+            self.indice.setdefault(normalizar_rotulo(rotulo), valor)
+
+    @classmethod
+    def de_html(cls, html, backend=None):
+        """Usa a estrutura do DOM; se a página não tiver blocos rotulados, segmenta o texto"""
+        indice = cls(extrair_blocos_detalhe(html, backend))
+        if not any(chave in indice.indice for chaves in _CHAVES.values() for chave in chaves):
+            indice = cls(segmentar_texto(texto_detalhe(html, backend)))
+        return indice
+
+    def valor(self, campo):
+        for chave in _CHAVES[campo]:
+            valor = self.indice.get(chave)
+            if valor is not None:
+                return valor
+        return None
+
+    def campos(self):
+        """Todos os campos da página, já no formato gravado no edital"""
+        dados = {}
+        for campo, _ in ROTULOS:
+            valor = self.valor(campo)
+            if campo in DATAS:
+                padrao, ausente = DATAS[campo]
+                match = padrao.search(valor) if valor else None
+                dados[campo] = match.group(0) if match else ausente
+            else:
+                dados[campo] = (valor or "").strip()[:LIMITES[campo]]
+        return dados
+
+
+def extrair_campos_detalhe(html, backend=None):
+    """Campos da página de detalhe em uma passada pelo HTML"""
+    return IndiceDetalhe.de_html(html, backend).campos()
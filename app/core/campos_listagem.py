@@ -0,0 +1,126 @@
+"""
+Extração em passada única dos campos de um container da listagem
+
+O texto do container vem no formato "Rótulo: | valor | Rótulo: | valor" (get_text com " | ").
+Em vez de uma regex por campo, o texto é quebrado uma vez e cada rótulo é mapeado ao seu valor.
+"""
+
+import re
+from datetime import date
+
+
+SEPARADOR = " | "
+
+# Prefixo do rótulo (minúsculo) -> campo do dicionário; mesmo critério das regex antigas ("Modalidade[^:]*:")
+ROTULOS = (
+    ("modalidade", "modalidade"),
+    ("última atualização", "ultima_atualizacao"),
+    ("ultima atualizacao", "ultima_atualizacao"),
+    ("órgão", "orgao"),
+    ("orgao", "orgao"),
+    ("local", "local"),
+    ("objeto", "objeto"),
+)
+
+CAMPOS = ("edital", "modalidade", "ultima_atualizacao", "orgao", "local", "objeto")
+
+_RE_EDITAL = re.compile(r"Edital\s+n[°º]?\s*(\d+/\d+)", re.IGNORECASE)
+_RE_DATA = re.compile(r"(\d{1,2})[/-](\d{1,2})[/-](\d{4})|(\d{4})-(\d{1,2})-(\d{1,2})")
+_RE_DATA_LISTAGEM = re.compile(r"\d{2}/\d{2}/\d{4}")
+
+
+# Os rótulos se repetem em todos os containers: a resolução é memorizada por texto cru
+_cache_rotulos = {}
+
+
+def _campo_do_rotulo(rotulo):
+    try:
+        return _cache_rotulos[rotulo]
+    except KeyError:
+        pass
+
+    normalizado = " ".join(rotulo.split()).lower()
+    campo = None
+    for prefixo, nome in ROTULOS:
+        if normalizado.startswith(prefixo):
+            campo = nome
+            break
+
+    if len(_cache_rotulos) < 1000:
+        _cache_rotulos[rotulo] = campo
+    return campo
+
+
+def converter_data(texto):
+    """Primeira data (DD/MM/YYYY, DD-MM-YYYY ou YYYY-MM-DD) do texto como date, ou None"""
+    if not texto:
+        return None
+    match = _RE_DATA.search(texto)
+    if not match:
+        return None
+    try:
+        if match.group(1):
+            return date(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+        return date(int(match.group(4)), int(match.group(5)), int(match.group(6)))
+    except ValueError:
+        return None
+
+
+def extrair_campos_container(texto_completo):
+    """Mapeia rótulos para valores em uma passada; retorna (campos, data_atualizacao)"""
+    campos = dict.fromkeys(CAMPOS, "")
+    tokens = texto_completo.split(SEPARADOR)
+    total = len(tokens)
+    i = 0
+
+    while i < total:
+        token = tokens[i]
+        i += 1
+
+        if not campos["edital"]:
+            match = _RE_EDITAL.search(token)
+            if match:
+                campos["edital"] = match.group(0)
+                continue
+
+        rotulo, separador, resto = token.partition(":")
+        if not separador or len(rotulo) > 40:
+            continue
+
+        campo = _campo_do_rotulo(rotulo)
+        if campo is None or campos[campo]:
+            continue
+
+        valor = resto.strip()
+        if not valor and i < total:
+            # Valor no token seguinte ("Rótulo: | valor")
+            valor = tokens[i].strip()
+            i += 1
+
+        if campo == "ultima_atualizacao":
+            match = _RE_DATA_LISTAGEM.match(valor)
+            valor = match.group(0) if match else ""
+        campos[campo] = valor
+
+    return campos, converter_data(campos["ultima_atualizacao"])
+
+
+def dados_do_container(container, base_url=""):
+    """Dados básicos de um container a.br-item (ou None se não tiver link de edital)"""
+    link = container.get("href", "")
+    id_pncp = link.split("/editais/")[-1] if "/editais/" in link else ""
+    if not id_pncp:
+        return None
+
+    texto_completo = container.get_text(separator=SEPARADOR, strip=True)
+    dados = {
+        "link": f"{base_url}{link}" if link.startswith("/") else link,
+        "id_pncp": id_pncp,
+        "texto_completo": texto_completo
+    }
+
+    # Extração em passada única (rótulo -> valor), já com a data convertida
+    campos, data_atualizacao = extrair_campos_container(texto_completo)
+    dados.update(campos)
+    dados["data_atualizacao"] = data_atualizacao
+    return dados
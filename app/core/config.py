@@ -16,6 +16,14 @@ class Settings:
     SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
     STORAGE_BUCKET: str = os.getenv("STORAGE_BUCKET", "pncpfiles")
     
+    # Banco - "supabase" (projeto remoto) ou "local" (SQLite em processo, sem rede, para testes e benchmarks)
+    # com latência (ms) e fração de chamadas com erro 503 injetadas; arquivo/diretório vazios = só memória
+    SUPABASE_BACKEND: str = os.getenv("SUPABASE_BACKEND", "supabase").lower()
+    SUPABASE_LOCAL_FILE: str = os.getenv("SUPABASE_LOCAL_FILE", "")
+    SUPABASE_LOCAL_STORAGE_DIR: str = os.getenv("SUPABASE_LOCAL_STORAGE_DIR", "")
+    SUPABASE_LOCAL_LATENCIA_MS: float = float(os.getenv("SUPABASE_LOCAL_LATENCIA_MS", 0))
+    SUPABASE_LOCAL_TAXA_FALHA: float = float(os.getenv("SUPABASE_LOCAL_TAXA_FALHA", 0))
+    
     # API
     API_TITLE: str = "PNCP Extrator"
     API_VERSION: str = "3.0.0"
@@ -29,16 +37,130 @@ class Settings:
     SELENIUM_HEADLESS: bool = os.getenv("SELENIUM_HEADLESS", "true").lower() == "true"
     SELENIUM_TIMEOUT: int = 30
     
+    # Pool de navegadores (páginas de listagem e detalhe em paralelo)
+    SELENIUM_POOL_SIZE: int = int(os.getenv("SELENIUM_POOL_SIZE", 1))
+    
+    # Ciclo de vida dos navegadores
+    CHROMEDRIVER_PATH: str = os.getenv("CHROMEDRIVER_PATH", "")
+    CHROMEDRIVER_CACHE_FILE: str = os.getenv("CHROMEDRIVER_CACHE_FILE", "~/.cache/licitaweb/chromedriver.json")
+    SELENIUM_KEEP_WARM: bool = os.getenv("SELENIUM_KEEP_WARM", "true").lower() == "true"
+    SELENIUM_RECYCLE_PAGES: int = int(os.getenv("SELENIUM_RECYCLE_PAGES", 300))
+    SELENIUM_RECYCLE_RSS_MB: int = int(os.getenv("SELENIUM_RECYCLE_RSS_MB", 1200))
+    SELENIUM_RSS_INTERVALO: int = int(os.getenv("SELENIUM_RSS_INTERVALO", 10))
+    
+    # Prontidão de página - "conteudo" (containers/rótulos) ou "rede" (rede ociosa)
+    SELENIUM_READY_MODE: str = os.getenv("SELENIUM_READY_MODE", "conteudo")
+    SELENIUM_READY_TIMEOUT: float = float(os.getenv("SELENIUM_READY_TIMEOUT", 10))
+    SELENIUM_READY_POLL: float = float(os.getenv("SELENIUM_READY_POLL", 0.1))
+    SELENIUM_READY_IDLE: float = float(os.getenv("SELENIUM_READY_IDLE", 0.5))
+    
     # PNCP
-    PNCP_BASE_URL: str = "https://pncp.gov.br"
-    PNCP_API_URL: str = "https://pncp.gov.br/api/pncp/v1"
+    PNCP_BASE_URL: str = os.getenv("PNCP_BASE_URL", "https://pncp.gov.br")
+    PNCP_API_URL: str = os.getenv("PNCP_API_URL", "https://pncp.gov.br/api/pncp/v1")
+    PNCP_SEARCH_URL: str = os.getenv("PNCP_SEARCH_URL", "https://pncp.gov.br/api/search/")
+    PNCP_SEARCH_STATUS: str = os.getenv("PNCP_SEARCH_STATUS", "recebendo_proposta")
+    
+    # Threads compartilhadas para itens/histórico/arquivos/órgão (4 chamadas por edital)
+    PNCP_API_WORKERS: int = int(os.getenv("PNCP_API_WORKERS", 16))
+    
+    # Itens do edital lidos página a página (atas de registro de preço têm milhares)
+    ITENS_TAMANHO_PAGINA: int = int(os.getenv("ITENS_TAMANHO_PAGINA", 500))
+    ITENS_MAX_PAGINAS: int = int(os.getenv("ITENS_MAX_PAGINAS", 100))
+    ITENS_MAX_ARMAZENADOS: int = int(os.getenv("ITENS_MAX_ARMAZENADOS", 1000))
+    # Itens além de ITENS_MAX_ARMAZENADOS esperam a gravação em disco (vazio = descartados, com
+    # itens_truncados na linha); arquivos esquecidos são apagados depois de ITENS_EXCEDENTES_DIAS
+    ITENS_EXCEDENTES_DIR: str = os.getenv("ITENS_EXCEDENTES_DIR", "~/.cache/licitaweb/itens_excedentes")
+    ITENS_EXCEDENTES_DIAS: int = int(os.getenv("ITENS_EXCEDENTES_DIAS", 7))
+    
+    # Transporte HTTP: conexões por host (0 = PNCP_API_WORKERS + EXTRACAO_WORKERS) e novas tentativas de GET
+    HTTP_POOL_HOSTS: int = int(os.getenv("HTTP_POOL_HOSTS", 10))
+    HTTP_POOL_MAXSIZE: int = int(os.getenv("HTTP_POOL_MAXSIZE", 0))
+    HTTP_RETRY_TOTAL: int = int(os.getenv("HTTP_RETRY_TOTAL", 3))
+    HTTP_RETRY_BACKOFF: float = float(os.getenv("HTTP_RETRY_BACKOFF", 0.5))
+    HTTP_RETRY_BACKOFF_MAX: float = float(os.getenv("HTTP_RETRY_BACKOFF_MAX", 30))
+    HTTP_RETRY_AFTER_MAX: float = float(os.getenv("HTTP_RETRY_AFTER_MAX", 60))
+    
+    # Limitador de taxa adaptativo (AIMD, req/s) compartilhado por APIs e navegador
+    LIMITADOR_ATIVO: bool = os.getenv("LIMITADOR_ATIVO", "true").lower() == "true"
+    LIMITADOR_TAXA_INICIAL: float = float(os.getenv("LIMITADOR_TAXA_INICIAL", 20))
+    LIMITADOR_TAXA_MIN: float = float(os.getenv("LIMITADOR_TAXA_MIN", 0.5))
+    LIMITADOR_TAXA_MAX: float = float(os.getenv("LIMITADOR_TAXA_MAX", 100))
+    LIMITADOR_INCREMENTO: float = float(os.getenv("LIMITADOR_INCREMENTO", 2))
+    LIMITADOR_FATOR_REDUCAO: float = float(os.getenv("LIMITADOR_FATOR_REDUCAO", 0.5))
+    LIMITADOR_RAJADA: float = float(os.getenv("LIMITADOR_RAJADA", 10))
+    LIMITADOR_FATOR_LATENCIA: float = float(os.getenv("LIMITADOR_FATOR_LATENCIA", 2.0))
+    
+    # Disjuntores por dependência (endpoints do PNCP, leitura/escrita/storage do Supabase)
+    DISJUNTOR_LIMITE_FALHAS: int = int(os.getenv("DISJUNTOR_LIMITE_FALHAS", 5))
+    DISJUNTOR_TEMPO_ABERTO: float = float(os.getenv("DISJUNTOR_TEMPO_ABERTO", 30))
+    DISJUNTOR_TEMPO_ABERTO_MAX: float = float(os.getenv("DISJUNTOR_TEMPO_ABERTO_MAX", 600))
+    
+    # Backlog de reprocessamento (BACKLOG_FILE vazio = só memória)
+    BACKLOG_FILE: str = os.getenv("BACKLOG_FILE", "~/.cache/licitaweb/backlog.json")
+    BACKLOG_MAX_TENTATIVAS: int = int(os.getenv("BACKLOG_MAX_TENTATIVAS", 10))
+    BACKLOG_LOTE: int = int(os.getenv("BACKLOG_LOTE", 200))
+    
+    # Cache HTTP com revalidação condicional das APIs (HTTP_CACHE_FILE vazio = só memória)
+    HTTP_CACHE_ATIVO: bool = os.getenv("HTTP_CACHE_ATIVO", "true").lower() == "true"
+    HTTP_CACHE_FILE: str = os.getenv("HTTP_CACHE_FILE", "~/.cache/licitaweb/http_cache.sqlite")
+    HTTP_CACHE_MAX_KB: int = int(os.getenv("HTTP_CACHE_MAX_KB", 2048))
+    
+    # Cache de órgãos por CNPJ (ORGAO_CACHE_FILE vazio = só memória)
+    ORGAO_CACHE_MAX: int = int(os.getenv("ORGAO_CACHE_MAX", 5000))
+    ORGAO_CACHE_TTL_HORAS: float = float(os.getenv("ORGAO_CACHE_TTL_HORAS", 24))
+    ORGAO_CACHE_FILE: str = os.getenv("ORGAO_CACHE_FILE", "~/.cache/licitaweb/orgaos.json")
+    
+    # Extração de cada edital - "camadas" (API, navegador só se faltar campo) ou "hibrido" (sempre navegador)
+    EXTRACAO_MODO: str = os.getenv("EXTRACAO_MODO", "camadas").lower()
+    EXTRACAO_WORKERS: int = int(os.getenv("EXTRACAO_WORKERS", 4))
+    EXTRACAO_CAMPOS_OBRIGATORIOS: list = [
+        campo.strip() for campo in os.getenv(
+            "EXTRACAO_CAMPOS_OBRIGATORIOS",
+            "orgao,local,modalidade,situacao,objeto,amparo_legal,modo_disputa,data_abertura"
+        ).split(",") if campo.strip()
+    ]
+    
+    # Processos para o parse do HTML (0 = na própria thread)
+    PARSE_WORKERS: int = int(os.getenv("PARSE_WORKERS", min(4, max(1, (os.cpu_count() or 2) - 1))))
+    
+    # Pipeline de extração: tamanho das filas entre estágios e workers por estágio
+    # (a extração usa o tamanho do lote: navegadores do pool ou EXTRACAO_WORKERS)
+    PIPELINE_FILA: int = int(os.getenv("PIPELINE_FILA", 50))
+    PIPELINE_WORKERS_VERIFICACAO: int = int(os.getenv("PIPELINE_WORKERS_VERIFICACAO", 4))
+    PIPELINE_WORKERS_ANEXOS: int = int(os.getenv("PIPELINE_WORKERS_ANEXOS", 2))
+    PIPELINE_WORKERS_PERSISTENCIA: int = int(os.getenv("PIPELINE_WORKERS_PERSISTENCIA", 2))
+    
+    # Verificação no banco: ids por consulta in_ (uma ida ao banco por página da listagem)
+    VERIFICACAO_LOTE: int = int(os.getenv("VERIFICACAO_LOTE", 100))
+    
+    # Gravação em lote (upsert por id_pncp): linhas por lote e espera máxima no buffer (segundos)
+    ESCRITA_LOTE: int = int(os.getenv("ESCRITA_LOTE", 50))
+    ESCRITA_INTERVALO: float = float(os.getenv("ESCRITA_INTERVALO", 1.0))
+    
+    # Itens, anexos e eventos do histórico por upsert nas tabelas filhas
+    FILHAS_LOTE: int = int(os.getenv("FILHAS_LOTE", 1000))
+    
+    # Outbox em disco das gravações e uploads (OUTBOX_FILE vazio = só memória): backoff entre
+    # tentativas com o banco fora do ar e quanto o fim de uma execução espera por ela (segundos)
+    OUTBOX_FILE: str = os.getenv("OUTBOX_FILE", "~/.cache/licitaweb/outbox.sqlite")
+    OUTBOX_BACKOFF: float = float(os.getenv("OUTBOX_BACKOFF", 2))
+    OUTBOX_BACKOFF_MAX: float = float(os.getenv("OUTBOX_BACKOFF_MAX", 300))
+    OUTBOX_MAX_TENTATIVAS: int = int(os.getenv("OUTBOX_MAX_TENTATIVAS", 50))
+    OUTBOX_ESPERA_FIM: float = float(os.getenv("OUTBOX_ESPERA_FIM", 30))
+    
+    # Descoberta de editais - "api" (JSON de busca) ou "selenium" (listagem no navegador)
+    DISCOVERY_BACKEND: str = os.getenv("DISCOVERY_BACKEND", "api").lower()
+    LISTAGEM_LIMITE_SEGURANCA: int = int(os.getenv("LISTAGEM_LIMITE_SEGURANCA", 1000))
     
     def is_configured(self) -> bool:
         """Verifica se as configurações essenciais estão definidas"""
-        return bool(self.SUPABASE_URL and self.SUPABASE_KEY)
+        return self.SUPABASE_BACKEND == "local" or bool(self.SUPABASE_URL and self.SUPABASE_KEY)
     
     def validate_config(self):
         """Valida se todas as configurações obrigatórias estão presentes"""
+        if self.SUPABASE_BACKEND == "local":
+            print("OK - Banco local (SUPABASE_BACKEND=local), sem Supabase remoto")
+            return
         print(f"DEBUG - SUPABASE_URL: '{self.SUPABASE_URL}'")
         print(f"DEBUG - SUPABASE_KEY: '{self.SUPABASE_KEY[:20]}...'")
         
@@ -0,0 +1,90 @@
+"""
+Descoberta de editais via API JSON de busca do PNCP (sem navegador)
+"""
+
+from datetime import datetime
+
+from .config import settings
+
+
+class DescobertaAPI:
+    """Lista editais usando o endpoint de busca que alimenta /app/editais"""
+
+    def __init__(self, session, search_url=None, status=None, timeout=15):
+        self.session = session
+        self.search_url = search_url or settings.PNCP_SEARCH_URL
+        self.status = status or settings.PNCP_SEARCH_STATUS
+        self.timeout = timeout
+
+    def buscar_pagina(self, pagina, tam_pagina):
+        """Busca uma página da listagem (mais recentes primeiro)"""
+        params = {
+            "q": "",
+            "tipos_documento": "edital",
+            "ordenacao": "-data",
+            "pagina": pagina,
+            "tam_pagina": tam_pagina,
+            "status": self.status
+        }
+
+        response = self.session.get(self.search_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+
+        itens = response.json().get("items") or []
+        editais = []
+        for item in itens:
+            edital = self.converter_item(item)
+            if edital:
+                editais.append(edital)
+        return editais
+
+    def converter_item(self, item):
+        """Converte um item da busca no mesmo formato de extrair_dados_container"""
+        item_url = item.get("item_url") or ""
+        id_pncp = ""
+        if "/compras/" in item_url:
+            id_pncp = item_url.split("/compras/")[-1].strip("/")
+        elif item.get("orgao_cnpj") and item.get("ano") and item.get("numero_sequencial"):
+            id_pncp = f"{item['orgao_cnpj']}/{item['ano']}/{item['numero_sequencial']}"
+
+        if not id_pncp:
+            return None
+
+        municipio = item.get("municipio_nome") or ""
+        uf = item.get("uf") or ""
+
+        data_atualizacao = self.converter_data_iso(item.get("data_atualizacao_pncp") or item.get("data_publicacao_pncp"))
+
+        dados = {
+            "link": f"{settings.PNCP_BASE_URL}/app/editais/{id_pncp}",
+            "id_pncp": id_pncp,
+            "edital": item.get("title") or "",
+            "modalidade": item.get("modalidade_licitacao_nome") or "",
+            "ultima_atualizacao": data_atualizacao.strftime("%d/%m/%Y") if data_atualizacao else "",
+            "data_atualizacao": data_atualizacao,
+            "orgao": item.get("orgao_nome") or "",
+            "local": f"{municipio}/{uf}" if municipio and uf else municipio or uf,
+            "objeto": (item.get("description") or "").strip()
+        }
+
+        # Mantém o texto no formato " | " da listagem para quem ainda depende dele
+        dados["texto_completo"] = " | ".join([
+            dados["edital"],
+            f"Modalidade da Contratação: {dados['modalidade']}",
+            f"Última Atualização: {dados['ultima_atualizacao']}",
+            f"Órgão: {dados['orgao']}",
+            f"Local: {dados['local']}",
+            f"Objeto: {dados['objeto']}"
+        ])
+
+        return dados
+
+    @staticmethod
+    def converter_data_iso(valor):
+        """Converte datas ISO da API em date"""
+        if not valor:
+            return None
+        try:
+            return datetime.fromisoformat(str(valor)[:19]).date()
+        except ValueError:
+            return None
@@ -0,0 +1,157 @@
+"""
+Disjuntores (circuit breakers) por dependência externa
+
+Um por endpoint do PNCP (compra, itens, histórico, arquivos, órgão) e por operação no Supabase
+(leitura, escrita, storage). Depois de DISJUNTOR_LIMITE_FALHAS falhas seguidas o disjuntor abre e
+as chamadas falham na hora, sem esperar o timeout; passado o tempo aberto, uma única chamada de
+teste (meio aberto) decide se fecha de novo ou reabre com o dobro do tempo.
+"""
+
+import time
+import threading
+
+from .config import settings
+
+
+FECHADO = "fechado"
+ABERTO = "aberto"
+MEIO_ABERTO = "meio_aberto"
+
+
+class CircuitoAberto(Exception):
+    """Chamada recusada sem tentar: o disjuntor da dependência está aberto"""
+
+    def __init__(self, nome, segundos_restantes=0.0):
+        self.nome = nome
+        self.segundos_restantes = segundos_restantes
+        super().__init__(f"circuito aberto ({nome}), nova tentativa em {segundos_restantes:.0f}s")
+
+
+def falha_de_servidor(erro):
+    """Erros que indicam indisponibilidade (timeout, conexão, 5xx, 429) - 4xx não abre o disjuntor"""
+    if not erro:
+        return False
+    if erro.startswith("status "):
+        codigo = erro[7:]
+        return codigo.startswith("5") or codigo == "429"
+    return True
+
+
+class Disjuntor:
+    """Estado de uma dependência: fechado -> aberto -> meio aberto -> fechado/aberto"""
+
+    def __init__(self, nome, limite_falhas=None, tempo_aberto=None, tempo_aberto_max=None):
+        self.nome = nome
+        self.limite_falhas = limite_falhas or settings.DISJUNTOR_LIMITE_FALHAS
+        self.tempo_aberto_base = tempo_aberto or settings.DISJUNTOR_TEMPO_ABERTO
+        self.tempo_aberto_max = tempo_aberto_max or settings.DISJUNTOR_TEMPO_ABERTO_MAX
+        self._lock = threading.Lock()
+        self.estado = FECHADO
+        self.falhas_seguidas = 0
+        self.tempo_aberto = self.tempo_aberto_base
+        self.aberto_em = None
+        self._sonda_em_andamento = False
+
+        # Métricas
+        self.aberturas = 0
+        self.recusadas = 0
+        self.ultimo_erro = None
+
+    def permitir(self):
+        """True se a chamada pode ser feita; no meio aberto só uma por vez (a sonda)"""
+        with self._lock:
+            if self.estado == FECHADO:
+                return True
+            if self.estado == ABERTO and time.monotonic() - self.aberto_em >= self.tempo_aberto:
+                self.estado = MEIO_ABERTO
+                self._sonda_em_andamento = False
+            if self.estado == MEIO_ABERTO and not self._sonda_em_andamento:
+                self._sonda_em_andamento = True
+                return True
+            self.recusadas += 1
+            return False
+
+    def verificar(self):
+        """Como permitir(), mas levanta CircuitoAberto"""
+        if not self.permitir():
+            raise CircuitoAberto(self.nome, self.segundos_restantes())
+
+    def segundos_restantes(self):
+        if self.estado != ABERTO:
+            return 0.0
+        return max(0.0, self.tempo_aberto - (time.monotonic() - self.aberto_em))
+
+    def sucesso(self):
+        with self._lock:
+            if self.estado != FECHADO:
+                print(f"Disjuntor {self.nome} fechado (dependencia respondeu)")
+            self.estado = FECHADO
+            self.falhas_seguidas = 0
+            self.tempo_aberto = self.tempo_aberto_base
+            self._sonda_em_andamento = False
+
+    def falha(self, erro=None):
+        with self._lock:
+            self.falhas_seguidas += 1
+            self.ultimo_erro = str(erro)[:200] if erro else None
+            if self.estado == MEIO_ABERTO:
+                # Sonda falhou: reabre por mais tempo
+                self.tempo_aberto = min(self.tempo_aberto * 2, self.tempo_aberto_max)
+                self._abrir()
+            elif self.estado == FECHADO and self.falhas_seguidas >= self.limite_falhas:
+                self._abrir()
+
+    def liberar(self):
+        """Devolve a sonda sem veredito (a dependência nem chegou a ser chamada)"""
+        with self._lock:
+            self._sonda_em_andamento = False
+
+    def _abrir(self):
+        self.estado = ABERTO
+        self.aberto_em = time.monotonic()
+        self._sonda_em_andamento = False
+        self.aberturas += 1
+        print(f"Disjuntor {self.nome} ABERTO por {self.tempo_aberto:.0f}s ({self.falhas_seguidas} falhas seguidas)")
+
+    def registrar(self, erro):
+        """Atalho: erro de servidor conta como falha, o resto (inclusive 4xx) como sucesso"""
+        if falha_de_servidor(erro):
+            self.falha(erro)
+        else:
+            self.sucesso()
+
+    def status(self):
+        with self._lock:
+            return {
+                "estado": self.estado,
+                "falhas_seguidas": self.falhas_seguidas,
+                "aberturas": self.aberturas,
+                "recusadas": self.recusadas,
+                "reabre_em_s": round(self.segundos_restantes(), 1) if self.estado == ABERTO else None,
+                "ultimo_erro": self.ultimo_erro
+            }
+
+
+class Disjuntores:
+    """Disjuntores criados sob demanda, um por nome de dependência"""
+
+    def __init__(self):
+        self._itens = {}
+        self._lock = threading.Lock()
+
+    def obter(self, nome):
+        with self._lock:
+            disjuntor = self._itens.get(nome)
+            if disjuntor is None:
+                disjuntor = self._itens[nome] = Disjuntor(nome)
+            return disjuntor
+
+    def abertos(self):
+        with self._lock:
+            itens = list(self._itens.values())
+        return [d.nome for d in itens if d.estado != FECHADO]
+
+    def status(self):
+        with self._lock:
+            itens = sorted(self._itens.items())
+        return {nome: disjuntor.status() for nome, disjuntor in itens}
@@ -0,0 +1,299 @@
+"""
+Gravação dos editais em lote (write-behind)
+
+Os editais extraídos entram num buffer e uma thread grava com upsert em lotes de ESCRITA_LOTE
+linhas, ou quando o mais antigo espera mais de ESCRITA_INTERVALO segundos. Quem envia recebe um
+Future com o desfecho da linha (inserido, atualizado ou falhou) e não espera o banco.
+Se o lote inteiro falhar, as linhas são regravadas uma a uma para isolar a que causou o erro.
+
+Com uma outbox (outbox.py) cada linha é guardada em disco antes de entrar no buffer: falhas
+transitórias (rede, timeout, 5xx, disjuntor aberto) devolvem o lote ao buffer com backoff
+exponencial em vez de falhar, e o que sobrou de uma execução anterior é reenviado na partida.
+
+Com juntar(antiga, nova), cada chave tem no máximo uma linha esperando no buffer: a que chega se
+junta à que está lá, e uma versão antiga nunca é gravada depois de uma mais nova da mesma chave.
+"""
+
+import time
+import random
+import threading
+from concurrent.futures import Future, InvalidStateError
+
+from .config import settings
+from .disjuntores import CircuitoAberto
+
+
+INSERIDO = "inserido"
+ATUALIZADO = "atualizado"
+FALHOU = "falhou"
+
+
+class _Entrada:
+    """Uma linha no buffer (e, com outbox, o seq dela no SQLite)"""
+
+    __slots__ = ("dados", "existente", "futuro", "chegada", "seq", "tentativas", "proxima", "juntadas")
+
+    def __init__(self, dados, existente, futuro, seq=None, tentativas=0):
+        self.dados = dados
+        self.existente = existente
+        self.futuro = futuro
+        self.chegada = time.monotonic()
+        self.seq = seq
+        self.tentativas = tentativas
+        self.proxima = 0.0
+        # Versões mais antigas da mesma chave que foram juntadas a esta (gravadas e confirmadas com ela)
+        self.juntadas = []
+
+    def com_juntadas(self):
+        return self.juntadas + [self]
+
+
+class EscritorLote:
+    """Buffer de linhas gravadas por gravar_lote(linhas) -> linhas gravadas (com "id" e "id_pncp")
+
+    transitorio(erro) diz se vale tentar de novo (só com outbox; sem ela toda falha é definitiva).
+    juntar(dados antigos, dados novos) monta uma linha com duas versões da mesma chave.
+    """
+
+    def __init__(self, gravar_lote, tamanho=None, intervalo=None, chave="id_pncp", outbox=None, tipo="editais",
+                 transitorio=None, juntar=None):
+        self.gravar_lote = gravar_lote
+        self.tamanho = tamanho or settings.ESCRITA_LOTE
+        self.intervalo = intervalo if intervalo is not None else settings.ESCRITA_INTERVALO
+        self.chave = chave
+        self.outbox = outbox
+        self.tipo = tipo
+        self.transitorio = transitorio if outbox is not None else None
+        self.juntar = juntar
+        self._pendentes = []
+        self._em_gravacao = 0
+        self._condicao = threading.Condition()
+        self._thread = None
+        self._fechando = False
+        self._descarregar_ja = False
+        self.limpar()
+        self.recuperadas = self._recuperar()
+
+    def limpar(self):
+        self.lotes = 0
+        self.lotes_divididos = 0
+        self.adiamentos = 0
+        self.desfechos = {INSERIDO: 0, ATUALIZADO: 0, FALHOU: 0}
+        self.tempo_gravacao = 0.0
+
+    def _recuperar(self):
+        """Entradas deixadas na outbox por uma execução anterior voltam ao buffer"""
+        if self.outbox is None:
+            return 0
+        entradas = self.outbox.carregar(self.tipo)
+        if not entradas:
+            return 0
+        with self._condicao:
+            for entrada in entradas:
+                self._enfileirar(_Entrada(entrada["dados"], entrada["existente"], None, entrada["seq"], entrada["tentativas"]))
+            self._iniciar()
+            self._condicao.notify_all()
+        print(f"Outbox: {len(entradas)} gravacoes pendentes ({self.tipo}) reenviadas")
+        return len(entradas)
+
+    def enviar(self, dados, existente=False):
+        """Coloca a linha no buffer; o Future resolve com {"id", "id_pncp", "desfecho", "erro"}"""
+        futuro = Future()
+        # Em disco antes de qualquer tentativa: sobrevive a queda do banco e do processo
+        seq = self.outbox.adicionar(self.tipo, dados[self.chave], dados, existente) if self.outbox is not None else None
+        with self._condicao:
+            self._iniciar()
+            self._enfileirar(_Entrada(dados, existente, futuro, seq))
+            if len(self._pendentes) >= self.tamanho:
+                self._condicao.notify_all()
+        return futuro
+
+    def _enfileirar(self, entrada, mais_nova=True):
+        """Põe a entrada no buffer (com a condição travada); com juntar, une à da mesma chave que já espera
+
+        mais_nova=False quando a entrada volta ao buffer depois de uma falha: a que espera chegou depois.
+        """
+        if self.juntar is not None:
+            chave = entrada.dados[self.chave]
+            for posicao, pendente in enumerate(self._pendentes):
+                if pendente.dados[self.chave] != chave:
+                    continue
+                antiga, nova = (pendente, entrada) if mais_nova else (entrada, pendente)
+                nova.dados = self.juntar(antiga.dados, nova.dados)
+                nova.existente = nova.existente or antiga.existente
+                nova.chegada = min(nova.chegada, antiga.chegada)
+                nova.juntadas = antiga.com_juntadas() + nova.juntadas
+                antiga.juntadas = []
+                self._pendentes[posicao] = nova
+                return
+        self._pendentes.append(entrada)
+
+    def descarregar(self, timeout=None):
+        """Grava o que estiver no buffer e espera terminar (fim de execução)
+
+        Retorna False se ainda houver linhas pendentes (banco fora do ar) ao fim do timeout;
+        com outbox elas continuam guardadas e sendo reenviadas.
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._condicao:
+            self._descarregar_ja = True
+            self._condicao.notify_all()
+            try:
+                while self._pendentes or self._em_gravacao:
+                    restante = None if limite is None else limite - time.monotonic()
+                    if restante is not None and restante <= 0:
+                        return False
+                    self._condicao.wait(restante)
+            finally:
+                self._descarregar_ja = False
+        return True
+
+    def fechar(self, timeout=None):
+        self.descarregar(timeout)
+        with self._condicao:
+            self._fechando = True
+            self._condicao.notify_all()
+
+    def _iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._fechando = False
+            self._thread = threading.Thread(target=self._drenar, name=f"escritor-{self.tipo}", daemon=True)
+            self._thread.start()
+
+    def _proximo_lote(self):
+        """Lote pronto para gravar, ou (None, espera em segundos) - chamado com a condição travada"""
+        agora = time.monotonic()
+        prontas = [entrada for entrada in self._pendentes if entrada.proxima <= agora]
+        esperas = [entrada.proxima - agora for entrada in self._pendentes if entrada.proxima > agora]
+        if prontas:
+            espera = self.intervalo - (agora - min(entrada.chegada for entrada in prontas))
+            if len(prontas) >= self.tamanho or self._descarregar_ja or self._fechando or espera <= 0:
+                lote = prontas[:self.tamanho]
+                escolhidas = set(map(id, lote))
+                self._pendentes = [entrada for entrada in self._pendentes if id(entrada) not in escolhidas]
+                return lote, None
+            esperas.append(espera)
+        return None, (min(esperas) if esperas else None)
+
+    def _drenar(self):
+        while True:
+            with self._condicao:
+                while True:
+                    if self._fechando and not self._pendentes:
+                        return
+                    lote, espera = self._proximo_lote()
+                    if lote:
+                        break
+                    if self._fechando:
+                        # Só restam linhas em backoff: ficam na outbox para a próxima partida
+                        return
+                    self._condicao.wait(espera)
+                self._em_gravacao += 1
+            try:
+                self._gravar(lote)
+            finally:
+                with self._condicao:
+                    self._em_gravacao -= 1
+                    self._condicao.notify_all()
+
+    def _gravar(self, lote):
+        # Um upsert não pode tocar a mesma linha duas vezes: vale a última versão de cada edital
+        por_chave = {}
+        for entrada in lote:
+            anterior = por_chave.get(entrada.dados[self.chave])
+            entradas = (anterior[2] if anterior else []) + [entrada]
+            existente = entrada.existente or bool(anterior and anterior[1])
+            por_chave[entrada.dados[self.chave]] = (entrada.dados, existente, entradas)
+
+        # PostgREST exige as mesmas colunas em todas as linhas do lote
+        grupos = {}
+        for item in por_chave.values():
+            grupos.setdefault(tuple(sorted(item[0])), []).append(item)
+
+        for grupo in grupos.values():
+            for i in range(0, len(grupo), self.tamanho):
+                self._gravar_grupo(grupo[i:i + self.tamanho])
+
+    def _gravar_grupo(self, itens):
+        inicio = time.perf_counter()
+        try:
+            gravadas = self.gravar_lote([dados for dados, _, _ in itens])
+            erro = None
+        except Exception as e:
+            gravadas, erro = None, e
+        self.tempo_gravacao += time.perf_counter() - inicio
+        self.lotes += 1
+
+        if erro is not None:
+            if self.transitorio is not None and self.transitorio(erro):
+                adiadas = [entrada for _, _, entradas in itens for entrada in entradas]
+                if self._adiar(adiadas, erro):
+                    return
+            if len(itens) > 1 and not isinstance(erro, CircuitoAberto):
+                # Isola a linha problemática regravando uma a uma
+                self.lotes_divididos += 1
+                for item in itens:
+                    self._gravar_grupo([item])
+                return
+            for dados, _, entradas in itens:
+                self._resolver(entradas, dados[self.chave], None, FALHOU, erro)
+            return
+
+        ids = {linha.get(self.chave): linha.get("id") for linha in gravadas or []}
+        for dados, existente, entradas in itens:
+            chave = dados[self.chave]
+            if chave in ids:
+                self._resolver(entradas, chave, ids[chave], ATUALIZADO if existente else INSERIDO)
+            else:
+                self._resolver(entradas, chave, None, FALHOU, "upsert sem dados retornados")
+
+    def _adiar(self, entradas, erro):
+        """Devolve as entradas ao buffer com backoff; False se alguma esgotou as tentativas"""
+        if any(entrada.tentativas + 1 >= settings.OUTBOX_MAX_TENTATIVAS for entrada in entradas):
+            return False
+        agora = time.monotonic()
+        for entrada in entradas:
+            entrada.tentativas += 1
+            espera = min(settings.OUTBOX_BACKOFF_MAX, settings.OUTBOX_BACKOFF * 2 ** (entrada.tentativas - 1))
+            entrada.proxima = agora + espera * random.uniform(0.5, 1.0)
+        self.outbox.adiar([juntada.seq for entrada in entradas for juntada in entrada.com_juntadas()
+                           if juntada.seq is not None], erro,
+                          time.time() + (max(entrada.proxima for entrada in entradas) - agora))
+        self.adiamentos += len(entradas)
+        with self._condicao:
+            for entrada in entradas:
+                self._enfileirar(entrada, mais_nova=False)
+        return True
+
+    def _resolver(self, entradas, chave, id_salvo, desfecho, erro=None):
+        entradas = [juntada for entrada in entradas for juntada in entrada.com_juntadas()]
+        self.desfechos[desfecho] += 1
+        if self.outbox is not None:
+            self.outbox.confirmar([entrada.seq for entrada in entradas if entrada.seq is not None])
+        resultado = {"id": id_salvo, self.chave: chave, "desfecho": desfecho, "erro": str(erro)[:300] if erro else None}
+        if desfecho == FALHOU and all(entrada.futuro is None for entrada in entradas):
+            print(f"Outbox: gravacao de {chave} recusada: {resultado['erro']}")
+        for entrada in entradas:
+            if entrada.futuro is None or entrada.futuro.cancelled():
+                continue
+            try:
+                entrada.futuro.set_result(resultado)
+            except InvalidStateError:
+                # Quem enviou desistiu de esperar (fim de execução com o banco fora do ar)
+                pass
+
+    def resumo(self):
+        linhas = sum(self.desfechos.values())
+        return {
+            "lote": self.tamanho,
+            "intervalo_s": self.intervalo,
+            "lotes": self.lotes,
+            "lotes_divididos": self.lotes_divididos,
+            "linhas_por_lote": round(linhas / self.lotes, 1) if self.lotes else None,
+            **self.desfechos,
+            "adiamentos": self.adiamentos,
+            "recuperadas": self.recuperadas,
+            "tempo_gravacao_s": round(self.tempo_gravacao, 3),
+            "pendentes": len(self._pendentes),
+            "outbox": self.outbox.status().get(self.tipo) if self.outbox is not None else None
+        }
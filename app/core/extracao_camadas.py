@@ -0,0 +1,106 @@
+"""
+Extração em camadas: registro da compra na API primeiro, página no navegador só se faltar campo
+
+Os campos do registro /orgaos/{cnpj}/compras/{ano}/{seq} são convertidos para o mesmo formato
+de extrair_campos_detalhe, então as duas camadas se completam campo a campo.
+"""
+
+import threading
+from collections import Counter
+from datetime import datetime
+
+from .campos_detalhe import DATAS, ROTULOS
+
+
+CAMPOS_PAGINA = tuple(campo for campo, _ in ROTULOS)
+
+
+def _data(valor, formato="%d/%m/%Y"):
+    """Data ISO da API no formato exibido na página (ou "" se ausente/inválida)"""
+    if not valor:
+        return ""
+    try:
+        return datetime.fromisoformat(str(valor)[:19]).strftime(formato)
+    except ValueError:
+        return ""
+
+
+def campos_da_compra(compra):
+    """Campos da página de detalhe que o registro da compra já traz"""
+    compra = compra or {}
+    orgao = compra.get("orgaoEntidade") or {}
+    unidade = compra.get("unidadeOrgao") or {}
+    amparo = compra.get("amparoLegal") or {}
+    municipio = unidade.get("municipioNome") or ""
+    uf = unidade.get("ufSigla") or ""
+    srp = compra.get("srp")
+    fontes = compra.get("fontesOrcamentarias") or []
+
+    campos = {
+        "data_divulgacao_pncp": _data(compra.get("dataPublicacaoPncp")),
+        "ultima_atualizacao": _data(compra.get("dataAtualizacaoGlobal") or compra.get("dataAtualizacao")),
+        "orgao": orgao.get("razaoSocial") or "",
+        "local": f"{municipio}/{uf}" if municipio and uf else "",
+        "modalidade": compra.get("modalidadeNome") or "",
+        "amparo_legal": amparo.get("nome") or "",
+        "tipo": compra.get("tipoInstrumentoConvocatorioNome") or "",
+        "modo_disputa": compra.get("modoDisputaNome") or "",
+        "data_inicio_propostas": _data(compra.get("dataAberturaProposta"), "%d/%m/%Y %H:%M"),
+        "data_fim_propostas": _data(compra.get("dataEncerramentoProposta"), "%d/%m/%Y %H:%M"),
+        "data_abertura": _data(compra.get("dataAberturaProposta"), "%d/%m/%Y %H:%M"),
+        "situacao": compra.get("situacaoCompraNome") or "",
+        "objeto": (compra.get("objetoCompra") or "").strip(),
+        "registro_preco": "" if srp is None else ("Sim" if srp else "Não"),
+        "fonte_orcamentaria": ", ".join(f.get("nome", "") for f in fontes if isinstance(f, dict) and f.get("nome")),
+        "unidade_compradora": unidade.get("nomeUnidade") or "",
+        "id_contratacao_pncp": compra.get("numeroControlePNCP") or "",
+        "fonte": compra.get("usuarioNome") or ""
+    }
+    # Datas ausentes com o mesmo valor que a página devolve
+    for campo, (_, ausente) in DATAS.items():
+        campos[campo] = campos[campo] or ausente
+    return campos
+
+
+def campos_faltantes(campos, obrigatorios):
+    return [campo for campo in obrigatorios if not campos.get(campo)]
+
+
+class MetricasCamadas:
+    """Quantas vezes cada camada foi necessária e quais campos levaram ao navegador"""
+
+    def __init__(self):
+        self.camadas = Counter({"api": 0, "selenium": 0, "falha": 0})
+        self.campos = Counter()
+        self.tempo_paginas = 0.0
+        self._lock = threading.Lock()
+
+    def registrar(self, camada, faltantes=(), segundos_pagina=None):
+        with self._lock:
+            self.camadas[camada] += 1
+            self.campos.update(faltantes)
+            if segundos_pagina is not None:
+                self.tempo_paginas += segundos_pagina
+
+    def limpar(self):
+        with self._lock:
+            self.camadas = Counter({"api": 0, "selenium": 0, "falha": 0})
+            self.campos = Counter()
+            self.tempo_paginas = 0.0
+
+    def resumo(self):
+        with self._lock:
+            api = self.camadas["api"]
+            selenium = self.camadas["selenium"]
+            total = api + selenium
+            pagina_media = self.tempo_paginas / selenium if selenium else None
+            return {
+                "api": api,
+                "selenium": selenium,
+                "falha": self.camadas["falha"],
+                "percentual_api": round(100 * api / total, 1) if total else None,
+                "campos_faltantes": dict(self.campos.most_common()),
+                "pagina_media_s": round(pagina_media, 3) if pagina_media is not None else None,
+                # Estimativa: cada edital resolvido só pela API economizou uma página no navegador
+                "navegador_evitado_s": round(api * pagina_media, 1) if pagina_media is not None else None
+            }
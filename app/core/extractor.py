@@ -5,18 +5,43 @@ Extrator principal do PNCP
 import os
 import json
 import time
+import hashlib
 import requests
 import re
 import asyncio
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, date
 from supabase import create_client, Client
-from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
-from bs4 import BeautifulSoup
 
 from .config import settings
+from .descoberta import DescobertaAPI
+from .prontidao import MetricasProntidao, aguardar_pagina
+from .pool_drivers import PoolDrivers
+from .gerenciador_driver import GerenciadorDriver
+from .servico_parse import ServicoParse
+from .monitor_loop import MonitorLoop
+from .recursos_api import ClienteRecursos, RECURSOS, RECURSOS_COMPRA, inalterado
+from .itens_api import limpar_excedentes
+from .cache_http import AdaptadorCacheHTTP
+from .transporte import AdaptadorTransporte
+from .limitador import LimitadorAIMD
+from .pipeline import PipelineExtracao
+from .disjuntores import Disjuntores, CircuitoAberto, falha_de_servidor
+from .backlog import BacklogReprocessamento
+from .banco import ContadorBanco, contar_bytes_enviados, em_lotes, erro_transitorio, medir
+from .outbox import OutboxSQLite
+from .supabase_local import ClienteLocal
+from .frescor import (COLUNAS_VERIFICACAO, ITENS_EXCEDENTES, SOMENTE_ATUALIZAR, MetricasFrescor, carimbar, hash_conteudo,
+                      hashes_grupos, motivo_coleta, reaproveitar_uploads)
+from .filhas import TABELAS_FILHAS, descartar_excedentes, juntar_versoes, linhas_filhas, separar_filhas
+from .escritor_lote import EscritorLote
+from .extracao_camadas import MetricasCamadas, campos_da_compra, campos_faltantes
+from .cache_orgaos import CacheOrgaos
+from .campos_listagem import dados_do_container, converter_data
 
 
 class PNCPExtractor:
@@ -25,9 +50,13 @@ class PNCPExtractor:
     def __init__(self):
         # Supabase
         if not settings.is_configured():
-            raise Exception("Configure SUPABASE_URL e SUPABASE_KEY no .env")
+            raise Exception("Configure SUPABASE_URL e SUPABASE_KEY no .env (ou SUPABASE_BACKEND=local)")
         
-        self.supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+        if settings.SUPABASE_BACKEND == "local":
+            self.supabase = ClienteLocal()
+        else:
+            self.supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+            contar_bytes_enviados(self.supabase.postgrest.session)
         self.bucket_name = settings.STORAGE_BUCKET
         
         # Session para APIs
@@ -36,14 +65,70 @@ class PNCPExtractor:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
         
+        # Ritmo das chamadas ao PNCP (APIs e navegador), ajustado por AIMD
+        self.limitador = LimitadorAIMD() if settings.LIMITADOR_ATIVO else None
+        
+        # Transporte: pool do tamanho da concorrência, retry com backoff e, se ativo,
+        # cache HTTP com revalidação (ETag/Last-Modified) para as APIs do PNCP
+        if settings.HTTP_CACHE_ATIVO:
+            self.cache_http = AdaptadorCacheHTTP(limitador=self.limitador)
+        else:
+            self.cache_http = None
+        self.transporte = self.cache_http or AdaptadorTransporte(limitador=self.limitador)
+        self.session.mount("https://", self.transporte)
+        self.session.mount("http://", self.transporte)
+        
         # Selenium
         self.driver = None
+        self.gerenciador = GerenciadorDriver()
+        self.pool = PoolDrivers(self._criar_driver, settings.SELENIUM_POOL_SIZE, reciclar=self.gerenciador.deve_reciclar)
+        self.metricas_prontidao = MetricasProntidao()
+        self.metricas_camadas = MetricasCamadas()
+        
+        # Parse do HTML em processos separados e atraso do event loop durante as execuções
+        self.parse = ServicoParse()
+        self.monitor_loop = MonitorLoop()
+        
+        # Disjuntores por dependência e backlog do que falhou (refeito na próxima execução)
+        self.disjuntores = Disjuntores()
+        self.backlog = BacklogReprocessamento()
+        
+        # Itens excedentes de editais que nunca chegaram a ser gravados
+        limpar_excedentes()
+        
+        # Idas ao banco por operação (verificação, upsert, update) e gravação em lote (write-behind)
+        # passando pela outbox em disco: editais e uploads pendentes sobrevivem a queda do banco
+        self.contador_banco = ContadorBanco()
+        self.outbox = OutboxSQLite()
+        self.escritor = EscritorLote(self.upsert_editais, outbox=self.outbox, tipo="editais",
+                                     transitorio=erro_transitorio, juntar=juntar_versoes)
+        self.envios_storage = EscritorLote(self._enviar_anexos, tamanho=1, intervalo=0, outbox=self.outbox,
+                                           tipo="storage", transitorio=lambda erro: True, juntar=self._juntar_envios)
+        self.metricas_frescor = MetricasFrescor()
+        
+        # APIs do edital (itens/histórico/arquivos/órgão em paralelo)
+        self.cache_orgaos = CacheOrgaos()
+        self.recursos = ClienteRecursos(self.session, timeout=15, cache_orgaos=self.cache_orgaos,
+                                        disjuntores=self.disjuntores)
         
         # URLs
         self.url_base = f"{settings.PNCP_BASE_URL}/app/editais"
     
     def configurar_selenium(self):
         """Configura Selenium otimizado e seguro"""
+        self.driver = self._criar_driver()
+        return self.driver is not None
+    
+    def _criar_driver(self):
+        """Cria uma instância Chrome com as opções otimizadas (usada também pelo pool)"""
+        try:
+            return self.gerenciador.criar(self._opcoes_chrome())
+        except Exception as e:
+            print(f" Erro ao configurar Selenium: {e}")
+            return None
+    
+    def _opcoes_chrome(self):
+        """Opções do Chrome otimizadas e seguras"""
         chrome_options = Options()
         
         if settings.SELENIUM_HEADLESS:
@@ -89,147 +174,174 @@ class PNCPExtractor:
         }
         chrome_options.add_experimental_option("prefs", prefs)
         
-        try:
-            # Tenta usar webdriver-manager para Render
-            from webdriver_manager.chrome import ChromeDriverManager
-            from selenium.webdriver.chrome.service import Service
-            
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            print("Selenium configurado com webdriver-manager")
-            return True
-            
-        except Exception as e:
-            print(f" Erro com webdriver-manager: {e}")
-            try:
-                # Fallback para configuração manual
-                self.driver = webdriver.Chrome(options=chrome_options)
-                print(" Selenium configurado manualmente")
-                return True
-            except Exception as e2:
-                print(f" Erro ao configurar Selenium: {e2}")
-                return False
+        return chrome_options
     
-    def buscar_editais_recentes(self, data_filtro=None, max_paginas=10, limit_por_pagina=50):
+    def buscar_editais_recentes(self, data_filtro=None, max_paginas=10, limit_por_pagina=50, backend=None, ao_encontrar=None):
         """Busca editais específicos do dia no PNCP (estratégia otimizada)"""
         if not data_filtro:
             data_filtro = (datetime.now() - timedelta(days=1)).date()
         
+        backend = (backend or settings.DISCOVERY_BACKEND).lower()
+        
         print(f" ESTRATEGIA OTIMIZADA: Buscando TODOS os editais de {data_filtro}")
         print(f" Configuracao: ate {max_paginas} paginas x {limit_por_pagina} editais = maximo {max_paginas * limit_por_pagina} editais")
+        print(f" Backend de descoberta: {backend}")
+        
+        return self._buscar_listagem(data_filtro, None, max_paginas, limit_por_pagina, backend, ao_encontrar=ao_encontrar)
+    
+    def buscar_editais_periodo(self, data_inicial, data_final=None, max_paginas=50, limit_por_pagina=100, backend=None,
+                               ao_encontrar=None):
+        """Percorre a listagem uma única vez e separa os editais por dia de atualização
+        
+        Retorna {data: [editais]} com um item para cada dia de data_inicial a data_final
+        (em ordem crescente). A busca para assim que passa da data mais antiga.
+        ao_encontrar(editais) é chamado a cada página, antes do fim da varredura.
+        """
+        data_final = data_final or datetime.now().date()
+        backend = (backend or settings.DISCOVERY_BACKEND).lower()
+        total_dias = (data_final - data_inicial).days + 1
+        
+        print(f" BUSCA POR PERIODO: {data_inicial} a {data_final} ({total_dias} dias) em uma unica varredura")
+        print(f" Backend de descoberta: {backend}")
+        
+        editais = self._buscar_listagem(
+            data_inicial, data_final, max_paginas, limit_por_pagina, backend,
+            limite=settings.LISTAGEM_LIMITE_SEGURANCA * total_dias, ao_encontrar=ao_encontrar
+        )
+        
+        por_dia = {data_inicial + timedelta(days=i): [] for i in range(total_dias)}
+        for edital_data in editais:
+            data_edital = self._data_listagem(edital_data)
+            # Sem data reconhecível: fica no dia mais recente (como antes, é incluído)
+            por_dia.get(data_edital, por_dia[data_final]).append(edital_data)
+        
+        return por_dia
+    
+    def _buscar_listagem(self, data_inicial, data_final, max_paginas, limit_por_pagina, backend, limite=None,
+                         ao_encontrar=None):
+        """Escolhe o backend (API com fallback para Selenium) e varre a listagem"""
+        if backend == "api":
+            try:
+                descoberta = DescobertaAPI(self.session)
+                buscar_paginas = lambda paginas: [descoberta.buscar_pagina(p, limit_por_pagina) for p in paginas]
+                return self._varrer_listagem(
+                    buscar_paginas, data_inicial, max_paginas,
+                    data_final=data_final, limite=limite, ao_encontrar=ao_encontrar
+                )
+            except Exception as e:
+                print(f"Erro na descoberta via API: {e} - usando Selenium como fallback")
         
-        if not self.configurar_selenium():
+        try:
+            # Páginas da listagem distribuídas entre os navegadores do pool
+            buscar_paginas = lambda paginas: self.pool.mapear(
+                lambda driver, pagina: self._buscar_pagina_selenium(driver, pagina, limit_por_pagina),
+                paginas
+            )
+            return self._varrer_listagem(
+                buscar_paginas, data_inicial, max_paginas,
+                lote=self.pool.tamanho, data_final=data_final, limite=limite, ao_encontrar=ao_encontrar
+            )
+        except Exception as e:
+            print(f"Erro geral na busca: {e}")
             return []
+    
+    def _buscar_pagina_selenium(self, driver, pagina, limit_por_pagina):
+        """Carrega uma página de /app/editais no navegador e extrai os containers"""
+        # URL otimizada - busca por editais mais recentes primeiro
+        url_pagina = f"{self.url_base}?q=&pagina={pagina}&tam_pagina={limit_por_pagina}&ordenacao=data_desc"
+        print(f"Pagina {pagina}: {url_pagina}")
+        
+        with self._ritmo("selenium"):
+            driver.get(url_pagina)
+            aguardar_pagina(driver, "listagem", self.metricas_prontidao)
+        
+        # Só os anchors a.br-item, montados no processo de parse
+        return self.parse.editais_listagem(driver.page_source)
+    
+    def _data_listagem(self, edital_data):
+        """Data de atualização da listagem como date (ou None)"""
+        data_edital = edital_data.get('data_atualizacao') or converter_data(edital_data.get('ultima_atualizacao'))
+        if not data_edital and edital_data.get('ultima_atualizacao'):
+            print(f"{edital_data['id_pncp']} - formato de data nao reconhecido: '{edital_data['ultima_atualizacao']}'")
+        return data_edital
+    
+    def _paginas_em_lotes(self, buscar_paginas, max_paginas, lote):
+        """Busca as páginas em lotes e entrega (pagina, resultado) na ordem das páginas"""
+        for inicio in range(1, max_paginas + 1, lote):
+            paginas = list(range(inicio, min(inicio + lote, max_paginas + 1)))
+            try:
+                resultados = buscar_paginas(paginas)
+            except Exception as e:
+                yield paginas[0], e
+                return
+            for pagina, resultado in zip(paginas, resultados):
+                yield pagina, resultado
+    
+    def _varrer_listagem(self, buscar_paginas, data_filtro, max_paginas, lote=1, data_final=None, limite=None,
+                         ao_encontrar=None):
+        """Percorre a listagem (mais recentes primeiro) até passar de data_filtro
         
+        Com data_final, editais mais novos que ela são ignorados (sem parar a busca).
+        """
         editais_encontrados = []
+        limite = limite or settings.LISTAGEM_LIMITE_SEGURANCA
+        data_formatada = data_filtro.strftime("%d/%m/%Y")
+        print(f"Buscando editais de: {data_formatada}" + (f" ate {data_final.strftime('%d/%m/%Y')}" if data_final else ""))
         
-        try:
-            # Busca com filtro de data específico (se o PNCP suportar)
-            data_formatada = data_filtro.strftime("%d/%m/%Y")
+        for pagina, editais_pagina_brutos in self._paginas_em_lotes(buscar_paginas, max_paginas, lote):
+            if isinstance(editais_pagina_brutos, Exception):
+                if pagina == 1:
+                    raise editais_pagina_brutos
+                print(f"Erro ao processar pagina {pagina}: {editais_pagina_brutos}")
+                break
             
-            for pagina in range(1, max_paginas + 1):
-                # URL otimizada - busca por editais mais recentes primeiro
-                url_pagina = f"{self.url_base}?q=&pagina={pagina}&tam_pagina={limit_por_pagina}&ordenacao=data_desc"
-                
-                print(f"Pagina {pagina}: {url_pagina}")
-                print(f"Buscando editais de: {data_formatada}")
-                
-                self.driver.get(url_pagina)
-                time.sleep(2)
+            if not editais_pagina_brutos:
+                print(f"Nenhum container encontrado na pagina {pagina}")
+                break
+            
+            print(f"Encontrados {len(editais_pagina_brutos)} editais na pagina {pagina}")
+            
+            editais_pagina = []
+            data_mais_antiga_pagina = None
+            
+            for edital_data in editais_pagina_brutos:
+                data_edital = self._data_listagem(edital_data)
                 
-                try:
-                    time.sleep(1)
-                    page_source = self.driver.page_source
-                    soup = BeautifulSoup(page_source, 'html.parser')
-                    containers = soup.find_all("a", class_="br-item")
-                    
-                    if not containers:
-                        print(f"Nenhum container encontrado na pagina {pagina}")
-                        break
+                if data_edital:
+                    if not data_mais_antiga_pagina or data_edital < data_mais_antiga_pagina:
+                        data_mais_antiga_pagina = data_edital
                     
-                    print(f"Encontrados {len(containers)} editais na pagina {pagina}")
-                    
-                    editais_pagina = []
-                    data_mais_antiga_pagina = None
-                    
-                    for container in containers:
-                        try:
-                            edital_data = self.extrair_dados_container(container)
-                            if edital_data:
-                                try:
-                                    # Tenta diferentes formatos de data
-                                    data_str = edital_data['ultima_atualizacao']
-                                    data_edital = None
-                                    
-                                    if data_str:
-                                        # Tenta formato DD/MM/YYYY
-                                        try:
-                                            data_edital = datetime.strptime(data_str, "%d/%m/%Y").date()
-                                        except ValueError:
-                                            # Tenta formato DD-MM-YYYY
-                                            try:
-                                                data_edital = datetime.strptime(data_str, "%d-%m-%Y").date()
-                                            except ValueError:
-                                                # Tenta formato YYYY-MM-DD
-                                                try:
-                                                    data_edital = datetime.strptime(data_str, "%Y-%m-%d").date()
-                                                except ValueError:
-                                                    print(f"{edital_data['id_pncp']} - formato de data nao reconhecido: '{data_str}'")
-                                    
-                                    if data_edital:
-                                        if not data_mais_antiga_pagina or data_edital < data_mais_antiga_pagina:
-                                            data_mais_antiga_pagina = data_edital
-                                        
-                                        if data_edital >= data_filtro:
-                                            editais_pagina.append(edital_data)
-                                            print(f"{edital_data['id_pncp']} - {data_edital}")
-                                        else:
-                                            print(f"{edital_data['id_pncp']} - data muito antiga: {data_edital}")
-                                    else:
-                                        # Se nao conseguiu converter a data, inclui mesmo assim
-                                        editais_pagina.append(edital_data)
-                                        print(f"{edital_data['id_pncp']} - data invalida: '{data_str}'")
-                                
-                                except Exception as e:
-                                    print(f"Erro ao processar data: {e}")
-                                    editais_pagina.append(edital_data)
-                        
-                        except Exception as e:
-                            print(f"Erro ao processar container: {e}")
-                            continue
-                    
-                    editais_encontrados.extend(editais_pagina)
-                    print(f"{len(editais_pagina)} editais validos na pagina {pagina}")
-                    
-                    # Limite de seguranca alto para pegar TODOS os editais
-                    if len(editais_encontrados) >= 1000:  # Limite muito alto
-                        print(f"Limite de seguranca (1000 editais) atingido, parando busca")
-                        break
-                    
-                    # Para apenas se TODA a pagina for anterior ao filtro
-                    if data_mais_antiga_pagina and data_mais_antiga_pagina < data_filtro and len(editais_pagina) == 0:
-                        print(f"Pagina inteira anterior ao filtro ({data_mais_antiga_pagina}), parando")
-                        break
-                    
-                    # Continua se ainda ha editais validos na pagina
-                    if len(editais_pagina) > 0:
-                        print(f"Pagina ainda tem editais validos, continuando...")
+                    if data_final and data_edital > data_final:
+                        continue
+                    if data_edital >= data_filtro:
+                        editais_pagina.append(edital_data)
                     else:
-                        print(f"Nenhum edital valido nesta pagina, mas continuando...")
-                
-                except Exception as e:
-                    print(f"Erro ao processar pagina {pagina}: {e}")
-                    break
-        
-        except Exception as e:
-            print(f"Erro geral na busca: {e}")
-            return []
+                        print(f"{edital_data['id_pncp']} - data muito antiga: {data_edital}")
+                else:
+                    # Se nao conseguiu converter a data, inclui mesmo assim
+                    editais_pagina.append(edital_data)
+                    print(f"{edital_data['id_pncp']} - data invalida: '{edital_data.get('ultima_atualizacao')}'")
+            
+            editais_encontrados.extend(editais_pagina)
+            print(f"{len(editais_pagina)} editais validos na pagina {pagina}")
+            if ao_encontrar and editais_pagina:
+                ao_encontrar(editais_pagina)
+            
+            # Limite de seguranca alto para pegar TODOS os editais
+            if len(editais_encontrados) >= limite:
+                print(f"Limite de seguranca ({limite} editais) atingido, parando busca")
+                break
+            
+            # Para apenas se TODA a pagina for anterior ao filtro
+            if data_mais_antiga_pagina and data_mais_antiga_pagina < data_filtro and len(editais_pagina) == 0:
+                print(f"Pagina inteira anterior ao filtro ({data_mais_antiga_pagina}), parando")
+                break
         
         print(f"Total de editais encontrados: {len(editais_encontrados)}")
         return editais_encontrados
     
     def fechar_driver(self):
-        """Fecha o driver Selenium"""
+        """Fecha o driver Selenium e os navegadores do pool"""
         if self.driver:
             try:
                 self.driver.quit()
@@ -238,6 +350,71 @@ class PNCPExtractor:
             except Exception as e:
                 print(f" Erro ao fechar driver: {e}")
                 self.driver = None
+        self.escritor.descarregar(settings.OUTBOX_ESPERA_FIM)
+        self.envios_storage.descarregar(settings.OUTBOX_ESPERA_FIM)
+        self.pool.fechar()
+        self.parse.fechar()
+        self.cache_orgaos.salvar()
+        self.backlog.salvar()
+    
+    def liberar_driver(self):
+        """Fim de uma execução: mantém os navegadores aquecidos para a próxima (SELENIUM_KEEP_WARM)"""
+        if not settings.SELENIUM_KEEP_WARM:
+            self.fechar_driver()
+            return
+        
+        self.cache_orgaos.salvar()
+        self.backlog.salvar()
+        removidos = self.pool.verificar_saude()
+        print(f" Navegadores mantidos aquecidos ({self.pool.status()['livres']} livres, {removidos} removidos)")
+    
+    def iniciar_metricas_execucao(self):
+        """Zera as métricas acumuladas por execução"""
+        self.metricas_prontidao.limpar()
+        self.metricas_camadas.limpar()
+        self.parse.limpar()
+        self.monitor_loop.limpar()
+        self.contador_banco.limpar()
+        self.escritor.limpar()
+        self.envios_storage.limpar()
+        self.metricas_frescor.limpar()
+        self.transporte.limpar_conexoes()
+        if self.limitador:
+            self.limitador.limpar()
+        if self.cache_http:
+            self.cache_http.limpar()
+    
+    def metricas_execucao(self):
+        """Métricas da execução incluídas no resultado das extrações"""
+        return {
+            "prontidao": self.metricas_prontidao.resumo(),
+            "navegadores": {**self.pool.status(), **self.gerenciador.status()},
+            "cache_orgaos": self.cache_orgaos.status(),
+            "camadas": self.metricas_camadas.resumo(),
+            "cache_http": self.cache_http.resumo() if self.cache_http else None,
+            "transporte": self.transporte.conexoes(),
+            "limitador": self.limitador.resumo() if self.limitador else None,
+            "parse": self.parse.resumo(),
+            "lag_loop": self.monitor_loop.resumo(),
+            "disjuntores": self.disjuntores.status(),
+            "backlog": self.backlog.status(),
+            "banco": self.contador_banco.resumo(),
+            "escrita": self.escritor.resumo(),
+            "storage_pendente": self.envios_storage.resumo(),
+            "frescor": self.metricas_frescor.resumo()
+        }
+    
+    @staticmethod
+    def edital_inalterado(dados, edital_existente):
+        """As APIs do edital responderam 304 e os campos da página são os gravados
+
+        O 304 só cobre as APIs: no modo hibrido situação, datas etc. vêm da página do edital e
+        podem mudar sem que as APIs mudem, então a impressão do grupo "principal" tem de bater.
+        """
+        if not dados.get("informacoes_detalhadas", {}).get("inalterado"):
+            return False
+        gravadas = (edital_existente or {}).get("hashes_grupos") or {}
+        return gravadas.get("principal") == (dados.get("hashes_grupos") or hashes_grupos(dados))["principal"]
     
     def normalizar_data(self, data_str):
         """Normaliza diferentes formatos de data"""
@@ -268,49 +445,7 @@ class PNCPExtractor:
     def extrair_dados_container(self, container):
         """Extrai dados básicos de um container"""
         try:
-            link = container.get("href", "")
-            id_pncp = ""
-            if "/editais/" in link:
-                id_pncp = link.split("/editais/")[-1]
-            
-            if not id_pncp:
-                return None
-            
-            texto_completo = container.get_text(separator=" | ", strip=True)
-            
-            dados = {
-                "link": f"{settings.PNCP_BASE_URL}{link}" if link.startswith("/") else link,
-                "id_pncp": id_pncp,
-                "texto_completo": texto_completo
-            }
-            
-            # Extração com regex - CORRIGIDO para lidar com " | " como separador
-            edital_match = re.search(r'Edital\s+n[°º]?\s*(\d+/\d+)', texto_completo, re.IGNORECASE)
-            dados["edital"] = edital_match.group(0) if edital_match else ""
-            
-            # CORRIGIDO: Remove " | " antes do valor
-            modalidade_match = re.search(r'Modalidade[^:]*:\s*\|?\s*([^|]+)', texto_completo, re.IGNORECASE)
-            dados["modalidade"] = modalidade_match.group(1).strip() if modalidade_match else ""
-            
-            # CORRIGIDO: Captura data mesmo com " | " antes
-            data_match = re.search(r'Última\s+Atualização[^:]*:\s*\|?\s*(\d{2}/\d{2}/\d{4})', texto_completo, re.IGNORECASE)
-            data_extraida = data_match.group(1).strip() if data_match else ""
-            dados["ultima_atualizacao"] = self.normalizar_data(data_extraida)
-            
-            # CORRIGIDO: Remove " | " antes do valor
-            orgao_match = re.search(r'Órgão[^:]*:\s*\|?\s*([^|]+)', texto_completo, re.IGNORECASE)
-            dados["orgao"] = orgao_match.group(1).strip() if orgao_match else ""
-            
-            # CORRIGIDO: Remove " | " antes do valor
-            local_match = re.search(r'Local[^:]*:\s*\|?\s*([^|]+)', texto_completo, re.IGNORECASE)
-            dados["local"] = local_match.group(1).strip() if local_match else ""
-            
-            # CORRIGIDO: Remove " | " antes do valor
-            objeto_match = re.search(r'Objeto[^:]*:\s*\|?\s*([^|]+)', texto_completo, re.IGNORECASE)
-            dados["objeto"] = objeto_match.group(1).strip() if objeto_match else ""
-            
-            return dados
-            
+            return dados_do_container(container, settings.PNCP_BASE_URL)
         except Exception as e:
             print(f"Erro ao extrair dados: {e}")
             return None
@@ -326,246 +461,250 @@ class PNCPExtractor:
             # Separa componentes do ID
             cnpj, ano, numero = id_pncp.split('/')
             
-            # === 1. EXTRAÇÃO VIA SELENIUM (PÁGINA DETALHADA) ===
-            url_detalhada = f"{settings.PNCP_BASE_URL}/app/editais/{id_pncp}"
-            print(f"Acessando pagina: {url_detalhada}")
-            
-            # Configura Selenium se necessário
-            if not self.driver:
-                if not self.configurar_selenium():
-                    return None
-            
-            # Acessa página
-            self.driver.get(url_detalhada)
-            time.sleep(3)  # Aguarda carregamento completo
-            
-            # Extrai HTML
-            page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            texto_pagina = soup.get_text(separator=" ", strip=True)
-            
-            # === 2. EXTRAÇÃO VIA APIs (DADOS ESTRUTURADOS) ===
+            # === 1. APIs (DADOS ESTRUTURADOS) - disparadas antes de abrir a página ===
             base_url = f"{settings.PNCP_API_URL}/orgaos/{cnpj}/compras/{ano}/{numero}"
             print(f"Buscando APIs: {base_url}")
+            consulta = self.recursos.iniciar(cnpj, ano, numero)
             
-            # Busca dados das APIs
-            itens = []
-            historico = []
-            arquivos = []
-            dados_orgao = {}
-            
-            # API de Itens
-            try:
-                print(f"Buscando itens...")
-                itens_response = self.session.get(f"{base_url}/itens", timeout=15)
-                if itens_response.status_code == 200:
-                    itens = itens_response.json()
-                    print(f"{len(itens)} itens encontrados")
-                else:
-                    print(f"Itens: Status {itens_response.status_code}")
-            except Exception as e:
-                print(f"Erro itens: {e}")
-            
-            # API de Histórico
-            try:
-                print(f"Buscando historico...")
-                historico_response = self.session.get(f"{base_url}/historico", timeout=15)
-                if historico_response.status_code == 200:
-                    historico = historico_response.json()
-                    print(f"{len(historico)} eventos no historico")
-                else:
-                    print(f"Historico: Status {historico_response.status_code}")
-            except Exception as e:
-                print(f"Erro historico: {e}")
+            # === 2. EXTRAÇÃO VIA SELENIUM (PÁGINA DETALHADA) ===
+            url_detalhada = f"{settings.PNCP_BASE_URL}/app/editais/{id_pncp}"
+            print(f"Acessando pagina: {url_detalhada}")
             
-            # API de Arquivos
-            try:
-                print(f"Buscando arquivos...")
-                arquivos_response = self.session.get(f"{base_url}/arquivos", timeout=15)
-                if arquivos_response.status_code == 200:
-                    arquivos = arquivos_response.json()
-                    print(f"{len(arquivos)} arquivos encontrados")
-                else:
-                    print(f"Arquivos: Status {arquivos_response.status_code}")
-            except Exception as e:
-                print(f"Erro arquivos: {e}")
+            # Acessa página com um navegador do pool (enquanto as APIs respondem)
+            page_source = self._carregar_pagina_detalhe(url_detalhada)
             
-            # API do Órgão
-            try:
-                print(f"Buscando dados do orgao...")
-                orgao_response = self.session.get(f"{settings.PNCP_API_URL}/orgaos/{cnpj}", timeout=15)
-                if orgao_response.status_code == 200:
-                    dados_orgao = orgao_response.json()
-                    print(f"Dados do orgao obtidos")
-                else:
-                    print(f"Orgao: Status {orgao_response.status_code}")
-            except Exception as e:
-                print(f"Erro orgao: {e}")
+            recursos = consulta.resultado()
+            historico = recursos["historico"]
+            arquivos = recursos["arquivos"]
             
-            # === 3. MONTA DADOS COMPLETOS ===
-            dados = {
-                "id_pncp": id_pncp,
-                "link_licitacao": url_detalhada,
-                "metodo_extracao": "hibrido_completo",
-                "data_coleta": datetime.now().isoformat(),
-                "cnpj_orgao": cnpj,
-                "ano": int(ano),
-                "numero": int(numero)
-            }
+            for recurso, erro in recursos["erros"].items():
+                print(f"Erro {recurso}: {erro}")
+            print(f"APIs em {recursos['tempo_total']}s: {recursos['resumo_itens']['total_itens']} itens, {len(historico)} eventos, {len(arquivos)} arquivos")
             
-            # === 4. EXTRAÇÃO DE DADOS DA PÁGINA (SELENIUM) ===
+            # Índice rótulo -> valor montado uma vez; cada campo é uma consulta no índice
             print(f"Extraindo dados da pagina HTML...")
+            campos_pagina = self.parse.campos_detalhe(page_source)
             
-            # Data de divulgação no PNCP
-            data_divulgacao_match = re.search(r'Data\s+de\s+divulgação\s+no\s+PNCP[:\s]*(\d{2}/\d{2}/\d{4})', texto_pagina, re.IGNORECASE)
-            if not data_divulgacao_match:
-                data_divulgacao_match = re.search(r'divulgação\s+no\s+PNCP[:\s]*(\d{2}/\d{2}/\d{4})', texto_pagina, re.IGNORECASE)
-            dados["data_divulgacao_pncp"] = data_divulgacao_match.group(1) if data_divulgacao_match else None
-            
-            # Última atualização
-            ultima_atualizacao_match = re.search(r'Última\s+atualização[:\s]*(\d{2}/\d{2}/\d{4})', texto_pagina, re.IGNORECASE)
-            dados["ultima_atualizacao"] = ultima_atualizacao_match.group(1) if ultima_atualizacao_match else datetime.now().strftime('%d/%m/%Y')
-            
-            # Órgão (prioriza dados da API, senão extrai da página)
-            if dados_orgao.get('razaoSocial'):
-                dados["orgao"] = dados_orgao['razaoSocial']
-            else:
-                orgao_match = re.search(r'Órgão[:\s]*([^\n\r]{1,200})', texto_pagina, re.IGNORECASE)
-                dados["orgao"] = orgao_match.group(1).strip() if orgao_match else ""
-            
-            # Local
-            if dados_orgao.get('municipio') and dados_orgao.get('uf'):
-                dados["local"] = f"{dados_orgao['municipio']}/{dados_orgao['uf']}"
-            else:
-                local_match = re.search(r'Local[:\s]*([^\n\r]{1,100})', texto_pagina, re.IGNORECASE)
-                dados["local"] = local_match.group(1).strip() if local_match else ""
-            
-            # Modalidade (prioriza dados dos itens)
-            if itens and itens[0].get('criterioJulgamentoNome'):
-                dados["modalidade"] = itens[0]['criterioJulgamentoNome']
-            else:
-                modalidade_match = re.search(r'Modalidade\s+da\s+contratação[:\s]*([^\n\r]{1,100})', texto_pagina, re.IGNORECASE)
-                dados["modalidade"] = modalidade_match.group(1).strip() if modalidade_match else ""
-            
-            # Dados específicos da página
-            amparo_match = re.search(r'Amparo\s+legal[:\s]*([^\n\r]{1,200})', texto_pagina, re.IGNORECASE)
-            dados["amparo_legal"] = amparo_match.group(1).strip() if amparo_match else ""
-            
-            tipo_match = re.search(r'Tipo[:\s]*([^\n\r]{1,100})', texto_pagina, re.IGNORECASE)
-            dados["tipo"] = tipo_match.group(1).strip() if tipo_match else ""
-            
-            modo_disputa_match = re.search(r'Modo\s+de\s+disputa[:\s]*([^\n\r]{1,100})', texto_pagina, re.IGNORECASE)
-            dados["modo_disputa"] = modo_disputa_match.group(1).strip() if modo_disputa_match else ""
-            
-            # Datas
-            data_inicio_match = re.search(r'Data\s+de\s+início\s+de\s+recebimento\s+de\s+propostas[:\s]*(\d{2}/\d{2}/\d{4}\s+\d{2}:\d{2})', texto_pagina, re.IGNORECASE)
-            dados["data_inicio_propostas"] = data_inicio_match.group(1) if data_inicio_match else ""
+            return self._montar_edital(id_pncp, campos_pagina, recursos, "hibrido_completo", salvar_arquivos)
             
-            data_fim_match = re.search(r'Data\s+fim\s+de\s+recebimento\s+de\s+propostas[:\s]*(\d{2}/\d{2}/\d{4}\s+\d{2}:\d{2})', texto_pagina, re.IGNORECASE)
-            dados["data_fim_propostas"] = data_fim_match.group(1) if data_fim_match else ""
-            
-            # Data de abertura (múltiplos padrões)
-            data_abertura_match = re.search(r'Data\s+de\s+abertura\s+das?\s+propostas[:\s]*(\d{2}/\d{2}/\d{4}(?:\s+\d{2}:\d{2})?)', texto_pagina, re.IGNORECASE)
-            if not data_abertura_match:
-                data_abertura_match = re.search(r'Data\s+da\s+sessão[:\s]*(\d{2}/\d{2}/\d{4}(?:\s+\d{2}:\d{2})?)', texto_pagina, re.IGNORECASE)
-            dados["data_abertura"] = data_abertura_match.group(1) if data_abertura_match else None
-            
-            situacao_match = re.search(r'Situação[:\s]*([^\n\r]{1,100})', texto_pagina, re.IGNORECASE)
-            dados["situacao"] = situacao_match.group(1).strip() if situacao_match else ""
-            
-            # Objeto (prioriza inferência dos itens)
-            if itens:
-                dados["objeto"] = self.inferir_objeto(itens)
-            else:
-                objeto_match = re.search(r'Objeto[:\s]*([^\n\r]{1,500})', texto_pagina, re.IGNORECASE)
-                dados["objeto"] = objeto_match.group(1).strip() if objeto_match else ""
-            
-            registro_preco_match = re.search(r'Registro\s+de\s+preço[:\s]*([^\n\r]{1,50})', texto_pagina, re.IGNORECASE)
-            dados["registro_preco"] = registro_preco_match.group(1).strip() if registro_preco_match else ""
-            
-            fonte_orcamentaria_match = re.search(r'Fonte\s+orçamentária[:\s]*([^\n\r]{1,200})', texto_pagina, re.IGNORECASE)
-            dados["fonte_orcamentaria"] = fonte_orcamentaria_match.group(1).strip() if fonte_orcamentaria_match else ""
-            
-            unidade_compradora_match = re.search(r'Unidade\s+compradora[:\s]*([^\n\r]{1,200})', texto_pagina, re.IGNORECASE)
-            dados["unidade_compradora"] = unidade_compradora_match.group(1).strip() if unidade_compradora_match else ""
-            
-            id_contratacao_match = re.search(r'Id\s+contratação\s+PNCP[:\s]*([^\n\r]{1,100})', texto_pagina, re.IGNORECASE)
-            dados["id_contratacao_pncp"] = id_contratacao_match.group(1).strip() if id_contratacao_match else ""
-            
-            fonte_match = re.search(r'Fonte[:\s]*([^\n\r]{1,200})', texto_pagina, re.IGNORECASE)
-            dados["fonte"] = fonte_match.group(1).strip() if fonte_match else ""
-            
-            # === 5. DADOS ESTRUTURADOS (APIs) ===
-            print(f"Processando dados estruturados...")
-            
-            # Edital básico
-            dados["edital"] = f"Edital {numero}/{ano}"
+        except Exception as e:
+            print(f"Erro ao extrair pagina detalhada: {e}")
+            return None
+
+    def extrair_edital_em_camadas(self, id_pncp, salvar_arquivos=True):
+        """Extrai pelas APIs (compra + sub-recursos) e só abre a página se faltar campo obrigatório"""
+        try:
+            if not id_pncp or "/" not in id_pncp:
+                return None
             
-            # Valor total
-            valor_total = sum(item.get('valorTotal', 0) for item in itens)
-            dados["valor_total_numerico"] = valor_total
-            dados["valor"] = f"R$ {valor_total:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.') if valor_total > 0 else ""
+            print(f"EXTRAÇÃO EM CAMADAS: {id_pncp}")
+            cnpj, ano, numero = id_pncp.split('/')
             
-            # Contadores
-            dados["total_itens"] = len(itens)
-            dados["total_anexos"] = len(arquivos)
-            dados["total_historico"] = len(historico)
+            # === CAMADA 1: registro da compra e sub-recursos (API) ===
+            recursos = self.recursos.buscar(cnpj, ano, numero, RECURSOS_COMPRA)
+            for recurso, erro in recursos["erros"].items():
+                print(f"Erro {recurso}: {erro}")
             
-            # Dados processados
-            dados["itens"] = itens
-            dados["anexos"] = arquivos
-            dados["historico"] = historico
-            dados["itens_processados"] = len(itens) > 0
-            dados["anexos_processados"] = len(arquivos) > 0
-            dados["historico_processado"] = len(historico) > 0
+            campos_pagina = campos_da_compra(recursos["compra"])
+            faltantes = campos_faltantes(campos_pagina, settings.EXTRACAO_CAMPOS_OBRIGATORIOS)
             
-            # Informações detalhadas
-            dados["informacoes_detalhadas"] = {
-                "metodo": "hibrido_completo",
-                "data": datetime.now().isoformat(),
-                "selenium": True,
-                "apis_utilizadas": ["itens", "historico", "arquivos", "orgao"],
-                "total_apis_sucesso": sum([
-                    1 if itens else 0,
-                    1 if historico else 0,
-                    1 if arquivos else 0,
-                    1 if dados_orgao else 0
-                ])
-            }
+            if not faltantes:
+                print(f"Camada API completa em {recursos['tempo_total']}s")
+                self.metricas_camadas.registrar("api")
+                return self._montar_edital(id_pncp, campos_pagina, recursos, "camadas_api", salvar_arquivos, selenium=False)
             
-            # === 6. SALVAMENTO DE ARQUIVOS (SE SOLICITADO) ===
-            if salvar_arquivos and arquivos:
-                print(f"Processando {len(arquivos)} arquivos...")
-                for i, arquivo in enumerate(arquivos, 1):
-                    try:
-                        print(f"[{i}/{len(arquivos)}] {arquivo.get('nome', 'arquivo')}...")
-                        arquivo_info = self.processar_arquivo(arquivo, id_pncp)
-                        if arquivo_info:
-                            arquivo.update(arquivo_info)
-                            print(f"Arquivo processado e salvo no bucket")
-                        else:
-                            print(f"Falha no processamento do arquivo")
-                    except Exception as e:
-                        print(f"Erro no arquivo {i}: {e}")
+            # === CAMADA 2: página no navegador só para completar os campos ausentes ===
+            print(f"Campos ausentes na API ({', '.join(faltantes)}) - abrindo pagina")
+            inicio = time.monotonic()
+            try:
+                page_source = self._carregar_pagina_detalhe(f"{settings.PNCP_BASE_URL}/app/editais/{id_pncp}")
+            except Exception as e:
+                # Sem navegador o edital ainda é gravado com o que a API trouxe
+                print(f"Erro ao abrir pagina ({e}) - mantendo dados da API")
+                self.metricas_camadas.registrar("falha", faltantes)
+                return self._montar_edital(id_pncp, campos_pagina, recursos, "camadas_api_parcial", salvar_arquivos, selenium=False)
             
-            # === 7. RESUMO DOS DADOS EXTRAÍDOS ===
-            print(f"EXTRAÇÃO COMPLETA FINALIZADA:")
-            print(f"Data divulgacao PNCP: {dados.get('data_divulgacao_pncp', 'N/A')}")
-            print(f"Data abertura: {dados.get('data_abertura', 'N/A')}")
-            print(f"Orgao: {dados.get('orgao', 'N/A')[:50]}...")
-            print(f"Modalidade: {dados.get('modalidade', 'N/A')}")
-            print(f"Situacao: {dados.get('situacao', 'N/A')}")
-            print(f"Valor: {dados.get('valor', 'N/A')}")
-            print(f"Itens: {dados.get('total_itens', 0)}")
-            print(f"Anexos: {dados.get('total_anexos', 0)}")
-            print(f"Historico: {dados.get('total_historico', 0)}")
+            self.metricas_camadas.registrar("selenium", faltantes, time.monotonic() - inicio)
+            for campo, valor in self.parse.campos_detalhe(page_source).items():
+                if valor and not campos_pagina.get(campo):
+                    campos_pagina[campo] = valor
             
-            return dados
+            return self._montar_edital(id_pncp, campos_pagina, recursos, "camadas_selenium", salvar_arquivos)
             
         except Exception as e:
-            print(f"Erro ao extrair pagina detalhada: {e}")
+            print(f"Erro na extracao em camadas: {e}")
             return None
+    
+    def extrair_edital(self, id_pncp, salvar_arquivos=True):
+        """Extrai um edital conforme EXTRACAO_MODO ("camadas" ou "hibrido")"""
+        if settings.EXTRACAO_MODO == "hibrido":
+            return self.extrair_edital_completo_hibrido(id_pncp, salvar_arquivos=salvar_arquivos)
+        return self.extrair_edital_em_camadas(id_pncp, salvar_arquivos=salvar_arquivos)
+    
+    @property
+    def tamanho_lote(self):
+        """Editais extraídos em paralelo (no modo camadas a maioria nem usa navegador)"""
+        if settings.EXTRACAO_MODO == "hibrido":
+            return self.pool.tamanho
+        return max(self.pool.tamanho, settings.EXTRACAO_WORKERS)
+    
+    def _montar_edital(self, id_pncp, campos_pagina, recursos, metodo, salvar_arquivos, selenium=True):
+        """Junta os campos da página com os dados estruturados das APIs e processa os arquivos"""
+        cnpj, ano, numero = id_pncp.split('/')
+        url_detalhada = f"{settings.PNCP_BASE_URL}/app/editais/{id_pncp}"
+        itens = recursos["itens"]
+        resumo_itens = recursos["resumo_itens"]
+        historico = recursos["historico"]
+        arquivos = recursos["arquivos"]
+        dados_orgao = recursos["orgao"]
+        
+        # === 3. MONTA DADOS COMPLETOS ===
+        dados = {
+            "id_pncp": id_pncp,
+            "link_licitacao": url_detalhada,
+            "metodo_extracao": metodo,
+            "data_coleta": datetime.now().isoformat(),
+            "cnpj_orgao": cnpj,
+            "ano": int(ano),
+            "numero": int(numero)
+        }
+        
+        # === 4. CAMPOS DA PÁGINA (navegador e/ou registro da compra) ===
+        dados.update(campos_pagina)
+        
+        if not dados["ultima_atualizacao"]:
+            dados["ultima_atualizacao"] = datetime.now().strftime('%d/%m/%Y')
+        
+        # Órgão e local: prioriza dados da API
+        if dados_orgao.get('razaoSocial'):
+            dados["orgao"] = dados_orgao['razaoSocial']
+        if dados_orgao.get('municipio') and dados_orgao.get('uf'):
+            dados["local"] = f"{dados_orgao['municipio']}/{dados_orgao['uf']}"
+        
+        # Modalidade: prioriza dados dos itens
+        if itens and itens[0].get('criterioJulgamentoNome'):
+            dados["modalidade"] = itens[0]['criterioJulgamentoNome']
+        
+        # Objeto: prioriza inferência dos itens
+        if itens:
+            dados["objeto"] = self.inferir_objeto(itens)
+        
+        # === 5. DADOS ESTRUTURADOS (APIs) ===
+        print(f"Processando dados estruturados...")
+        
+        # Edital básico
+        dados["edital"] = f"Edital {numero}/{ano}"
+        
+        # Valor total (somado página a página, inclusive itens além do limite armazenado)
+        valor_total = resumo_itens["valor_total"]
+        dados["valor_total_numerico"] = valor_total
+        dados["valor"] = f"R$ {valor_total:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.') if valor_total > 0 else ""
+        
+        # Contadores
+        dados["total_itens"] = resumo_itens["total_itens"]
+        dados["total_anexos"] = len(arquivos)
+        dados["total_historico"] = len(historico)
+        
+        # Dados processados
+        dados["itens"] = itens
+        dados["anexos"] = arquivos
+        dados["historico"] = historico
+        dados["itens_truncados"] = resumo_itens["truncado"]
+        if resumo_itens.get("excedentes"):
+            # Itens além dos guardados em memória: vão do arquivo para editais_itens na gravação
+            dados[ITENS_EXCEDENTES] = resumo_itens["excedentes"]
+        dados["itens_processados"] = len(itens) > 0
+        dados["anexos_processados"] = len(arquivos) > 0
+        dados["historico_processado"] = len(historico) > 0
+        
+        # Informações detalhadas
+        dados["informacoes_detalhadas"] = {
+            "metodo": metodo,
+            "data": datetime.now().isoformat(),
+            "selenium": selenium,
+            "apis_utilizadas": [r for r in RECURSOS_COMPRA if r in recursos],
+            "total_apis_sucesso": sum([
+                1 if itens else 0,
+                1 if historico else 0,
+                1 if arquivos else 0,
+                1 if dados_orgao else 0
+            ]),
+            "erros_apis": recursos["erros"],
+            "tempos_apis": recursos["tempos"],
+            "resumo_itens": resumo_itens,
+            "recursos_nao_modificados": recursos["nao_modificados"],
+            "inalterado": inalterado(recursos)
+        }
+        
+        # Hash do conteúdo antes dos uploads alterarem os anexos
+        carimbar(dados)
+        
+        # === 6. SALVAMENTO DE ARQUIVOS (SE SOLICITADO) ===
+        if salvar_arquivos and arquivos:
+            self.processar_anexos(arquivos, id_pncp)
+        
+        # === 7. RESUMO DOS DADOS EXTRAÍDOS ===
+        print(f"EXTRAÇÃO COMPLETA FINALIZADA:")
+        print(f"Data divulgacao PNCP: {dados.get('data_divulgacao_pncp', 'N/A')}")
+        print(f"Data abertura: {dados.get('data_abertura', 'N/A')}")
+        print(f"Orgao: {dados.get('orgao', 'N/A')[:50]}...")
+        print(f"Modalidade: {dados.get('modalidade', 'N/A')}")
+        print(f"Situacao: {dados.get('situacao', 'N/A')}")
+        print(f"Valor: {dados.get('valor', 'N/A')}")
+        print(f"Itens: {dados.get('total_itens', 0)}")
+        print(f"Anexos: {dados.get('total_anexos', 0)}")
+        print(f"Historico: {dados.get('total_historico', 0)}")
+        
+        return dados
 
+    def processar_anexos(self, arquivos, id_pncp):
+        """Baixa e envia ao bucket os arquivos do edital (atualiza cada dict de arquivos)
+        
+        Arquivos já enviados são pulados; retorna quantos continuam sem upload.
+        """
+        print(f"Processando {len(arquivos)} arquivos...")
+        for i, arquivo in enumerate(arquivos, 1):
+            if arquivo.get("upload_sucesso"):
+                continue
+            try:
+                print(f"[{i}/{len(arquivos)}] {arquivo.get('nome', 'arquivo')}...")
+                arquivo_info = self.processar_arquivo(arquivo, id_pncp)
+                if arquivo_info:
+                    arquivo.update(arquivo_info)
+                    print(f"Arquivo processado e salvo no bucket")
+                else:
+                    print(f"Falha no processamento do arquivo")
+            except Exception as e:
+                print(f"Erro no arquivo {i}: {e}")
+        return sum(1 for arquivo in arquivos if not arquivo.get("upload_sucesso"))
+    
+    def _carregar_pagina_detalhe(self, url_detalhada):
+        """Carrega a página de detalhe num navegador emprestado do pool"""
+        with self.pool.usar() as driver:
+            with self._ritmo("selenium"):
+                driver.get(url_detalhada)
+                aguardar_pagina(driver, "detalhe", self.metricas_prontidao)
+            return driver.page_source
+    
+    def _ritmo(self, tipo):
+        """Passa a chamada pelo limitador de taxa (quando ativo)"""
+        return self.limitador.medir(tipo) if self.limitador else nullcontext()
+    
+    def extrair_editais_paralelo(self, ids_pncp, salvar_arquivos=True):
+        """Extrai vários editais em paralelo (páginas distribuídas entre os navegadores do pool)
+        
+        Retorna os resultados na mesma ordem de ids_pncp (None quando a extração falhou).
+        """
+        ids_pncp = list(ids_pncp)
+        if len(ids_pncp) <= 1 or self.tamanho_lote == 1:
+            return [self.extrair_edital(id_pncp, salvar_arquivos=salvar_arquivos) for id_pncp in ids_pncp]
+        
+        with ThreadPoolExecutor(max_workers=min(self.tamanho_lote, len(ids_pncp))) as executor:
+            return list(executor.map(
+                lambda id_pncp: self.extrair_edital(id_pncp, salvar_arquivos=salvar_arquivos),
+                ids_pncp
+            ))
+    
     def extrair_edital_completo_api(self, id_pncp, salvar_arquivos=False):
         """Extrai dados completos via APIs do PNCP"""
         try:
@@ -573,45 +712,17 @@ class PNCPExtractor:
                 return None
             
             cnpj, ano, numero = id_pncp.split('/')
-            base_url = f"{settings.PNCP_API_URL}/orgaos/{cnpj}/compras/{ano}/{numero}"
-            
-            # Busca dados das APIs
-            itens = []
-            historico = []
-            arquivos = []
-            
-            try:
-                itens_response = self.session.get(f"{base_url}/itens", timeout=10)
-                if itens_response.status_code == 200:
-                    itens = itens_response.json()
-            except:
-                pass
-            
-            try:
-                historico_response = self.session.get(f"{base_url}/historico", timeout=10)
-                if historico_response.status_code == 200:
-                    historico = historico_response.json()
-            except:
-                pass
-            
-            try:
-                arquivos_response = self.session.get(f"{base_url}/arquivos", timeout=10)
-                if arquivos_response.status_code == 200:
-                    arquivos = arquivos_response.json()
-            except:
-                pass
             
-            # Dados do órgão
-            dados_orgao = {}
-            try:
-                orgao_response = self.session.get(f"{settings.PNCP_API_URL}/orgaos/{cnpj}", timeout=10)
-                if orgao_response.status_code == 200:
-                    dados_orgao = orgao_response.json()
-            except:
-                pass
+            # Busca dados das APIs (em paralelo; falhas viram listas/dict vazios)
+            recursos = self.recursos.buscar(cnpj, ano, numero, timeout=10)
+            itens = recursos["itens"]
+            historico = recursos["historico"]
+            arquivos = recursos["arquivos"]
+            dados_orgao = recursos["orgao"]
             
             # Monta dados para Supabase
-            valor_total = sum(item.get('valorTotal', 0) for item in itens)
+            resumo_itens = recursos["resumo_itens"]
+            valor_total = resumo_itens["valor_total"]
             valor_fmt = f"R$ {valor_total:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
             
             return {
@@ -626,11 +737,13 @@ class PNCPExtractor:
                 "valor": valor_fmt if valor_total > 0 else "NÃO INFORMADO",
                 "data_abertura": "",
                 "situacao": itens[0].get('situacaoCompraItemNome', 'Em andamento') if itens else 'Em andamento',
-                "valor_sigiloso": any(item.get('orcamentoSigiloso', False) for item in itens),
+                "valor_sigiloso": resumo_itens["orcamento_sigiloso"],
                 "informacoes_detalhadas": {
                     "metodo": "final_otimizado",
                     "data": datetime.now().isoformat(),
-                    "apis_utilizadas": ["itens", "historico", "arquivos", "orgao"]
+                    "apis_utilizadas": ["itens", "historico", "arquivos", "orgao"],
+                    "erros_apis": recursos["erros"],
+                    "resumo_itens": resumo_itens
                 },
                 "itens": [
                     {
@@ -651,9 +764,10 @@ class PNCPExtractor:
                         "tipo": evento.get('tipoLogManutencaoNome', '')
                     } for evento in historico
                 ],
-                "total_itens": len(itens),
+                "total_itens": resumo_itens["total_itens"],
                 "total_anexos": len(arquivos),
                 "total_historico": len(historico),
+                "itens_truncados": resumo_itens["truncado"] or resumo_itens["total_itens"] > len(itens),
                 "itens_processados": len(itens) > 0,
                 "anexos_processados": len(arquivos) > 0,
                 "historico_processado": len(historico) > 0,
@@ -675,8 +789,7 @@ class PNCPExtractor:
         if not itens:
             return "Não informado"
         
-        descricoes = [item.get('descricao', '').upper() for item in itens]
-        primeira_desc = descricoes[0] if descricoes else "Não informado"
+        primeira_desc = (itens[0].get('descricao') or '').upper()
         return f"Aquisição/Contratação: {primeira_desc[:100]}"
     
     def processar_arquivo(self, arquivo, id_pncp):
@@ -701,6 +814,18 @@ class PNCPExtractor:
                     "data_upload": datetime.now().isoformat()
                 }
             
+            # Storage fora do ar: nem baixa, o arquivo fica no backlog
+            disjuntor = self.disjuntores.obter("storage")
+            if not disjuntor.permitir():
+                return {
+                    "nome": nome_arquivo,
+                    "tamanho": tamanho,
+                    "upload_sucesso": False,
+                    "erro": "circuito aberto (storage)",
+                    "storage_url": None,
+                    "data_upload": datetime.now().isoformat()
+                }
+            
             # === 1. DOWNLOAD DO ARQUIVO ===
             print(f"Fazendo download...")
             
@@ -716,6 +841,8 @@ class PNCPExtractor:
                 
             except Exception as e:
                 print(f"Erro no download: {e}")
+                # O storage nem foi chamado: devolve a sonda sem veredito
+                disjuntor.liberar()
                 return {
                     "nome": nome_arquivo,
                     "tamanho": tamanho,
@@ -729,19 +856,20 @@ class PNCPExtractor:
             print(f"Fazendo upload para bucket...")
             
             try:
-                # Nome único para o arquivo no bucket
-                import uuid
-                nome_unico = f"{id_pncp.replace('/', '_')}_{uuid.uuid4().hex[:8]}_{nome_arquivo}"
+                # Nome fixo por arquivo (hash da URL): um reenvio substitui o objeto em vez de duplicá-lo
+                nome_unico = f"{id_pncp.replace('/', '_')}_{hashlib.sha1(url_download.encode()).hexdigest()[:8]}_{nome_arquivo}"
                 
                 # Upload para Supabase Storage
                 resultado_upload = self.supabase.storage.from_(self.bucket_name).upload(
                     file=conteudo_arquivo,
                     path=nome_unico,
                     file_options={
-                        "content-type": self.detectar_content_type(nome_arquivo)
+                        "content-type": self.detectar_content_type(nome_arquivo),
+                        "upsert": "true"
                     }
                 )
                 
+                disjuntor.sucesso()
                 if resultado_upload:
                     # Gera URL pública
                     url_publica = self.supabase.storage.from_(self.bucket_name).get_public_url(nome_unico)
@@ -772,6 +900,11 @@ class PNCPExtractor:
                     
             except Exception as e:
                 print(f"Erro no upload: {e}")
+                # Arquivo duplicado ou recusado pela política do bucket não é indisponibilidade
+                if any(motivo in str(e).lower() for motivo in ("duplicate", "exists", "policy", "permission")):
+                    disjuntor.sucesso()
+                else:
+                    disjuntor.falha(e)
                 return {
                     "nome": nome_arquivo,
                     "tamanho": tamanho_real if 'tamanho_real' in locals() else tamanho,
@@ -893,39 +1026,20 @@ class PNCPExtractor:
             return None
     
     def salvar_supabase(self, dados):
-        """Salva dados na tabela editais_completos"""
+        """Salva dados na tabela editais_completos (upsert por id_pncp, uma ida ao banco)"""
         try:
             print(f"Tentando salvar {dados['id_pncp']}...")
+            gravadas = self.upsert_editais([dados])
+            if gravadas:
+                id_salvo = gravadas[0].get("id")
+                print(f"Gravado com ID: {id_salvo}")
+                return id_salvo
+            print(f"Upsert sem dados retornados")
+            return None
             
-            try:
-                result = self.supabase.table("editais_completos").insert(dados).execute()
-                if result.data:
-                    id_salvo = result.data[0].get("id")
-                    print(f"Inserido com ID: {id_salvo}")
-                    return id_salvo
-                else:
-                    print(f"Insert sem dados retornados")
-                    return None
-            except Exception as insert_error:
-                print(f"Insert falhou: {str(insert_error)[:100]}...")
-                
-                if "duplicate" in str(insert_error).lower() or "unique" in str(insert_error).lower():
-                    print(f"Tentando update...")
-                    try:
-                        result = self.supabase.table("editais_completos").update(dados).eq("id_pncp", dados["id_pncp"]).execute()
-                        if result.data:
-                            id_salvo = result.data[0].get("id")
-                            print(f"Atualizado com ID: {id_salvo}")
-                            return id_salvo
-                        else:
-                            print(f"Update sem dados retornados")
-                            return None
-                    except Exception as update_error:
-                        print(f"Update falhou: {str(update_error)[:100]}...")
-                        raise Exception(f"Insert e Update falharam: {insert_error}")
-                else:
-                    raise Exception(f"Erro no insert: {insert_error}")
-            
+        except CircuitoAberto as e:
+            print(f"Gravacao de {dados['id_pncp']} adiada: {e}")
+            return None
         except Exception as e:
             print(f"ERRO CRÍTICO ao salvar: {e}")
             
@@ -935,15 +1049,389 @@ class PNCPExtractor:
                 print(f"PROBLEMA: Permissões insuficientes")
             elif "network" in str(e).lower():
                 print(f"PROBLEMA: Erro de rede")
-            
             return None
     
+    def upsert_editais(self, linhas):
+        """INSERT ... ON CONFLICT (id_pncp) DO UPDATE de várias linhas; retorna as linhas gravadas
+        
+        Linhas extraídas (frescor.carimbar) e parciais (frescor.montar_delta) já vêm com hash e
+        impressões dos grupos; as outras ganham aqui. Itens, anexos e histórico vão para as tabelas
+        filhas (filhas.py), gravadas em lote depois das linhas dos editais; os arquivos de itens
+        excedentes são apagados depois da gravação. Linhas com SOMENTE_ATUALIZAR (os anexos depois
+        dos uploads) viram UPDATE: nunca criam um edital que não foi gravado.
+        """
+        gravadas = []
+        for linha in [linha for linha in linhas if linha.get(SOMENTE_ATUALIZAR)]:
+            colunas = {coluna: valor for coluna, valor in linha.items() if coluna not in ("id_pncp", SOMENTE_ATUALIZAR)}
+            gravadas.extend({"id": atualizada.get("id"), "id_pncp": linha["id_pncp"]}
+                            for atualizada in self._atualizar_colunas(linha["id_pncp"], colunas, invalidar=False))
+        linhas = [linha for linha in linhas if not linha.get(SOMENTE_ATUALIZAR)]
+        if not linhas:
+            return gravadas
+        for linha in linhas:
+            if "hashes_grupos" not in linha:
+                linha["hash_conteudo"] = hash_conteudo(linha)
+                linha["hashes_grupos"] = hashes_grupos(linha)
+        pais, substituir, anexar = [], {}, []
+        for linha in linhas:
+            pai, grupos, novos = separar_filhas(linha)
+            pais.append(pai)
+            for grupo, valores in grupos.items():
+                substituir.setdefault(grupo, {})[pai["id_pncp"]] = valores
+            anexar.extend(novos)
+        
+        disjuntor = self.disjuntores.obter("banco_escrita")
+        disjuntor.verificar()
+        try:
+            result = medir(self.contador_banco, "upsert", lambda: self.supabase.table("editais_completos")
+                           .upsert(pais, on_conflict="id_pncp")
+                           .execute())
+            # Filhas depois do edital (chave estrangeira); se falharem, o lote inteiro é reenviado
+            self.gravar_filhas(substituir, anexar)
+        except Exception as e:
+            # Recusa por regra/permissão/dado inválido não é indisponibilidade do banco
+            if erro_transitorio(e):
+                disjuntor.falha(e)
+            else:
+                disjuntor.sucesso()
+            raise
+        disjuntor.sucesso()
+        for linha in linhas:
+            descartar_excedentes(linha)
+        return gravadas + (result.data or [])
+    
+    def gravar_filhas(self, substituir, anexar=()):
+        """Grava as tabelas filhas em lote
+        
+        substituir: {grupo: {id_pncp: lista}} - as filhas do grupo são regravadas por posição e as
+        que sobraram da lista anterior (posicao >= tamanho da nova) apagadas depois; se uma chamada
+        falhar no meio, o edital fica com a lista nova (e talvez a sobra da antiga), nunca vazio.
+        anexar: linhas de editais_historico a acrescentar (upsert por posição, reenvio não duplica).
+        """
+        for grupo, por_edital in substituir.items():
+            tabela = TABELAS_FILHAS[grupo]
+            # Geradas lote a lote: itens excedentes são lidos do arquivo à medida que são enviados
+            linhas = (filha for id_pncp, valores in por_edital.items() for filha in linhas_filhas(id_pncp, valores))
+            for lote in em_lotes(linhas, settings.FILHAS_LOTE):
+                medir(self.contador_banco, f"gravar_{grupo}", lambda: self.supabase.table(tabela)
+                      .upsert(lote, on_conflict="id_pncp,posicao").execute())
+            # Sobras: editais com o mesmo tamanho novo saem numa chamada só
+            por_tamanho = {}
+            for id_pncp, valores in por_edital.items():
+                por_tamanho.setdefault(len(valores or []), []).append(id_pncp)
+            for tamanho, ids in por_tamanho.items():
+                for lote in em_lotes(ids, settings.VERIFICACAO_LOTE):
+                    medir(self.contador_banco, f"apagar_{grupo}", lambda: self.supabase.table(tabela)
+                          .delete().in_("id_pncp", lote).gte("posicao", tamanho).execute())
+        for lote in em_lotes(list(anexar), settings.FILHAS_LOTE):
+            medir(self.contador_banco, "anexar_historico", lambda: self.supabase.table(TABELAS_FILHAS["historico"])
+                  .upsert(lote, on_conflict="id_pncp,posicao").execute())
+    
+    def verificar_existente(self, id_pncp, data_listagem=None):
+        """Consulta o edital na base e decide se precisa extrair
+        
+        Retorna (edital_existente, motivo) com motivo em (ver frescor.py):
+        "novo", "inalterado" (pular), "alterado" ou "conferir" (extrair e comparar o hash).
+        """
+        return self.verificar_existentes([id_pncp], {id_pncp: data_listagem})[id_pncp]
+    
+    def verificar_existentes(self, ids_pncp, datas_listagem=None):
+        """Como verificar_existente, para vários editais: uma consulta in_ por lote de VERIFICACAO_LOTE ids
+        
+        datas_listagem: {id_pncp: data de atualização na listagem}. Retorna {id_pncp: (edital_existente, motivo)}.
+        Com o banco fora do ar levanta CircuitoAberto sem esperar o timeout.
+        """
+        ids_pncp = list(dict.fromkeys(ids_pncp))
+        datas_listagem = datas_listagem or {}
+        existentes = {}
+        disjuntor = self.disjuntores.obter("banco_leitura")
+        for lote in em_lotes(ids_pncp, settings.VERIFICACAO_LOTE):
+            disjuntor.verificar()
+            try:
+                result = medir(self.contador_banco, "verificacao", lambda: self.supabase.table("editais_completos")
+                               .select(", ".join(("id", "id_pncp") + COLUNAS_VERIFICACAO))
+                               .in_("id_pncp", lote)
+                               .execute())
+            except Exception as e:
+                disjuntor.falha(e)
+                raise
+            disjuntor.sucesso()
+            for linha in result.data or []:
+                existentes[linha["id_pncp"]] = linha
+        
+        return self.considerar_outbox(ids_pncp, datas_listagem, existentes)
+    
+    def considerar_outbox(self, ids_pncp, datas_listagem, existentes=None):
+        """Decide o motivo de cada edital contando as gravações ainda na outbox
+        
+        A versão pendente é a mais nova do edital: sem ela, um edital extraído com o banco fora do ar
+        seria tratado como novo na execução seguinte e extraído (e os anexos enviados) de novo.
+        Ela vem marcada com "pendente" e traz os anexos, para reaproveitar os uploads já feitos.
+        """
+        existentes = existentes if existentes is not None else {}
+        for id_pncp, pendente in self.outbox.pendentes("editais", ids_pncp).items():
+            linha = dict(existentes.get(id_pncp) or {"id": None, "id_pncp": id_pncp})
+            linha.update({coluna: pendente[coluna] for coluna in COLUNAS_VERIFICACAO if coluna in pendente})
+            linha["pendente"] = True
+            linha["anexos"] = pendente.get("anexos")
+            existentes[id_pncp] = linha
+        
+        return {
+            id_pncp: (existentes.get(id_pncp), motivo_coleta(existentes.get(id_pncp), datas_listagem.get(id_pncp)))
+            for id_pncp in ids_pncp
+        }
+    
+    def marcar_conferidos(self, conferidos):
+        """Editais conferidos sem mudança: atualiza só data_coleta (e a data da listagem), em lote
+        
+        conferidos: {id_pncp: data de atualização na listagem ou None}.
+        """
+        agora = datetime.now().isoformat()
+        por_data = {}
+        for id_pncp, data_listagem in conferidos.items():
+            por_data.setdefault(data_listagem.isoformat() if data_listagem else None, []).append(id_pncp)
+        
+        disjuntor = self.disjuntores.obter("banco_escrita")
+        for data_listagem, ids in por_data.items():
+            colunas = {"data_coleta": agora}
+            if data_listagem:
+                colunas["atualizacao_listagem"] = data_listagem
+            for lote in em_lotes(ids, settings.VERIFICACAO_LOTE):
+                if not disjuntor.permitir():
+                    return
+                try:
+                    medir(self.contador_banco, "conferidos", lambda: self.supabase.table("editais_completos")
+                          .update(colunas).in_("id_pncp", lote).execute())
+                    disjuntor.sucesso()
+                except Exception as e:
+                    # Sem a marca o edital só é conferido de novo na próxima execução
+                    disjuntor.falha(e)
+                    print(f"Erro ao marcar {len(lote)} editais conferidos: {e}")
+    
+    def _notificar_console(self, evento, id_pncp, **info):
+        """Mensagens de progresso do pipeline no console"""
+        if evento == "verificando":
+            print(f"[{info['atual']}/{info['total']}] {id_pncp}")
+        elif evento == "verificado":
+            existente = info["existente"]
+            if info["motivo"] == "inalterado":
+                print(f"Ja existe e nao mudou na listagem (ID: {existente['id']}) - PULANDO...")
+            elif info["motivo"] == "alterado":
+                print(f"Ja existe e foi atualizado no PNCP (ID: {existente['id']}) - ATUALIZANDO...")
+            elif info["motivo"] == "conferir":
+                print(f"Ja existe (ID: {existente['id']}) - EXTRAINDO PARA COMPARAR...")
+            else:
+                print(f"Novo edital - EXTRAINDO PARA INSERIR...")
+        elif evento == "inalterado":
+            print(f"{id_pncp} sem alteracoes desde a ultima coleta - gravacao pulada")
+        elif evento == "salvo":
+            print(f"{'ATUALIZADO' if info['atualizado'] else 'INSERIDO'} {id_pncp} ID: {info['supabase_id']}")
+        elif evento == "erro":
+            print(f"Erro ({info['etapa']}) {id_pncp or ''}: {info['erro']}")
+    
+    async def executar_pipeline(self, descobrir, salvar_arquivos=False, notificar=None):
+        """Roda descoberta/verificação/extração/anexos/persistência em estágios (ver pipeline.py)
+        
+        Refaz também o que ficou no backlog de execuções anteriores: editais inteiros seguem pelos
+        estágios do pipeline depois da listagem; o resto (um recurso, anexos, gravação) é refeito no
+        fim, menos o dos editais que a execução acabou de gravar.
+        """
+        self.monitor_loop.iniciar()
+        pendentes = self.backlog.pendentes(settings.BACKLOG_LOTE)
+        editais = [entrada for entrada in pendentes if entrada["etapa"] == "edital"]
+        pipeline = PipelineExtracao(self, salvar_arquivos, notificar=notificar or self._notificar_console,
+                                    reprocessar=editais)
+        resultado = await pipeline.executar(descobrir)
+        refeitos = set(resultado.salvos) | set(resultado.aguardando_banco)
+        resultado.backlog = await asyncio.to_thread(self.reprocessar_backlog, pendentes=[
+            entrada for entrada in pendentes if entrada["etapa"] != "edital" and entrada["id_pncp"] not in refeitos
+        ])
+        resultado.backlog["editais_no_pipeline"] = len(editais)
+        return resultado
+    
+    # === Backlog de reprocessamento ===
+    
+    def registrar_pendencias(self, dados):
+        """Depois de gravar o edital: recursos que falharam por indisponibilidade vão para o backlog"""
+        id_pncp = dados["id_pncp"]
+        erros = dados.get("informacoes_detalhadas", {}).get("erros_apis", {})
+        for recurso in RECURSOS:
+            erro = erros.get(recurso)
+            if falha_de_servidor(erro):
+                self.backlog.registrar(id_pncp, recurso, erro)
+            else:
+                self.backlog.resolver(id_pncp, recurso)
+        self.backlog.resolver(id_pncp, "edital")
+        self.backlog.resolver(id_pncp, "persistencia")
+    
+    def _colunas_recurso(self, recurso, recursos):
+        """Colunas do edital que dependem de um único recurso da API"""
+        if recurso == "itens":
+            itens = recursos["itens"]
+            valor_total = recursos["resumo_itens"]["valor_total"]
+            colunas = {
+                "itens": itens,
+                "total_itens": recursos["resumo_itens"]["total_itens"],
+                "itens_truncados": recursos["resumo_itens"]["truncado"],
+                "itens_processados": len(itens) > 0,
+                "valor_total_numerico": valor_total,
+                "valor": f"R$ {valor_total:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.') if valor_total > 0 else ""
+            }
+            if recursos["resumo_itens"].get("excedentes"):
+                # Como na extração: os itens além dos guardados em memória vêm do arquivo
+                colunas[ITENS_EXCEDENTES] = recursos["resumo_itens"]["excedentes"]
+            if itens:
+                colunas["objeto"] = self.inferir_objeto(itens)
+                if itens[0].get('criterioJulgamentoNome'):
+                    colunas["modalidade"] = itens[0]['criterioJulgamentoNome']
+            return colunas
+        if recurso == "historico":
+            historico = recursos["historico"]
+            return {"historico": historico, "total_historico": len(historico), "historico_processado": len(historico) > 0}
+        if recurso == "arquivos":
+            arquivos = recursos["arquivos"]
+            return {"anexos": arquivos, "total_anexos": len(arquivos), "anexos_processados": len(arquivos) > 0}
+        dados_orgao = recursos["orgao"]
+        colunas = {}
+        if dados_orgao.get('razaoSocial'):
+            colunas["orgao"] = dados_orgao['razaoSocial']
+        if dados_orgao.get('municipio') and dados_orgao.get('uf'):
+            colunas["local"] = f"{dados_orgao['municipio']}/{dados_orgao['uf']}"
+        return colunas
+    
+    def _atualizar_colunas(self, id_pncp, colunas, invalidar=True):
+        """UPDATE de algumas colunas fora do fluxo normal; retorna as linhas atualizadas
+        
+        Itens, anexos e histórico são regravados nas tabelas filhas (se o edital já existir).
+        Por padrão invalida o hash e as impressões da linha (o conteúdo mudou por fora do delta).
+        """
+        linha = {"id_pncp": id_pncp, **colunas}
+        colunas, substituir, _ = separar_filhas(linha)
+        colunas.pop("id_pncp")
+        if invalidar:
+            colunas = {**colunas, "hash_conteudo": None, "hashes_grupos": None}
+        tabela = self.supabase.table("editais_completos")
+        consulta = tabela.update(colunas) if colunas else tabela.select("id")
+        disjuntor = self.disjuntores.obter("banco_escrita")
+        disjuntor.verificar()
+        try:
+            result = medir(self.contador_banco, "update_colunas", lambda: consulta.eq("id_pncp", id_pncp).execute())
+            if result.data and substituir:
+                self.gravar_filhas({grupo: {id_pncp: valores} for grupo, valores in substituir.items()})
+        except Exception as e:
+            disjuntor.falha(e)
+            raise
+        disjuntor.sucesso()
+        if result.data:
+            descartar_excedentes(linha)
+        return result.data or []
+    
+    def _enviar_anexos(self, linhas):
+        """Uploads pendentes da outbox: refaz os arquivos sem upload e manda os anexos ao escritor dos editais
+        
+        Pelo escritor (e não por um UPDATE direto) os anexos corrigidos se juntam à gravação do
+        edital que ainda esteja esperando, ou entram depois dela: a lista antiga nunca os sobrescreve.
+        """
+        enviados = []
+        for linha in linhas:
+            id_pncp, arquivos = linha["id_pncp"], linha["arquivos"]
+            sem_upload = self.processar_anexos(arquivos, id_pncp)
+            if sem_upload:
+                raise Exception(f"{sem_upload} arquivos de {id_pncp} ainda sem upload")
+            # Só o resultado do upload mudou: o hash do conteúdo continua valendo
+            self.escritor.enviar({"id_pncp": id_pncp, "anexos": arquivos, SOMENTE_ATUALIZAR: True}, existente=True)
+            enviados.append({"id_pncp": id_pncp, "id": None})
+        return enviados
+    
+    @staticmethod
+    def _juntar_envios(antiga, nova):
+        """Dois envios pendentes do mesmo edital: vale a lista nova, com os uploads que a antiga já fez"""
+        reaproveitar_uploads(nova["arquivos"], antiga["arquivos"])
+        return nova
+    
+    def _reprocessar(self, entrada):
+        """Refaz uma pendência; retorna True se resolvida"""
+        id_pncp, etapa = entrada["id_pncp"], entrada["etapa"]
+        
+        # Dependência ainda com o disjuntor aberto: nem tenta
+        dependencia = {"persistencia": "banco_escrita", "edital": "banco_escrita"}.get(etapa, etapa)
+        disjuntor = self.disjuntores.obter(dependencia)
+        if disjuntor.segundos_restantes() > 0:
+            raise CircuitoAberto(dependencia, disjuntor.segundos_restantes())
+        
+        if etapa == "persistencia":
+            # Pendência de versões anteriores: a gravação agora é refeita só pela outbox
+            if entrada.get("dados"):
+                self.escritor.enviar(entrada["dados"], existente=True)
+            return True
+        
+        if etapa == "edital":
+            dados = self.extrair_edital(id_pncp, salvar_arquivos=False)
+            if not dados:
+                return False
+            data_listagem = (entrada.get("dados") or {}).get("atualizacao_listagem")
+            if data_listagem:
+                # Sem a data da listagem a próxima execução extrairia o edital de novo para conferir
+                dados["atualizacao_listagem"] = data_listagem
+            if not self.salvar_supabase(dados):
+                return False
+            self.registrar_pendencias(dados)
+            return True
+        
+        if etapa == "storage":
+            # Idem: os uploads pendentes seguem pela outbox do storage
+            self.envios_storage.enviar({"id_pncp": id_pncp, "arquivos": entrada.get("dados") or []})
+            return True
+        
+        # Um recurso da API: busca só ele e atualiza só as colunas dele
+        cnpj, ano, numero = id_pncp.split('/')
+        recursos = self.recursos.buscar(cnpj, ano, numero, (etapa,))
+        erro = recursos["erros"].get(etapa)
+        if erro and erro.startswith("circuito aberto"):
+            raise CircuitoAberto(etapa, disjuntor.segundos_restantes())
+        if erro:
+            raise Exception(erro)
+        self._atualizar_colunas(id_pncp, self._colunas_recurso(etapa, recursos))
+        return True
+    
+    def reprocessar_backlog(self, limite=None, pendentes=None):
+        """Refaz as pendências do backlog (mais antigas primeiro); as que falharem continuam lá"""
+        if pendentes is None:
+            pendentes = self.backlog.pendentes(limite or settings.BACKLOG_LOTE)
+        resultado = {"pendentes": len(pendentes), "resolvidos": 0, "falhas": 0, "adiados": 0}
+        if not pendentes:
+            return resultado
+        
+        print(f"Backlog: reprocessando {len(pendentes)} pendencias")
+        for entrada in pendentes:
+            try:
+                resolvido = self._reprocessar(entrada)
+            except CircuitoAberto:
+                # Dependência ainda fora do ar: fica para depois sem gastar tentativa
+                resultado["adiados"] += 1
+                continue
+            except Exception as e:
+                resolvido = False
+                entrada["erro"] = str(e)
+            
+            if resolvido:
+                self.backlog.resolver(entrada["id_pncp"], entrada["etapa"])
+                resultado["resolvidos"] += 1
+            else:
+                self.backlog.registrar(entrada["id_pncp"], entrada["etapa"], entrada.get("erro"), entrada.get("dados"))
+                resultado["falhas"] += 1
+        
+        self.backlog.salvar()
+        print(f"Backlog: {resultado['resolvidos']} resolvidos, {resultado['falhas']} falhas, {resultado['adiados']} adiados")
+        return resultado
+    
     async def executar_extracao_dia(self, data_extracao=None, salvar_arquivos=False, max_editais=50):
         """Executa extração de um dia específico com limites otimizados"""
         print(" INICIANDO EXTRAÇÃO DO DIA (OTIMIZADA)")
         print("=" * 50)
         
         start_time = time.time()
+        self.iniciar_metricas_execucao()
         
         if not data_extracao:
             data_extracao = (datetime.now() - timedelta(days=1)).date()
@@ -954,14 +1442,21 @@ class PNCPExtractor:
         print(f" Limite maximo de editais: {max_editais}")
         print(f" Salvar arquivos: {salvar_arquivos}")
         
-        # 1. Busca TODOS os editais do dia anterior (sem limites)
-        editais_encontrados = self.buscar_editais_recentes(
-            data_filtro=data_extracao,
-            max_paginas=20,  # Aumentado para garantir cobertura TOTAL
-            limit_por_pagina=100  # Máximo por página para eficiência
+        # Listagem do dia (TODAS as páginas) alimentando verificação, extração e gravação
+        execucao = await self.executar_pipeline(
+            lambda ao_encontrar: self.buscar_editais_recentes(
+                data_filtro=data_extracao,
+                max_paginas=20,  # Aumentado para garantir cobertura TOTAL
+                limit_por_pagina=100,  # Máximo por página para eficiência
+                ao_encontrar=ao_encontrar
+            ),
+            salvar_arquivos
         )
         
-        if not editais_encontrados:
+        # Libera o driver Selenium (mantém aquecido entre execuções)
+        self.liberar_driver()
+        
+        if not execucao.encontrados:
             return {
                 "success": False,
                 "message": f"Nenhum edital encontrado para {data_extracao}",
@@ -970,100 +1465,29 @@ class PNCPExtractor:
                 "tempo_execucao": round(time.time() - start_time, 2)
             }
         
-        # 2. PROCESSA TODOS OS EDITAIS (sem limite)
-        print(f" Processando TODOS os {len(editais_encontrados)} editais do dia anterior")
-        
-        # 3. Extrai e salva cada edital
-        print(f"\n Processando {len(editais_encontrados)} editais...")
-        
-        salvos = []
-        erros = []
-        
-        for i, edital_basico in enumerate(editais_encontrados, 1):
-            try:
-                id_pncp = edital_basico.get("id_pncp")
-                if not id_pncp:
-                    continue
-                
-                print(f"[{i}/{len(editais_encontrados)}]  {id_pncp}")
-                
-                # Verifica se já existe (VERIFICAÇÃO INTELIGENTE)
-                existing = self.supabase.table("editais_completos")\
-                    .select("id, ultima_atualizacao, data_coleta")\
-                    .eq("id_pncp", id_pncp)\
-                    .execute()
-                
-                edital_existente = None
-                deve_extrair = True
-                
-                if existing.data:
-                    edital_existente = existing.data[0]
-                    ultima_coleta = edital_existente.get("data_coleta")
-                    
-                    # Se foi coletado hoje, pula
-                    if ultima_coleta:
-                        data_coleta = datetime.fromisoformat(ultima_coleta.replace('Z', '+00:00'))
-                        hoje = datetime.now()
-                        
-                        if data_coleta.date() == hoje.date():
-                            print(f"Ja existe e foi coletado hoje (ID: {edital_existente['id']}) - PULANDO...")
-                            deve_extrair = False
-                        else:
-                            print(f"Ja existe mas foi coletado antes (ID: {edital_existente['id']}) - ATUALIZANDO...")
-                    else:
-                        print(f"Ja existe sem data de coleta (ID: {edital_existente['id']}) - ATUALIZANDO...")
-                else:
-                    print(f"Novo edital - EXTRAINDO PARA INSERIR...")
-                
-                # Só extrai se necessário
-                dados_completos = None
-                if deve_extrair:
-                    dados_completos = self.extrair_edital_completo_hibrido(id_pncp, salvar_arquivos=salvar_arquivos)
-                else:
-                    # Pula este edital
-                    print(f"Pulando edital {id_pncp} - ja foi processado hoje")
-                    continue
-                
-                if dados_completos:
-                    # Salva (INSERT ou UPDATE automático)
-                    supabase_id = self.salvar_supabase(dados_completos)
-                    if supabase_id:
-                        salvos.append(id_pncp)
-                        if edital_existente:
-                            print(f"ATUALIZADO ID: {supabase_id}")
-                        else:
-                            print(f"INSERIDO ID: {supabase_id}")
-                    else:
-                        print(f"FALHA AO SALVAR NO SUPABASE")
-                        erros.append({"id_pncp": id_pncp, "erro": "Falha ao salvar no Supabase"})
-                else:
-                    print(f"Falha na extracao de dados completos")
-                    erros.append({"id_pncp": id_pncp, "erro": "Falha na extracao de dados"})
-                
-                # Pausa reduzida
-                await asyncio.sleep(0.2)  # Reduzido de 0.3 para 0.2
-                
-            except Exception as e:
-                print(f" Erro: {e}")
-                erros.append({"id_pncp": id_pncp, "erro": str(e)})
-        
         tempo_total = round(time.time() - start_time, 2)
         
         resultado = {
             "success": True,
             "message": f"Extração otimizada concluída em {tempo_total}s",
             "data_extracao": str(data_extracao),
-            "total_encontrados": len(editais_encontrados),
-            "total_salvos": len(salvos),
-            "total_erros": len(erros),
+            "total_encontrados": len(execucao.encontrados),
+            "total_salvos": len(execucao.salvos),
+            "total_inalterados": len(execucao.inalterados),
+            "total_pulados": len(execucao.pulados),
+            "total_erros": len(execucao.erros),
             "tempo_execucao": tempo_total,
-            "editais_salvos": salvos,
-            "erros": erros,
+            "editais_salvos": execucao.salvos,
+            "erros": execucao.erros,
+            **self.metricas_execucao(),
+            "pipeline": execucao.metricas(),
+            "reprocessamento": execucao.backlog,
+            "aguardando_banco": execucao.aguardando_banco,
             "configuracao": {
                 "max_editais": max_editais,
                 "salvar_arquivos": salvar_arquivos,
-                "max_paginas": 2,
-                "limit_por_pagina": 25
+                "max_paginas": 20,
+                "limit_por_pagina": 100
             }
         }
         
@@ -1071,11 +1495,10 @@ class PNCPExtractor:
         print(f"Encontrados: {resultado['total_encontrados']}")
         print(f"Salvos: {resultado['total_salvos']}")
         print(f"Erros: {resultado['total_erros']}")
+        if resultado["aguardando_banco"]:
+            print(f"Aguardando banco (na outbox): {len(resultado['aguardando_banco'])}")
         print(f"Tempo: {tempo_total}s")
         
-        # Fecha o driver Selenium
-        self.fechar_driver()
-        
         return resultado
     
     async def executar_extracao_inteligente(self, dias_retroativos=1, salvar_arquivos=False):
@@ -1084,150 +1507,72 @@ class PNCPExtractor:
         print("=" * 50)
         
         start_time = time.time()
+        self.iniciar_metricas_execucao()
         
         data_final = datetime.now().date()
         data_inicial = data_final - timedelta(days=dias_retroativos)
+        max_paginas = 50 * (dias_retroativos + 1)  # Sempre máximo para pegar TODOS
         
         print(f"Periodo: {data_inicial} a {data_final}")
         print(f"Dias retroativos: {dias_retroativos}")
         print(f"Salvar arquivos: {salvar_arquivos}")
         print()
         
-        todos_editais = []
-        novos_total = []
-        atualizados_total = []
-        erros_total = []
+        # Uma única varredura da listagem para todo o período; cada página já segue para
+        # verificação/extração/gravação enquanto as próximas são lidas
+        execucao = await self.executar_pipeline(
+            lambda ao_encontrar: self.buscar_editais_periodo(
+                data_inicial, data_final,
+                max_paginas=max_paginas,
+                limit_por_pagina=100,
+                ao_encontrar=ao_encontrar
+            ),
+            salvar_arquivos
+        )
         
-        # Processa cada dia do período
-        for dia_offset in range(dias_retroativos, -1, -1):
-            data_extracao = data_final - timedelta(days=dia_offset)
-            
-            print(f"Processando {data_extracao}...")
-            
-            # Busca editais do dia - SEMPRE extração completa
-            editais_encontrados = self.buscar_editais_recentes(
-                data_filtro=data_extracao,
-                max_paginas=50,  # Sempre máximo para pegar TODOS
-                limit_por_pagina=100
-            )
-            
-            if not editais_encontrados:
-                print(f"  Nenhum edital encontrado em {data_extracao}")
-                continue
-            
-            print(f"  Encontrados: {len(editais_encontrados)} editais")
-            todos_editais.extend(editais_encontrados)
+        # Libera driver (mantém aquecido entre execuções)
+        self.liberar_driver()
         
-        if not todos_editais:
-            self.fechar_driver()
+        for data_extracao, editais_encontrados in (execucao.descoberta or {}).items():
+            print(f"  {data_extracao}: {len(editais_encontrados)} editais")
+        
+        if not execucao.encontrados:
             return {
                 "success": False,
                 "message": f"Nenhum edital encontrado no período",
                 "total_encontrados": 0,
                 "total_novos": 0,
                 "total_atualizados": 0,
-                "total_erros": 0,
+                "total_erros": len(execucao.erros),
                 "tempo_execucao": round(time.time() - start_time, 2)
             }
         
-        print()
-        print(f"TOTAL no período: {len(todos_editais)} editais")
-        print(f"Processando com verificação inteligente...")
-        print()
-        
-        for i, edital_basico in enumerate(todos_editais, 1):
-            try:
-                id_pncp = edital_basico.get("id_pncp")
-                if not id_pncp:
-                    continue
-                
-                print(f"[{i}/{len(todos_editais)}] {id_pncp}")
-                
-                # Verifica se já existe na base (VERIFICAÇÃO INTELIGENTE)
-                existing = self.supabase.table("editais_completos")\
-                    .select("id, ultima_atualizacao, data_coleta")\
-                    .eq("id_pncp", id_pncp)\
-                    .execute()
-                
-                edital_existente = None
-                deve_extrair = True
-                
-                if existing.data:
-                    edital_existente = existing.data[0]
-                    ultima_coleta = edital_existente.get("data_coleta")
-                    
-                    # Se foi coletado hoje, pula
-                    if ultima_coleta:
-                        data_coleta = datetime.fromisoformat(ultima_coleta.replace('Z', '+00:00'))
-                        hoje = datetime.now()
-                        
-                        if data_coleta.date() == hoje.date():
-                            print(f" Ja existe e foi coletado hoje (ID: {edital_existente['id']}) - PULANDO...")
-                            deve_extrair = False
-                        else:
-                            print(f" Ja existe mas foi coletado antes (ID: {edital_existente['id']}) - ATUALIZANDO...")
-                    else:
-                        print(f" Ja existe sem data de coleta (ID: {edital_existente['id']}) - ATUALIZANDO...")
-                else:
-                    print(f" Novo edital - EXTRAINDO PARA INSERIR...")
-                
-                # Só extrai se necessário
-                dados_completos = None
-                if deve_extrair:
-                    dados_completos = self.extrair_edital_completo_hibrido(id_pncp, salvar_arquivos=salvar_arquivos)
-                else:
-                    # Pula este edital
-                    print(f" Pulando edital {id_pncp} - ja foi processado hoje")
-                    continue
-                
-                # Processa dados extraídos
-                if dados_completos:
-                    # Salva (INSERT ou UPDATE automático)
-                    supabase_id = self.salvar_supabase(dados_completos)
-                    if supabase_id:
-                        if edital_existente:
-                            atualizados_total.append(id_pncp)
-                            print(f"ATUALIZADO ID: {supabase_id}")
-                        else:
-                            novos_total.append(id_pncp)
-                            print(f"INSERIDO ID: {supabase_id}")
-                    else:
-                        print(f"FALHA AO SALVAR NO SUPABASE")
-                        erros_total.append({"id_pncp": id_pncp, "erro": "Falha ao salvar no Supabase"})
-                else:
-                    print(f"Falha na extracao de dados completos")
-                    erros_total.append({"id_pncp": id_pncp, "erro": "Falha na extracao de dados"})
-                
-                # Pausa reduzida
-                await asyncio.sleep(0.2)
-                
-            except Exception as e:
-                print(f"Erro: {e}")
-                erros_total.append({"id_pncp": id_pncp, "erro": str(e)})
-        
         tempo_total = round(time.time() - start_time, 2)
         
-        # Fecha driver
-        self.fechar_driver()
-        
         resultado = {
             "success": True,
             "message": f"Extração inteligente concluída em {tempo_total}s",
             "periodo": f"{data_inicial} a {data_final}",
             "dias_retroativos": dias_retroativos,
-            "total_encontrados": len(todos_editais),
-            "total_novos": len(novos_total),
-            "total_atualizados": len(atualizados_total),
-            "total_erros": len(erros_total),
+            "total_encontrados": len(execucao.encontrados),
+            "total_novos": len(execucao.novos),
+            "total_atualizados": len(execucao.atualizados),
+            "total_inalterados": len(execucao.inalterados),
+            "total_pulados": len(execucao.pulados),
+            "total_erros": len(execucao.erros),
             "tempo_execucao": tempo_total,
-            "editais_novos": novos_total,
-            "editais_atualizados": atualizados_total,
-            "erros": erros_total,
+            "editais_novos": execucao.novos,
+            "editais_atualizados": execucao.atualizados,
+            "erros": execucao.erros,
+            **self.metricas_execucao(),
+            "pipeline": execucao.metricas(),
+            "reprocessamento": execucao.backlog,
+            "aguardando_banco": execucao.aguardando_banco,
             "configuracao": {
                 "salvar_arquivos": salvar_arquivos,
-                "max_paginas": 50,
+                "max_paginas": max_paginas,
                 "limit_por_pagina": 100,
-                "estrategia": "inteligente_multiplos_dias"
+                "estrategia": "inteligente_periodo_varredura_unica"
             }
         }
         
@@ -1238,6 +1583,8 @@ class PNCPExtractor:
         print(f"Novos: {resultado['total_novos']}")
         print(f"Atualizados: {resultado['total_atualizados']}")
         print(f"Erros: {resultado['total_erros']}")
+        if resultado["aguardando_banco"]:
+            print(f"Aguardando banco (na outbox): {len(resultado['aguardando_banco'])}")
         print(f"Tempo: {tempo_total}s")
         
-        return resultado
\ No newline at end of file
+        return resultado
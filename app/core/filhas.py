@@ -0,0 +1,120 @@
+"""
+Itens, anexos e histórico dos editais em tabelas filhas (migração sql/003_filhas.sql)
+
+A linha de editais_completos guarda só o resumo (total_itens, total_anexos, total_historico...);
+cada item, anexo e evento é uma linha de editais_itens / editais_anexos / editais_historico com
+chave (id_pncp, posicao). A gravação separa as listas da linha do edital e grava as filhas em
+lote; a leitura busca as filhas só quando um endpoint do edital pede. Itens além do limite em
+memória vêm de um arquivo (itens_api.ItensExcedentes) e são lidos em lotes durante a gravação.
+"""
+
+import os
+import json
+
+from .frescor import HISTORICO_NOVOS, ITENS_EXCEDENTES, SOMENTE_ATUALIZAR
+
+
+TABELAS_FILHAS = {
+    "itens": "editais_itens",
+    "anexos": "editais_anexos",
+    "historico": "editais_historico"
+}
+
+
+class ItensComExcedentes:
+    """Itens em memória seguidos dos guardados no arquivo de excedentes (lido só ao iterar)"""
+
+    def __init__(self, itens, excedentes):
+        self.itens = itens
+        self.excedentes = excedentes
+
+    def __len__(self):
+        return len(self.itens) + self.excedentes["total"]
+
+    def __iter__(self):
+        yield from self.itens
+        with open(self.excedentes["arquivo"], encoding="utf-8") as entrada:
+            for linha in entrada:
+                yield json.loads(linha)
+
+
+def linhas_filhas(id_pncp, valores, inicio=0):
+    """Uma linha (id_pncp, posicao, dados) por elemento da lista (geradas à medida que são lidas)"""
+    return ({"id_pncp": id_pncp, "posicao": inicio + i, "dados": valor} for i, valor in enumerate(valores or []))
+
+
+def separar_filhas(linha):
+    """Tira as listas da linha do edital; retorna (linha do edital, substituir, anexar)
+
+    substituir: {grupo: lista} para regravar as filhas do grupo inteiro.
+    anexar: linhas do histórico a acrescentar no fim (eventos novos de frescor.montar_delta).
+    """
+    pai = {coluna: valor for coluna, valor in linha.items()
+           if coluna not in TABELAS_FILHAS and coluna not in (HISTORICO_NOVOS, ITENS_EXCEDENTES)}
+    substituir = {grupo: linha[grupo] or [] for grupo in TABELAS_FILHAS if grupo in linha}
+    excedentes = linha.get(ITENS_EXCEDENTES)
+    if excedentes and "itens" in substituir:
+        if os.path.exists(excedentes["arquivo"]):
+            substituir["itens"] = ItensComExcedentes(substituir["itens"], excedentes)
+        else:
+            # Arquivo já apagado (gravação repetida depois de dias): só os itens em memória
+            pai["itens_truncados"] = True
+    anexar = []
+    if HISTORICO_NOVOS in linha:
+        novos = linha[HISTORICO_NOVOS]
+        anexar = linhas_filhas(linha["id_pncp"], novos["eventos"], novos["esperados"])
+    return pai, substituir, anexar
+
+
+def descartar_excedentes(linha):
+    """Apaga o arquivo de itens excedentes da linha (já gravados, ou edital que não será gravado)"""
+    excedentes = linha.get(ITENS_EXCEDENTES)
+    if excedentes:
+        try:
+            os.remove(excedentes["arquivo"])
+        except OSError:
+            pass
+
+
+def juntar_versoes(antiga, nova):
+    """Uma linha com duas versões do edital ainda não gravadas (a nova por cima da antiga)
+
+    Colunas que só a antiga tem continuam. Eventos novos do histórico entram na lista (ou nos
+    eventos novos) da antiga; o arquivo de itens excedentes só vale com os itens da mesma versão.
+    Uma atualização de colunas (SOMENTE_ATUALIZAR) por cima de uma linha inteira segue como upsert.
+    """
+    linha = {**antiga, **nova}
+    if not antiga.get(SOMENTE_ATUALIZAR):
+        linha.pop(SOMENTE_ATUALIZAR, None)
+    if "itens" in nova and antiga.get(ITENS_EXCEDENTES) and antiga[ITENS_EXCEDENTES] is not nova.get(ITENS_EXCEDENTES):
+        descartar_excedentes(antiga)
+        if ITENS_EXCEDENTES not in nova:
+            linha.pop(ITENS_EXCEDENTES)
+    novos = nova.get(HISTORICO_NOVOS)
+    if "historico" in nova:
+        linha.pop(HISTORICO_NOVOS, None)
+    elif novos and isinstance(antiga.get("historico"), list):
+        linha["historico"] = antiga["historico"] + novos["eventos"]
+        linha.pop(HISTORICO_NOVOS)
+    elif novos and antiga.get(HISTORICO_NOVOS):
+        anteriores = antiga[HISTORICO_NOVOS]
+        linha[HISTORICO_NOVOS] = {"esperados": anteriores["esperados"], "eventos": anteriores["eventos"] + novos["eventos"]}
+    return linha
+
+
+def consultar_filhas(supabase, grupo, id_pncp, limite=None, inicio=0, contar=False):
+    """Elementos de um grupo (itens, anexos ou historico) do edital, na ordem original
+
+    Com contar=True retorna (elementos, total do grupo no edital), contados na mesma consulta.
+    """
+    consulta = supabase.table(TABELAS_FILHAS[grupo])\
+        .select("posicao, dados", count="exact" if contar else None)\
+        .eq("id_pncp", id_pncp)\
+        .order("posicao")
+    if limite is not None:
+        consulta = consulta.range(inicio, inicio + limite - 1)
+    result = consulta.execute()
+    elementos = [linha["dados"] for linha in result.data or []]
+    if contar:
+        return elementos, result.count if result.count is not None else len(elementos)
+    return elementos
@@ -0,0 +1,230 @@
+"""
+Detecção de mudança: data de atualização da listagem + hash do conteúdo extraído
+
+Antes de buscar o edital, a data de "Última Atualização" da listagem é comparada com a que foi
+gravada na última coleta (atualizacao_listagem): se não mudou e a coleta foi feita depois desse
+dia, o edital é pulado sem abrir API nem navegador. Quando a data não decide, o edital é extraído
+e o hash do conteúdo (hash_conteudo) é comparado com o gravado - igual, a gravação é pulada.
+
+Quando mudou, a atualização leva só os grupos de colunas cuja impressão (hashes_grupos) difere da
+gravada: itens, anexos e histórico são listas grandes e quase sempre ficam iguais. Eventos novos no
+fim do histórico são acrescentados (linhas novas de editais_historico) em vez de regravar a lista.
+"""
+
+import json
+import hashlib
+import threading
+from datetime import datetime, date
+
+
+# Campos que mudam a cada coleta sem que o edital tenha mudado
+CAMPOS_VOLATEIS = ("data_coleta", "informacoes_detalhadas", "metodo_extracao", "hash_conteudo", "atualizacao_listagem",
+                   "hashes_grupos")
+
+# Grupos de colunas com impressão própria; o resto do edital forma o grupo "principal"
+GRUPOS = {
+    "itens": ("itens", "total_itens", "itens_processados", "valor_total_numerico", "valor", "objeto", "modalidade",
+              "itens_truncados", "_itens_excedentes"),
+    "anexos": ("anexos", "total_anexos", "anexos_processados"),
+    "historico": ("historico", "total_historico", "historico_processado")
+}
+
+# Chave pseudo-coluna com os eventos a anexar ao histórico (tirada da linha antes do upsert)
+HISTORICO_NOVOS = "_historico_novos"
+
+# Chave pseudo-coluna com o arquivo dos itens além de ITENS_MAX_ARMAZENADOS (itens_api.ItensExcedentes)
+ITENS_EXCEDENTES = "_itens_excedentes"
+
+# Pseudo-coluna das linhas que só atualizam colunas de um edital já gravado (UPDATE, nunca INSERT)
+SOMENTE_ATUALIZAR = "_somente_atualizar"
+
+# Resultado do upload de cada anexo (nome no bucket, URL, data) - não é conteúdo do edital
+CAMPOS_UPLOAD = ("nome_bucket", "storage_url", "bucket", "upload_sucesso", "data_upload", "url_original", "erro")
+
+# Colunas da linha gravada que decidem se o edital precisa ser extraído de novo
+COLUNAS_VERIFICACAO = ("ultima_atualizacao", "data_coleta", "atualizacao_listagem", "hash_conteudo", "hashes_grupos")
+
+NOVO = "novo"
+INALTERADO = "inalterado"   # pular antes de buscar
+ALTERADO = "alterado"       # listagem com data mais nova que a gravada
+CONFERIR = "conferir"       # a data não decide: extrai e compara o hash
+
+
+def _sha256(valor):
+    texto = json.dumps(valor, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def _conteudo(dados):
+    conteudo = {campo: valor for campo, valor in dados.items()
+                if campo not in CAMPOS_VOLATEIS and campo not in (HISTORICO_NOVOS, SOMENTE_ATUALIZAR)}
+    if isinstance(conteudo.get("anexos"), list):
+        conteudo["anexos"] = [
+            {campo: valor for campo, valor in anexo.items() if campo not in CAMPOS_UPLOAD} if isinstance(anexo, dict) else anexo
+            for anexo in conteudo["anexos"]
+        ]
+    if isinstance(conteudo.get(ITENS_EXCEDENTES), dict):
+        # O caminho do arquivo muda a cada leitura; o conteúdo está no hash dos itens
+        conteudo[ITENS_EXCEDENTES] = {c: v for c, v in conteudo[ITENS_EXCEDENTES].items() if c != "arquivo"}
+    return conteudo
+
+
+def hash_conteudo(dados):
+    """SHA-256 do edital sem os campos voláteis (mesmo edital, mesmo hash)"""
+    return _sha256(_conteudo(dados))
+
+
+def hashes_grupos(dados):
+    """Impressão de cada grupo de colunas, mais tamanho e hash dos eventos do histórico"""
+    conteudo = _conteudo(dados)
+    agrupadas = set()
+    hashes = {}
+    for grupo, colunas in GRUPOS.items():
+        hashes[grupo] = _sha256({coluna: conteudo.get(coluna) for coluna in colunas})
+        agrupadas.update(colunas)
+    hashes["principal"] = _sha256({campo: valor for campo, valor in conteudo.items() if campo not in agrupadas})
+    historico = conteudo.get("historico") or []
+    hashes["historico_n"] = len(historico)
+    hashes["historico_eventos"] = _sha256(historico)
+    return hashes
+
+
+def carimbar(dados):
+    """Guarda em dados o hash e as impressões do conteúdo como extraído
+
+    Feito antes dos uploads: processar_anexos completa cada anexo (nome, tamanho baixado...) e o
+    hash gravado tem de ser o mesmo que a próxima extração, sem uploads, vai calcular.
+    """
+    dados["hash_conteudo"] = hash_conteudo(dados)
+    dados["hashes_grupos"] = hashes_grupos(dados)
+    return dados
+
+
+def montar_delta(dados, edital_existente):
+    """Linha de atualização só com os grupos alterados; retorna (linha, grupos alterados)
+
+    Sempre vão id_pncp, metadados da coleta e as novas impressões. Se o histórico gravado for o
+    começo do novo, só os eventos a mais seguem (em HISTORICO_NOVOS, com o tamanho esperado).
+    """
+    novas = hashes_grupos(dados)
+    antigas = (edital_existente or {}).get("hashes_grupos") or {}
+    linha = {campo: dados[campo] for campo in ("id_pncp",) + CAMPOS_VOLATEIS if campo in dados}
+    linha["hash_conteudo"] = hash_conteudo(dados)
+    linha["hashes_grupos"] = novas
+
+    alterados = []
+    agrupadas = {coluna for colunas in GRUPOS.values() for coluna in colunas}
+    for grupo in ("principal",) + tuple(GRUPOS):
+        if antigas.get(grupo) == novas[grupo]:
+            continue
+        alterados.append(grupo)
+        if grupo == "principal":
+            linha.update({c: v for c, v in dados.items() if c not in agrupadas and c not in linha})
+            continue
+        colunas = {c: dados[c] for c in GRUPOS[grupo] if c in dados}
+        if grupo == "historico":
+            historico = dados.get("historico") or []
+            gravados = antigas.get("historico_n")
+            if gravados is not None and len(historico) > gravados and _sha256(historico[:gravados]) == antigas.get("historico_eventos"):
+                colunas.pop("historico")
+                linha[HISTORICO_NOVOS] = {"esperados": gravados, "eventos": historico[gravados:]}
+        linha.update(colunas)
+    return linha, alterados
+
+
+def reaproveitar_uploads(arquivos, anteriores):
+    """Copia para cada anexo o resultado do upload já feito do mesmo arquivo (mesma URL) numa versão anterior"""
+    enviados = {
+        anterior["url"]: anterior for anterior in anteriores or []
+        if isinstance(anterior, dict) and anterior.get("upload_sucesso") and anterior.get("url")
+    }
+    for arquivo in arquivos:
+        anterior = enviados.get(arquivo.get("url"))
+        if anterior and not arquivo.get("upload_sucesso"):
+            arquivo.update({campo: anterior[campo] for campo in CAMPOS_UPLOAD if campo in anterior})
+            arquivo.pop("erro", None)
+
+
+def _como_data(valor):
+    if not valor:
+        return None
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    try:
+        return datetime.fromisoformat(str(valor).replace('Z', '+00:00')).date()
+    except ValueError:
+        return None
+
+
+def motivo_coleta(edital_existente, data_listagem=None):
+    """Decide o que fazer com o edital a partir da linha já gravada (ou None) e da data da listagem"""
+    if not edital_existente:
+        return NOVO
+
+    data_listagem = _como_data(data_listagem)
+    gravada = _como_data(edital_existente.get("atualizacao_listagem"))
+    coleta = _como_data(edital_existente.get("data_coleta"))
+    if not data_listagem or not gravada or not coleta:
+        return CONFERIR
+    if data_listagem > gravada:
+        return ALTERADO
+    # Coletado num dia posterior à última atualização: nenhuma mudança daquele dia ficou de fora
+    if coleta > data_listagem:
+        return INALTERADO
+    return CONFERIR
+
+
+class MetricasFrescor:
+    """Editais por decisão (antes da busca) e por comparação de hash (depois)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.limpar()
+
+    def limpar(self):
+        self.motivos = {NOVO: 0, INALTERADO: 0, ALTERADO: 0, CONFERIR: 0}
+        self.hash_igual = 0
+        self.hash_diferente = 0
+        self.nao_modificados = 0
+        self.grupos_alterados = {}
+
+    def registrar_motivo(self, motivo):
+        with self._lock:
+            self.motivos[motivo] = self.motivos.get(motivo, 0) + 1
+
+    def registrar_hash(self, igual):
+        with self._lock:
+            if igual:
+                self.hash_igual += 1
+            else:
+                self.hash_diferente += 1
+
+    def registrar_grupos(self, grupos):
+        """Grupos de colunas enviados numa atualização parcial"""
+        with self._lock:
+            for grupo in grupos:
+                self.grupos_alterados[grupo] = self.grupos_alterados.get(grupo, 0) + 1
+
+    def registrar_nao_modificado(self):
+        """APIs responderam 304: nem precisou do hash"""
+        with self._lock:
+            self.nao_modificados += 1
+
+    def resumo(self):
+        with self._lock:
+            verificados = sum(self.motivos.values())
+            pulados_antes = self.motivos[INALTERADO]
+            pulados_depois = self.hash_igual + self.nao_modificados
+            return {
+                "verificados": verificados,
+                "motivos": dict(self.motivos),
+                "hash_igual": self.hash_igual,
+                "hash_diferente": self.hash_diferente,
+                "nao_modificados_304": self.nao_modificados,
+                "grupos_alterados": dict(self.grupos_alterados),
+                # Fração dos editais verificados que não foi buscada / não foi regravada
+                "taxa_pulo_busca": round(pulados_antes / verificados, 3) if verificados else None,
+                "taxa_pulo_gravacao": round((pulados_antes + pulados_depois) / verificados, 3) if verificados else None
+            }
@@ -0,0 +1,198 @@
+"""
+Ciclo de vida dos navegadores: chromedriver em cache, instâncias aquecidas e reciclagem
+"""
+
+import os
+import json
+import time
+import threading
+import weakref
+from datetime import datetime
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+
+from .config import settings
+
+
+def medir_rss_mb(pid):
+    """Soma o RSS (MB) do processo e de todos os descendentes (chromedriver + Chrome)"""
+    if not pid:
+        return 0.0
+
+    try:
+        import psutil
+        processo = psutil.Process(pid)
+        total = processo.memory_info().rss
+        for filho in processo.children(recursive=True):
+            try:
+                total += filho.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / (1024 * 1024)
+    except ImportError:
+        pass
+    except Exception:
+        return 0.0
+
+    # Fallback sem psutil: percorre /proc (Linux)
+    if not os.path.isdir("/proc"):
+        return 0.0
+
+    filhos = {}
+    for entrada in os.listdir("/proc"):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entrada}/stat") as f:
+                # O nome do processo pode ter espaços: o ppid vem depois do último ")"
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            filhos.setdefault(ppid, []).append(int(entrada))
+        except (OSError, ValueError, IndexError):
+            continue
+
+    total_kb = 0
+    pendentes = [pid]
+    while pendentes:
+        atual = pendentes.pop()
+        pendentes.extend(filhos.get(atual, []))
+        try:
+            with open(f"/proc/{atual}/status") as f:
+                for linha in f:
+                    if linha.startswith("VmRSS:"):
+                        total_kb += int(linha.split()[1])
+                        break
+        except OSError:
+            continue
+    return total_kb / 1024
+
+
+class GerenciadorDriver:
+    """Cria navegadores com chromedriver resolvido uma única vez e decide quando reciclá-los"""
+
+    def __init__(self, arquivo_cache=None, max_paginas=None, max_rss_mb=None, intervalo_rss=None):
+        self.arquivo_cache = os.path.expanduser(arquivo_cache or settings.CHROMEDRIVER_CACHE_FILE)
+        self.max_paginas = max_paginas if max_paginas is not None else settings.SELENIUM_RECYCLE_PAGES
+        self.max_rss_mb = max_rss_mb if max_rss_mb is not None else settings.SELENIUM_RECYCLE_RSS_MB
+        self.intervalo_rss = max(1, intervalo_rss if intervalo_rss is not None else settings.SELENIUM_RSS_INTERVALO)
+
+        self._caminho_chromedriver = None
+        self._lock = threading.Lock()
+        self._uso = weakref.WeakKeyDictionary()
+
+        # Métricas
+        self.tempo_resolucao = None
+        self.partidas_frias = []
+        self.reciclagens = {"paginas": 0, "memoria": 0}
+        self.rss_pico_mb = 0.0
+        self.rss_amostras = []
+
+    def resolver_chromedriver(self):
+        """Caminho do chromedriver: env > cache em disco > webdriver-manager (grava no cache)"""
+        with self._lock:
+            if self._caminho_chromedriver and os.path.exists(self._caminho_chromedriver):
+                return self._caminho_chromedriver
+
+            inicio = time.monotonic()
+            caminho = settings.CHROMEDRIVER_PATH or self._ler_cache()
+
+            if not caminho:
+                from webdriver_manager.chrome import ChromeDriverManager
+                caminho = ChromeDriverManager().install()
+                self._gravar_cache(caminho)
+                print(f"Chromedriver resolvido e gravado em cache: {caminho}")
+
+            self._caminho_chromedriver = caminho
+            self.tempo_resolucao = round(time.monotonic() - inicio, 3)
+            return caminho
+
+    def criar(self, opcoes):
+        """Inicia um Chrome novo e registra o tempo de partida a frio"""
+        inicio = time.monotonic()
+        try:
+            service = Service(self.resolver_chromedriver())
+            driver = webdriver.Chrome(service=service, options=opcoes)
+            print("Selenium configurado com chromedriver em cache")
+        except Exception as e:
+            print(f" Erro com chromedriver em cache: {e}")
+            self._invalidar_cache()
+            # Fallback para configuração manual (Selenium Manager)
+            driver = webdriver.Chrome(options=opcoes)
+            print(" Selenium configurado manualmente")
+
+        with self._lock:
+            self._uso[driver] = 0
+            self.partidas_frias.append(round(time.monotonic() - inicio, 3))
+            del self.partidas_frias[:-100]
+        return driver
+
+    def deve_reciclar(self, driver):
+        """Conta mais uma página e indica se o navegador deve ser substituído"""
+        with self._lock:
+            paginas = self._uso.get(driver, 0) + 1
+            self._uso[driver] = paginas
+
+        if self.max_paginas and paginas >= self.max_paginas:
+            print(f"Reciclando navegador apos {paginas} paginas")
+            self.reciclagens["paginas"] += 1
+            return True
+
+        # Medir o RSS percorre a árvore de processos: só a cada intervalo_rss páginas
+        if self.max_rss_mb and paginas % self.intervalo_rss == 0:
+            rss = self._rss_driver(driver)
+            if rss > self.max_rss_mb:
+                print(f"Reciclando navegador: RSS {rss:.0f}MB acima de {self.max_rss_mb}MB")
+                self.reciclagens["memoria"] += 1
+                return True
+        return False
+
+    def status(self):
+        partidas = sorted(self.partidas_frias)
+        return {
+            "chromedriver": self._caminho_chromedriver,
+            "tempo_resolucao_chromedriver": self.tempo_resolucao,
+            "partidas_frias": len(partidas),
+            "partida_fria_media": round(sum(partidas) / len(partidas), 3) if partidas else None,
+            "partida_fria_max": partidas[-1] if partidas else None,
+            "reciclagens": dict(self.reciclagens),
+            "rss_pico_mb": round(self.rss_pico_mb, 1),
+            "rss_amostras": list(self.rss_amostras[-20:])
+        }
+
+    def _rss_driver(self, driver):
+        try:
+            pid = driver.service.process.pid
+        except Exception:
+            return 0.0
+        rss = medir_rss_mb(pid)
+        with self._lock:
+            self.rss_pico_mb = max(self.rss_pico_mb, rss)
+            self.rss_amostras.append({"hora": datetime.now().strftime("%H:%M:%S"), "rss_mb": round(rss, 1)})
+            del self.rss_amostras[:-500]
+        return rss
+
+    def _ler_cache(self):
+        try:
+            with open(self.arquivo_cache) as f:
+                caminho = json.load(f).get("caminho")
+            if caminho and os.path.exists(caminho):
+                return caminho
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _gravar_cache(self, caminho):
+        try:
+            os.makedirs(os.path.dirname(self.arquivo_cache), exist_ok=True)
+            with open(self.arquivo_cache, "w") as f:
+                json.dump({"caminho": caminho, "resolvido_em": datetime.now().isoformat()}, f)
+        except OSError as e:
+            print(f" Nao foi possivel gravar cache do chromedriver: {e}")
+
+    def _invalidar_cache(self):
+        with self._lock:
+            self._caminho_chromedriver = None
+        try:
+            os.remove(self.arquivo_cache)
+        except OSError:
+            pass
@@ -0,0 +1,204 @@
+"""
+Leitura paginada e em streaming dos itens de um edital (/compras/{ano}/{seq}/itens)
+
+Atas de registro de preço chegam a milhares de itens: as páginas da API são lidas uma a uma
+(item a item com ijson, se instalado) e os totais são acumulados sem montar a lista inteira.
+Só os primeiros ITENS_MAX_ARMAZENADOS itens ficam em memória; os demais vão para um arquivo
+JSON Lines em ITENS_EXCEDENTES_DIR, lido em lotes na gravação de editais_itens (filhas.py).
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+from .config import settings
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+class ItensExcedentes:
+    """Itens além do limite em memória, um por linha num arquivo JSON Lines (criado no primeiro)"""
+
+    def __init__(self, diretorio):
+        self.diretorio = os.path.expanduser(diretorio)
+        self.arquivo = None
+        self.total = 0
+        self._saida = None
+        self._hash = hashlib.sha256()
+
+    def adicionar(self, item):
+        if self._saida is None:
+            os.makedirs(self.diretorio, exist_ok=True)
+            descritor, self.arquivo = tempfile.mkstemp(suffix=".jsonl", dir=self.diretorio)
+            self._saida = os.fdopen(descritor, "w", encoding="utf-8")
+        linha = json.dumps(item, sort_keys=True, ensure_ascii=False, default=str)
+        self._saida.write(linha + "\n")
+        self._hash.update(linha.encode("utf-8"))
+        self.total += 1
+
+    def fechar(self):
+        if self._saida is not None:
+            self._saida.close()
+            self._saida = None
+
+    def como_dict(self, inicio):
+        """Referência guardada no edital: arquivo, posição do primeiro item, quantidade e hash"""
+        return {"arquivo": self.arquivo, "inicio": inicio, "total": self.total, "hash": self._hash.hexdigest()}
+
+
+def limpar_excedentes(diretorio=None, dias=None):
+    """Apaga arquivos de itens excedentes esquecidos (edital que nunca chegou a ser gravado)"""
+    diretorio = os.path.expanduser(settings.ITENS_EXCEDENTES_DIR if diretorio is None else diretorio)
+    dias = settings.ITENS_EXCEDENTES_DIAS if dias is None else dias
+    if not diretorio or not os.path.isdir(diretorio):
+        return 0
+    limite = time.time() - dias * 86400
+    apagados = 0
+    for nome in os.listdir(diretorio):
+        caminho = os.path.join(diretorio, nome)
+        try:
+            if nome.endswith(".jsonl") and os.path.getmtime(caminho) < limite:
+                os.remove(caminho)
+                apagados += 1
+        except OSError:
+            pass
+    return apagados
+
+
+class ResumoItens:
+    """Totais calculados item a item; guarda no máximo max_armazenados itens em memória
+
+    Os seguintes vão para ItensExcedentes (se houver diretório); sem ele, são descartados e o
+    resumo fica marcado como truncado.
+    """
+
+    def __init__(self, max_armazenados=None, diretorio_excedentes=None):
+        self.max_armazenados = settings.ITENS_MAX_ARMAZENADOS if max_armazenados is None else max_armazenados
+        diretorio = settings.ITENS_EXCEDENTES_DIR if diretorio_excedentes is None else diretorio_excedentes
+        self.excedentes = ItensExcedentes(diretorio) if diretorio else None
+        self.itens = []
+        self.total = 0
+        self.valor_total = 0.0
+        self.sigiloso = False
+        self.primeiro = None
+        self.paginas = 0
+        self.paginas_nao_modificadas = 0
+        # Leitura parou em ITENS_MAX_PAGINAS com a última página cheia: pode haver mais itens
+        self.limite_paginas = False
+
+    def adicionar(self, item):
+        if not isinstance(item, dict):
+            return
+        self.total += 1
+        self.valor_total += item.get("valorTotal") or 0
+        self.sigiloso = self.sigiloso or bool(item.get("orcamentoSigiloso"))
+        if self.primeiro is None:
+            self.primeiro = item
+        if len(self.itens) < self.max_armazenados:
+            self.itens.append(item)
+        elif self.excedentes is not None:
+            self.excedentes.adicionar(item)
+
+    def fechar(self):
+        if self.excedentes is not None:
+            self.excedentes.fechar()
+
+    @property
+    def nao_modificado(self):
+        """Todas as páginas lidas vieram de um 304 (cache HTTP)"""
+        return self.paginas > 0 and self.paginas_nao_modificadas == self.paginas
+
+    @property
+    def guardados(self):
+        """Itens em memória mais os do arquivo de excedentes"""
+        return len(self.itens) + (self.excedentes.total if self.excedentes is not None else 0)
+
+    @property
+    def truncado(self):
+        """Itens que não foram gravados: não couberam em memória nem em arquivo, ou nem foram lidos"""
+        return self.total > self.guardados or self.limite_paginas
+
+    def como_dict(self):
+        primeiro = self.primeiro or {}
+        return {
+            "total_itens": self.total,
+            "valor_total": self.valor_total,
+            "orcamento_sigiloso": self.sigiloso,
+            "criterio_julgamento": primeiro.get("criterioJulgamentoNome", ""),
+            "situacao_item": primeiro.get("situacaoCompraItemNome", ""),
+            "primeira_descricao": primeiro.get("descricao", ""),
+            "itens_armazenados": len(self.itens),
+            "excedentes": self.excedentes.como_dict(len(self.itens)) if self.excedentes and self.excedentes.total else None,
+            "truncado": self.truncado,
+            "limite_paginas": self.limite_paginas,
+            "paginas": self.paginas
+        }
+
+
+def _itens_da_resposta(response):
+    """Itera os itens de uma página sem carregar o JSON inteiro (quando ijson está disponível)"""
+    if ijson is not None and not getattr(response, "lido_pelo_cache", False):
+        response.raw.decode_content = True
+        yield from ijson.items(response.raw, "item", use_float=True)
+        # Lê o restante do corpo para a conexão voltar ao pool da session
+        response.raw.read()
+        return
+    dados = json.loads(response.content)
+    yield from (dados if isinstance(dados, list) else [])
+
+
+def ler_itens(session, url, timeout=15, tamanho_pagina=None, max_paginas=None, max_armazenados=None):
+    """Segue a paginação de /itens acumulando os totais; retorna (resumo, erro)"""
+    resumo = ResumoItens(max_armazenados)
+    try:
+        return resumo, _ler_paginas(session, url, resumo, timeout, tamanho_pagina, max_paginas)
+    finally:
+        resumo.fechar()
+
+
+def _ler_paginas(session, url, resumo, timeout, tamanho_pagina, max_paginas):
+    """Acrescenta ao resumo os itens de cada página; retorna o erro (ou None)"""
+    tamanho_pagina = tamanho_pagina or settings.ITENS_TAMANHO_PAGINA
+    max_paginas = max_paginas or settings.ITENS_MAX_PAGINAS
+    primeiro_anterior = None
+
+    for pagina in range(1, max_paginas + 1):
+        params = {"pagina": pagina, "tamanhoPagina": tamanho_pagina}
+        try:
+            with session.get(url, params=params, timeout=timeout, stream=True) as response:
+                if response.status_code == 204 or (response.status_code == 404 and pagina > 1):
+                    break
+                if response.status_code != 200:
+                    return f"status {response.status_code}"
+
+                recebidos = 0
+                primeiro = None
+                for item in _itens_da_resposta(response):
+                    if recebidos == 0:
+                        primeiro = item
+                        # API que ignora a paginação devolve a mesma página de novo
+                        if pagina > 1 and item == primeiro_anterior:
+                            break
+                    resumo.adicionar(item)
+                    recebidos += 1
+        except Exception as e:
+            return str(e) or e.__class__.__name__
+
+        if recebidos:
+            resumo.paginas += 1
+            resumo.paginas_nao_modificadas += int(getattr(response, "nao_modificado", False))
+        primeiro_anterior = primeiro
+        # Página incompleta (ou maior que o pedido: sem paginação) encerra a leitura
+        if recebidos != tamanho_pagina:
+            break
+    else:
+        # Todas as páginas permitidas vieram cheias: total e valor somados são parciais
+        resumo.limite_paginas = True
+        print(f"Itens de {url}: leitura parou em {max_paginas} paginas (ITENS_MAX_PAGINAS)")
+
+    return None
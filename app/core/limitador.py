@@ -0,0 +1,135 @@
+"""
+Limitador de taxa adaptativo (AIMD) para as chamadas ao PNCP
+
+Token bucket compartilhado pelas APIs (session do extrator) e pelas páginas abertas no
+navegador. A taxa sobe um pouco a cada resposta rápida e bem-sucedida (aumento aditivo) e cai
+pela metade diante de 429/5xx, timeouts ou latência bem acima da normal (redução multiplicativa).
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+
+from .config import settings
+
+
+# Respostas que indicam servidor sobrecarregado
+STATUS_SOBRECARGA = frozenset({429, 500, 502, 503, 504})
+
+
+class LimitadorAIMD:
+    """Token bucket cuja taxa (requisições/s) se ajusta por AIMD"""
+
+    def __init__(self, taxa_inicial=None, taxa_min=None, taxa_max=None, incremento=None, fator_reducao=None,
+                 rajada=None, fator_latencia=None, intervalo_reducao=1.0):
+        self.taxa_min = taxa_min if taxa_min is not None else settings.LIMITADOR_TAXA_MIN
+        self.taxa_max = taxa_max if taxa_max is not None else settings.LIMITADOR_TAXA_MAX
+        taxa_inicial = taxa_inicial if taxa_inicial is not None else settings.LIMITADOR_TAXA_INICIAL
+        self.taxa = min(max(taxa_inicial, self.taxa_min), self.taxa_max)
+        self.incremento = incremento if incremento is not None else settings.LIMITADOR_INCREMENTO
+        self.fator_reducao = fator_reducao if fator_reducao is not None else settings.LIMITADOR_FATOR_REDUCAO
+        self.rajada = max(1.0, rajada if rajada is not None else settings.LIMITADOR_RAJADA)
+        self.fator_latencia = fator_latencia if fator_latencia is not None else settings.LIMITADOR_FATOR_LATENCIA
+        # Erros simultâneos de várias threads contam como um único sinal de sobrecarga
+        self.intervalo_reducao = intervalo_reducao
+
+        self._lock = threading.Lock()
+        self._tokens = self.rajada
+        self._ultimo = time.monotonic()
+        self._ultima_reducao = 0.0
+        # Latência média por tipo de chamada (api/selenium) e a menor média já vista
+        self._latencia = {}
+        self._latencia_base = {}
+        self._amostras = {}
+        self.limpar()
+
+    def adquirir(self):
+        """Reserva um token; dorme o necessário e devolve os segundos de espera"""
+        with self._lock:
+            agora = time.monotonic()
+            self._tokens = min(self.rajada, self._tokens + (agora - self._ultimo) * self.taxa)
+            self._ultimo = agora
+            self._tokens -= 1
+            # Saldo negativo = fila: cada thread espera a sua vez
+            espera = -self._tokens / self.taxa if self._tokens < 0 else 0.0
+            self.requisicoes += 1
+            self.espera_total += espera
+        if espera:
+            time.sleep(espera)
+        return espera
+
+    def registrar(self, tipo, segundos=None, sucesso=True, status=None):
+        """Ajusta a taxa a partir do resultado de uma chamada"""
+        sobrecarga = not sucesso or status in STATUS_SOBRECARGA
+        with self._lock:
+            if status in STATUS_SOBRECARGA:
+                self.status_sobrecarga[status] = self.status_sobrecarga.get(status, 0) + 1
+            elif not sucesso:
+                self.falhas += 1
+
+            if not sobrecarga and segundos is not None:
+                media = self._latencia.get(tipo)
+                media = segundos if media is None else 0.8 * media + 0.2 * segundos
+                self._latencia[tipo] = media
+                amostras = self._amostras.get(tipo, 0) + 1
+                self._amostras[tipo] = amostras
+                if amostras >= 10:
+                    # A base acompanha devagar uma mudança duradoura de patamar
+                    base = self._latencia_base.get(tipo, media)
+                    base = min(media, base + 0.01 * (media - base))
+                    self._latencia_base[tipo] = base
+                    if media > self.fator_latencia * base:
+                        self.lentas += 1
+                        sobrecarga = True
+
+            if sobrecarga:
+                agora = time.monotonic()
+                if agora - self._ultima_reducao >= self.intervalo_reducao:
+                    self._ultima_reducao = agora
+                    self.taxa = max(self.taxa_min, self.taxa * self.fator_reducao)
+                    self.reducoes += 1
+            else:
+                # Aumento aditivo: cerca de +incremento req/s a cada segundo de tráfego na taxa atual
+                self.taxa = min(self.taxa_max, self.taxa + self.incremento / self.taxa)
+            self._taxa_min_execucao = min(self._taxa_min_execucao, self.taxa)
+            self._taxa_max_execucao = max(self._taxa_max_execucao, self.taxa)
+
+    @contextmanager
+    def medir(self, tipo):
+        """Adquire um token, mede a chamada e registra falha se ela levantar exceção"""
+        self.adquirir()
+        inicio = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.registrar(tipo, time.monotonic() - inicio, sucesso=False)
+            raise
+        self.registrar(tipo, time.monotonic() - inicio)
+
+    def limpar(self):
+        """Zera as métricas da execução (a taxa aprendida é mantida)"""
+        with self._lock:
+            self.requisicoes = 0
+            self.espera_total = 0.0
+            self.reducoes = 0
+            self.lentas = 0
+            self.falhas = 0
+            self.status_sobrecarga = {}
+            self._taxa_min_execucao = self.taxa
+            self._taxa_max_execucao = self.taxa
+
+    def resumo(self):
+        with self._lock:
+            return {
+                "taxa_atual": round(self.taxa, 2),
+                "taxa_min": round(self._taxa_min_execucao, 2),
+                "taxa_max": round(self._taxa_max_execucao, 2),
+                "limites": [self.taxa_min, self.taxa_max],
+                "requisicoes": self.requisicoes,
+                "espera_total_s": round(self.espera_total, 2),
+                "reducoes": self.reducoes,
+                "respostas_sobrecarga": dict(self.status_sobrecarga),
+                "respostas_lentas": self.lentas,
+                "falhas": self.falhas,
+                "latencia_media_s": {tipo: round(media, 3) for tipo, media in self._latencia.items()}
+            }
@@ -0,0 +1,57 @@
+"""
+Atraso do event loop (lag): quanto um asyncio.sleep curto acorda depois do previsto
+
+Se o atraso cresce durante a extração, algo está bloqueando o loop (trabalho de CPU ou I/O
+síncrono fora de thread) e o FastAPI deixa de responder no meio tempo.
+"""
+
+import asyncio
+from collections import deque
+
+
+class MonitorLoop:
+    """Mede o lag do loop em que foi iniciado, a cada intervalo segundos"""
+
+    def __init__(self, intervalo=0.05, amostras=2000):
+        self.intervalo = intervalo
+        self._amostras = deque(maxlen=amostras)
+        self._tarefa = None
+        self.maximo = 0.0
+
+    def iniciar(self):
+        """Inicia a medição no loop atual (sem efeito se já estiver rodando nele)"""
+        loop = asyncio.get_running_loop()
+        if self._tarefa and not self._tarefa.done() and self._tarefa.get_loop() is loop:
+            return
+        self._tarefa = loop.create_task(self._medir())
+
+    async def _medir(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            inicio = loop.time()
+            await asyncio.sleep(self.intervalo)
+            atraso = max(0.0, loop.time() - inicio - self.intervalo)
+            self._amostras.append(atraso)
+            self.maximo = max(self.maximo, atraso)
+
+    def parar(self):
+        if self._tarefa:
+            self._tarefa.cancel()
+            self._tarefa = None
+
+    def limpar(self):
+        self._amostras.clear()
+        self.maximo = 0.0
+
+    def resumo(self):
+        amostras = sorted(self._amostras)
+        if not amostras:
+            return {"amostras": 0}
+        percentil = lambda p: amostras[min(len(amostras) - 1, int(p * len(amostras)))]
+        return {
+            "amostras": len(amostras),
+            "media_ms": round(1000 * sum(amostras) / len(amostras), 2),
+            "p50_ms": round(1000 * percentil(0.5), 2),
+            "p99_ms": round(1000 * percentil(0.99), 2),
+            "max_ms": round(1000 * self.maximo, 2)
+        }
@@ -0,0 +1,106 @@
+"""
+Outbox local (SQLite) para as gravações no Supabase e os uploads pendentes do storage
+
+Tudo o que vai para o banco passa antes por aqui: a linha só sai da outbox quando o banco
+confirma (ou recusa de vez). Com o Supabase fora do ar os editais extraídos ficam guardados em
+disco e o escritor em lote tenta de novo com backoff; se o processo reiniciar, as entradas que
+sobraram são reenviadas na partida.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from .config import settings
+
+
+class OutboxSQLite:
+    """Entradas (tipo, chave, dados) aguardando confirmação, com tentativas e próxima tentativa"""
+
+    def __init__(self, arquivo=None):
+        arquivo = settings.OUTBOX_FILE if arquivo is None else arquivo
+        self.arquivo = os.path.expanduser(arquivo) if arquivo else ":memory:"
+        if self.arquivo != ":memory:":
+            os.makedirs(os.path.dirname(self.arquivo), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(self.arquivo, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT, tipo TEXT, chave TEXT, dados TEXT,"
+            " existente INTEGER, tentativas INTEGER DEFAULT 0, proxima REAL, criado REAL, erro TEXT)"
+        )
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS outbox_tipo ON outbox (tipo, seq)")
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS outbox_chave ON outbox (tipo, chave)")
+        self._conexao.commit()
+
+    @property
+    def persistente(self):
+        return self.arquivo != ":memory:"
+
+    def adicionar(self, tipo, chave, dados, existente=False):
+        """Guarda a entrada antes de qualquer tentativa; retorna o seq"""
+        agora = time.time()
+        with self._lock:
+            cursor = self._conexao.execute(
+                "INSERT INTO outbox (tipo, chave, dados, existente, proxima, criado) VALUES (?, ?, ?, ?, ?, ?)",
+                (tipo, chave, json.dumps(dados, ensure_ascii=False, default=str), int(bool(existente)), agora, agora)
+            )
+            self._conexao.commit()
+            return cursor.lastrowid
+
+    def carregar(self, tipo):
+        """Entradas que sobraram (de uma execução anterior), mais antigas primeiro"""
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT seq, chave, dados, existente, tentativas, proxima FROM outbox WHERE tipo = ? ORDER BY seq", (tipo,)
+            ).fetchall()
+        return [
+            {"seq": seq, "chave": chave, "dados": json.loads(dados), "existente": bool(existente),
+             "tentativas": tentativas, "proxima": proxima}
+            for seq, chave, dados, existente, tentativas, proxima in linhas
+        ]
+
+    def pendentes(self, tipo, chaves):
+        """Versão ainda não gravada de cada chave: {chave: dados}, as entradas mais novas por cima"""
+        chaves = list(dict.fromkeys(chaves))
+        pendentes = {}
+        with self._lock:
+            for i in range(0, len(chaves), 500):
+                lote = chaves[i:i + 500]
+                linhas = self._conexao.execute(
+                    f"SELECT chave, dados FROM outbox WHERE tipo = ? AND chave IN ({', '.join('?' * len(lote))}) ORDER BY seq",
+                    (tipo, *lote)
+                ).fetchall()
+                for chave, dados in linhas:
+                    pendentes[chave] = {**pendentes.get(chave, {}), **json.loads(dados)}
+        return pendentes
+
+    def confirmar(self, seqs):
+        """Banco confirmou (ou recusou de vez): a entrada sai da outbox"""
+        if not seqs:
+            return
+        with self._lock:
+            self._conexao.executemany("DELETE FROM outbox WHERE seq = ?", [(seq,) for seq in seqs])
+            self._conexao.commit()
+
+    def adiar(self, seqs, erro, proxima):
+        with self._lock:
+            self._conexao.executemany(
+                "UPDATE outbox SET tentativas = tentativas + 1, proxima = ?, erro = ? WHERE seq = ?",
+                [(proxima, str(erro)[:300], seq) for seq in seqs]
+            )
+            self._conexao.commit()
+
+    def status(self):
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT tipo, COUNT(*), MIN(criado), MAX(tentativas) FROM outbox GROUP BY tipo"
+            ).fetchall()
+        agora = time.time()
+        return {
+            tipo: {"pendentes": total, "mais_antiga_s": round(agora - criado, 1), "max_tentativas": tentativas}
+            for tipo, total, criado, tentativas in linhas
+        }
@@ -0,0 +1,146 @@
+"""
+Camada de parsing HTML: monta só as partes da página que o extrator usa
+
+Backends em ordem de preferência: selectolax, lxml e BeautifulSoup (sempre disponível).
+"""
+
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as _SelectolaxParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as _SelectolaxParser
+    except ImportError:
+        _SelectolaxParser = None
+
+try:
+    import lxml.html as _lxml_html
+except ImportError:
+    _lxml_html = None
+
+
+# Conteúdo que nunca interessa ao extrator (removido antes de montar a árvore do detalhe)
+_RE_DESCARTAVEL = re.compile(r"<(script|style|svg|noscript|head)\b.*?</\1\s*>|<!--.*?-->", re.IGNORECASE | re.DOTALL)
+
+_XPATH_BR_ITEM = "//a[contains(concat(' ', normalize-space(@class), ' '), ' br-item ')]"
+_XPATH_ROTULOS = "//strong | //b | //label | //dt"
+
+
+def backends_disponiveis():
+    """Backends instalados, do mais rápido para o mais lento"""
+    backends = []
+    if _SelectolaxParser is not None:
+        backends.append("selectolax")
+    if _lxml_html is not None:
+        backends.append("lxml")
+    backends.append("bs4")
+    return backends
+
+
+def backend_padrao():
+    return backends_disponiveis()[0]
+
+
+class ContainerListagem:
+    """Anchor a.br-item já extraído (mesma interface mínima de bs4.Tag usada pelo extrator)"""
+
+    __slots__ = ("href", "textos")
+
+    def __init__(self, href, textos):
+        self.href = href or ""
+        self.textos = textos
+
+    def get(self, atributo, padrao=None):
+        return self.href if atributo == "href" else padrao
+
+    def get_text(self, separator="", strip=False):
+        return separator.join(self.textos)
+
+
+def _textos(pedacos):
+    """Equivalente ao get_text(strip=True) do bs4: remove pedaços vazios"""
+    return [t for t in (p.strip() for p in pedacos) if t]
+
+
+def extrair_containers_listagem(html, backend=None):
+    """Extrai apenas os anchors a.br-item da página de listagem"""
+    backend = backend or backend_padrao()
+
+    if backend == "selectolax":
+        arvore = _SelectolaxParser(html)
+        return [
+            ContainerListagem(no.attributes.get("href"), _textos(no.text(separator="\x00").split("\x00")))
+            for no in arvore.css("a.br-item")
+        ]
+
+    if backend == "lxml":
+        arvore = _lxml_html.fromstring(html, parser=_lxml_html.HTMLParser(remove_comments=True))
+        return [ContainerListagem(a.get("href"), _textos(a.itertext())) for a in arvore.xpath(_XPATH_BR_ITEM)]
+
+    # bs4: SoupStrainer constrói só os anchors (o resto do DOM é ignorado)
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("a", class_="br-item"))
+    return [
+        ContainerListagem(a.get("href"), _textos(a.strings))
+        for a in soup.find_all("a", class_="br-item")
+    ]
+
+
+def texto_detalhe(html, backend=None):
+    """Texto visível da página de detalhe (sem head/scripts/estilos), separado por espaço"""
+    backend = backend or backend_padrao()
+    html = _RE_DESCARTAVEL.sub(" ", html)
+
+    if backend == "selectolax":
+        corpo = _SelectolaxParser(html).body
+        return " ".join(_textos(corpo.text(separator="\x00").split("\x00"))) if corpo else ""
+
+    if backend == "lxml":
+        return " ".join(_textos(_lxml_html.fromstring(html).itertext()))
+
+    return BeautifulSoup(html, "html.parser").get_text(separator=" ", strip=True)
+
+
+def extrair_blocos_detalhe(html, backend=None):
+    """Pares (rótulo, valor) dos blocos "<strong>Rótulo:</strong> valor" da página de detalhe
+
+    O valor é o texto do elemento pai sem o rótulo. Rótulos repetidos mantêm a primeira ocorrência.
+    """
+    backend = backend or backend_padrao()
+    html = _RE_DESCARTAVEL.sub(" ", html)
+    blocos = []
+
+    if backend == "selectolax":
+        for no in _SelectolaxParser(html).css("strong, b, label, dt"):
+            blocos.append((no.text(), no.parent.text(separator="\x00").split("\x00") if no.parent else []))
+    elif backend == "lxml":
+        for no in _lxml_html.fromstring(html).xpath(_XPATH_ROTULOS):
+            pai = no.getparent()
+            blocos.append(("".join(no.itertext()), list(pai.itertext()) if pai is not None else []))
+    else:
+        soup = BeautifulSoup(html, "html.parser")
+        for no in soup.find_all(["strong", "b", "label", "dt"]):
+            blocos.append((no.get_text(), list(no.parent.strings) if no.parent else []))
+
+    pares = []
+    vistos = set()
+    for rotulo, textos_pai in blocos:
+        rotulo = " ".join(rotulo.split())
+        if not rotulo.endswith(":"):
+            continue
+        rotulo = rotulo[:-1].strip()
+        if not rotulo or rotulo.lower() in vistos:
+            continue
+
+        textos = _textos(textos_pai)
+        # Remove o próprio rótulo do texto do pai
+        for i, texto in enumerate(textos):
+            if " ".join(texto.split()).rstrip(":").strip() == rotulo:
+                textos = textos[i + 1:]
+                break
+
+        vistos.add(rotulo.lower())
+        pares.append((rotulo, " ".join(textos)))
+    return pares
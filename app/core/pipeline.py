@@ -0,0 +1,355 @@
+"""
+Pipeline de extração em estágios ligados por filas limitadas
+
+    descoberta -> verificação -> extração -> anexos -> persistência
+
+Cada estágio tem seus próprios workers (threads de um executor dedicado, já que o trabalho é
+bloqueante: Selenium, requests, Supabase). As filas têm tamanho máximo: um estágio lento segura
+os anteriores (backpressure) e a memória fica limitada. A persistência entrega os editais ao
+escritor em lote do extrator (upsert write-behind) sem esperar o banco; o desfecho de cada linha
+chega depois e a execução só termina quando o buffer é descarregado. Gravações e uploads que
+falham por indisponibilidade ficam na outbox e são refeitos por ela; recursos da API que falharam
+vão para o backlog do extrator e são refeitos na próxima execução.
+"""
+
+import copy
+import time
+import asyncio
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import settings
+from .escritor_lote import ATUALIZADO, FALHOU
+from .filhas import descartar_excedentes
+from .frescor import INALTERADO, hash_conteudo, montar_delta, reaproveitar_uploads
+
+
+_FIM = object()
+
+
+class EstatisticasEstagio:
+    """Itens processados, tempo ocupado e maior fila de entrada de um estágio"""
+
+    def __init__(self, nome, workers):
+        self.nome = nome
+        self.workers = workers
+        self.processados = 0
+        self.descartados = 0
+        self.ocupado = 0.0
+        self.fila_max = 0
+
+    def como_dict(self, duracao):
+        return {
+            "workers": self.workers,
+            "processados": self.processados,
+            "descartados": self.descartados,
+            "ocupado_s": round(self.ocupado, 2),
+            # Fração do tempo total em que os workers do estágio estiveram trabalhando
+            "utilizacao": round(self.ocupado / (duracao * self.workers), 3) if duracao else None,
+            "fila_max": self.fila_max
+        }
+
+
+class ResultadoPipeline:
+    """Editais por desfecho, na ordem em que cada um terminou"""
+
+    def __init__(self):
+        self.encontrados = []
+        self.novos = []
+        self.atualizados = []
+        self.inalterados = []
+        self.pulados = []
+        self.erros = []
+        self.descoberta = None
+        self.backlog = None
+        self.aguardando_banco = []
+        self.tempo_execucao = 0.0
+        self.estagios = {}
+
+    @property
+    def salvos(self):
+        return self.novos + self.atualizados
+
+    def metricas(self):
+        return {nome: estagio.como_dict(self.tempo_execucao) for nome, estagio in self.estagios.items()}
+
+
+def _notificar_nada(evento, id_pncp, **info):
+    pass
+
+
+class PipelineExtracao:
+    """Motor único das execuções de extração (dia, período e com eventos)
+
+    descobrir(ao_encontrar) roda numa thread e chama ao_encontrar(editais) a cada página da
+    listagem; o que ela retornar fica em resultado.descoberta. notificar(evento, id_pncp, **info)
+    recebe: verificando, verificado, inalterado, extraido, salvo e erro.
+
+    reprocessar: entradas "edital" do backlog; depois da listagem seguem pelos mesmos estágios as
+    que ela não trouxe de novo.
+    """
+
+    def __init__(self, extrator, salvar_arquivos=False, notificar=None, tamanho_fila=None,
+                 workers_verificacao=None, workers_extracao=None, workers_anexos=None, workers_persistencia=None,
+                 reprocessar=None):
+        self.extrator = extrator
+        self.salvar_arquivos = salvar_arquivos
+        self.notificar = notificar or _notificar_nada
+        self.reprocessar = reprocessar or []
+        self.tamanho_fila = tamanho_fila or settings.PIPELINE_FILA
+        self.workers = {
+            "verificacao": workers_verificacao or settings.PIPELINE_WORKERS_VERIFICACAO,
+            "extracao": workers_extracao or extrator.tamanho_lote,
+            "anexos": (workers_anexos or settings.PIPELINE_WORKERS_ANEXOS) if salvar_arquivos else 1,
+            "persistencia": workers_persistencia or settings.PIPELINE_WORKERS_PERSISTENCIA
+        }
+
+    async def executar(self, descobrir):
+        resultado = ResultadoPipeline()
+        resultado.estagios = {"descoberta": EstatisticasEstagio("descoberta", 1)}
+        resultado.estagios.update({nome: EstatisticasEstagio(nome, n) for nome, n in self.workers.items()})
+        self._resultado = resultado
+        self._vistos = set()
+        self._datas_listagem = {}
+        self._verificados = 0
+        self._gravacoes = []
+        self._conferidos = {}
+        self._loop = asyncio.get_running_loop()
+
+        filas = {nome: asyncio.Queue(self.tamanho_fila) for nome in self.workers}
+        inicio = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=sum(self.workers.values()) + 1, thread_name_prefix="pipeline") as executor:
+            self._executor = executor
+            await asyncio.gather(
+                self._descobrir(descobrir, filas["verificacao"]),
+                self._estagio("verificacao", filas["verificacao"], filas["extracao"], self._verificar),
+                self._estagio("extracao", filas["extracao"], filas["anexos"], self._extrair),
+                self._estagio("anexos", filas["anexos"], filas["persistencia"], self._anexos),
+                self._estagio("persistencia", filas["persistencia"], None, self._persistir)
+            )
+            # Grava o que sobrou no buffer e espera o desfecho das linhas (até OUTBOX_ESPERA_FIM)
+            drenado = await self._em_thread(self.extrator.escritor.descarregar, settings.OUTBOX_ESPERA_FIM)
+            if self._gravacoes:
+                await asyncio.wait([gravacao for _, gravacao in self._gravacoes], timeout=None if drenado else 1)
+            for id_pncp, gravacao in self._gravacoes:
+                if not gravacao.done():
+                    # Banco fora do ar: a linha segue na outbox e é gravada quando ele voltar
+                    gravacao.cancel()
+                    resultado.aguardando_banco.append(id_pncp)
+            # Editais conferidos sem mudança: só a data de coleta é atualizada (em lote)
+            if self._conferidos:
+                await self._em_thread(self.extrator.marcar_conferidos, self._conferidos)
+
+        resultado.tempo_execucao = time.perf_counter() - inicio
+        return resultado
+
+    async def _em_thread(self, funcao, *args):
+        return await self._loop.run_in_executor(self._executor, funcao, *args)
+
+    async def _descobrir(self, descobrir, saida):
+        """Roda a listagem numa thread; cada página entra na fila assim que é lida"""
+        estatisticas = self._resultado.estagios["descoberta"]
+
+        def ao_encontrar(editais):
+            # A página inteira segue junta: a verificação consulta o banco uma vez por página
+            editais = list(editais)
+            if not editais:
+                return
+            self._resultado.encontrados.extend(editais)
+            estatisticas.processados += len(editais)
+            # Bloqueia a thread da listagem enquanto a fila estiver cheia
+            asyncio.run_coroutine_threadsafe(saida.put(editais), self._loop).result()
+
+        inicio = time.perf_counter()
+        try:
+            self._resultado.descoberta = await self._em_thread(descobrir, ao_encontrar)
+        except Exception as e:
+            self._resultado.erros.append({"id_pncp": None, "erro": f"Descoberta: {e}"})
+            self.notificar("erro", None, etapa="descoberta", erro=str(e))
+        finally:
+            estatisticas.ocupado = time.perf_counter() - inicio
+            pagina = self._pagina_backlog()
+            if pagina:
+                await saida.put(pagina)
+            await saida.put(_FIM)
+
+    def _pagina_backlog(self):
+        """Editais do backlog que a listagem não trouxe, como uma página a mais (com a data da listagem da falha)"""
+        listados = {edital.get("id_pncp") for edital in self._resultado.encontrados}
+        pagina = []
+        for entrada in self.reprocessar:
+            if entrada["id_pncp"] in listados:
+                continue
+            data_listagem = (entrada.get("dados") or {}).get("atualizacao_listagem")
+            pagina.append({
+                "id_pncp": entrada["id_pncp"],
+                "data_atualizacao": datetime.fromisoformat(data_listagem) if data_listagem else None
+            })
+        if pagina:
+            print(f"Backlog: {len(pagina)} editais refeitos pelo pipeline")
+        return pagina
+
+    def _falha_edital(self, id_pncp, erro):
+        """Edital inteiro para o backlog, com a data da listagem (gravada quando ele for refeito)"""
+        data_listagem = self._datas_listagem.get(id_pncp)
+        dados = {"atualizacao_listagem": data_listagem.isoformat()} if data_listagem else None
+        self.extrator.backlog.registrar(id_pncp, "edital", erro, dados)
+
+    async def _estagio(self, nome, entrada, saida, funcao):
+        """Workers do estágio consomem a entrada; o que funcao devolver (não None) segue adiante
+
+        Uma lista devolvida segue item a item.
+        """
+        estatisticas = self._resultado.estagios[nome]
+
+        async def worker():
+            while True:
+                item = await entrada.get()
+                if item is _FIM:
+                    # Repassa o fim para os outros workers do mesmo estágio
+                    await entrada.put(_FIM)
+                    return
+                estatisticas.fila_max = max(estatisticas.fila_max, entrada.qsize() + 1)
+                inicio = time.perf_counter()
+                try:
+                    proximo = await funcao(item)
+                except Exception as e:
+                    proximo = None
+                    id_pncp = item[0] if isinstance(item, tuple) else item.get("id_pncp") if isinstance(item, dict) else None
+                    self._resultado.erros.append({"id_pncp": id_pncp, "erro": str(e)})
+                    self.notificar("erro", id_pncp, etapa=nome, erro=str(e))
+                    if id_pncp:
+                        self._falha_edital(id_pncp, e)
+                estatisticas.ocupado += time.perf_counter() - inicio
+                estatisticas.processados += 1
+                if proximo is None or proximo == []:
+                    estatisticas.descartados += 1
+                elif saida is not None:
+                    for item_saida in (proximo if isinstance(proximo, list) else [proximo]):
+                        await saida.put(item_saida)
+
+        await asyncio.gather(*(worker() for _ in range(self.workers[nome])))
+        if saida is not None:
+            await saida.put(_FIM)
+
+    # === Estágios ===
+
+    async def _verificar(self, pagina):
+        """Uma página da listagem: uma consulta ao banco para todos os editais dela"""
+        datas_listagem = {}
+        for edital_basico in pagina:
+            id_pncp = edital_basico.get("id_pncp")
+            if id_pncp and id_pncp not in self._vistos:
+                self._vistos.add(id_pncp)
+                datas_listagem[id_pncp] = edital_basico.get("data_atualizacao")
+        ids = list(datas_listagem)
+        if not ids:
+            return None
+        self._datas_listagem.update(datas_listagem)
+
+        try:
+            existentes = await self._em_thread(self.extrator.verificar_existentes, ids, datas_listagem)
+        except Exception as e:
+            # Banco fora do ar: sem a linha gravada não há o que comparar, então a página é extraída
+            # inteira; o upsert por id_pncp não duplica e, se o banco seguir fora, as linhas esperam na outbox
+            print(f"Verificacao indisponivel ({e}): {len(ids)} editais seguem sem comparar com o banco")
+            existentes = self.extrator.considerar_outbox(ids, datas_listagem)
+
+        pendentes = []
+        for id_pncp in ids:
+            edital_existente, motivo = existentes[id_pncp]
+            self._verificados += 1
+            self.notificar("verificando", id_pncp, atual=self._verificados, total=len(self._resultado.encontrados))
+            self.notificar("verificado", id_pncp, motivo=motivo, existente=edital_existente)
+            self.extrator.metricas_frescor.registrar_motivo(motivo)
+            if motivo == INALTERADO:
+                # Mesma data de atualização da última coleta: nem busca (o gravado já está em dia)
+                self._resultado.pulados.append(id_pncp)
+                self.extrator.backlog.resolver(id_pncp, "edital")
+            else:
+                pendentes.append((id_pncp, edital_existente, datas_listagem[id_pncp]))
+        return pendentes
+
+    async def _extrair(self, pendente):
+        id_pncp, edital_existente, data_listagem = pendente
+        # Os arquivos têm estágio próprio: a extração não espera downloads/uploads
+        dados = await self._em_thread(self.extrator.extrair_edital, id_pncp, False)
+        if not dados:
+            self._resultado.erros.append({"id_pncp": id_pncp, "erro": "Falha na extração de dados"})
+            self.notificar("erro", id_pncp, etapa="extracao", erro="Falha na extração de dados")
+            self._falha_edital(id_pncp, "Falha na extração de dados")
+            return None
+
+        if data_listagem:
+            dados["atualizacao_listagem"] = data_listagem.isoformat()
+
+        if edital_existente:
+            frescor = self.extrator.metricas_frescor
+            if self.extrator.edital_inalterado(dados, edital_existente):
+                # APIs responderam 304 e a página não mudou: nada mudou desde a última coleta
+                frescor.registrar_nao_modificado()
+                return self._inalterado(id_pncp, data_listagem, dados)
+            # Hash de antes dos uploads (o estágio de anexos muda os dicts dos anexos)
+            igual = edital_existente.get("hash_conteudo") == (dados.get("hash_conteudo") or hash_conteudo(dados))
+            frescor.registrar_hash(igual)
+            if igual:
+                # Mesmo conteúdo da última gravação: não regrava
+                return self._inalterado(id_pncp, data_listagem, dados)
+            if edital_existente.get("pendente"):
+                # A versão anterior ainda está na outbox: a linha inteira segue e toma o lugar dela
+                self.notificar("extraido", id_pncp)
+                return id_pncp, edital_existente, dados
+            # Mudou: a atualização leva só os grupos de colunas alterados
+            completo = dados
+            dados, alterados = montar_delta(dados, edital_existente)
+            frescor.registrar_grupos(alterados)
+            if "itens" not in alterados:
+                # Itens iguais: o arquivo de excedentes não será gravado
+                descartar_excedentes(completo)
+
+        self.notificar("extraido", id_pncp)
+        return id_pncp, edital_existente, dados
+
+    def _inalterado(self, id_pncp, data_listagem, dados=None):
+        if dados:
+            descartar_excedentes(dados)
+        self._resultado.inalterados.append(id_pncp)
+        self._conferidos[id_pncp] = data_listagem
+        self.notificar("inalterado", id_pncp)
+        return None
+
+    async def _anexos(self, extraido):
+        id_pncp, edital_existente, dados = extraido
+        if self.salvar_arquivos and dados.get("anexos"):
+            # Anexos já enviados pela versão que está na outbox não são baixados de novo
+            reaproveitar_uploads(dados["anexos"], (edital_existente or {}).get("anexos"))
+            await self._em_thread(self.extrator.processar_anexos, dados["anexos"], id_pncp)
+        return extraido
+
+    async def _persistir(self, extraido):
+        id_pncp, edital_existente, dados = extraido
+        futuro = self.extrator.escritor.enviar(dados, existente=bool(edital_existente))
+        if self.salvar_arquivos and any(not anexo.get("upload_sucesso") for anexo in dados.get("anexos") or []):
+            # Uploads que faltaram ficam na outbox e são refeitos em segundo plano; enviados depois do
+            # edital, os anexos corrigidos chegam ao escritor atrás da gravação dele
+            self.extrator.envios_storage.enviar({"id_pncp": id_pncp, "arquivos": copy.deepcopy(dados["anexos"])})
+        gravacao = asyncio.wrap_future(futuro)
+        gravacao.add_done_callback(lambda f: f.cancelled() or self._gravado(dados, f.result()))
+        self._gravacoes.append((id_pncp, gravacao))
+        return id_pncp
+
+    def _gravado(self, dados, gravacao):
+        """Desfecho de uma linha do escritor em lote (roda no event loop)"""
+        id_pncp = dados["id_pncp"]
+        if gravacao["desfecho"] == FALHOU:
+            erro = f"Falha ao salvar no Supabase: {gravacao['erro']}"
+            self._resultado.erros.append({"id_pncp": id_pncp, "erro": erro})
+            self.notificar("erro", id_pncp, etapa="persistencia", erro=erro)
+            # Falhas transitórias já são refeitas pela outbox: esta foi recusada de vez (ou esgotou as tentativas)
+            return
+
+        atualizado = gravacao["desfecho"] == ATUALIZADO
+        (self._resultado.atualizados if atualizado else self._resultado.novos).append(id_pncp)
+        self.notificar("salvo", id_pncp, supabase_id=gravacao["id"], atualizado=atualizado)
+        self.extrator.registrar_pendencias(dados)
@@ -0,0 +1,182 @@
+"""
+Pool limitado de instâncias Chrome (WebDriver) para páginas concorrentes
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from selenium.common.exceptions import WebDriverException
+
+
+class PoolDrivers:
+    """Mantém até N navegadores, verifica a saúde e substitui os que quebram"""
+
+    def __init__(self, fabrica, tamanho=1, reciclar=None):
+        self.fabrica = fabrica
+        self.reciclar = reciclar
+        self.tamanho = max(1, int(tamanho))
+        self._livres = queue.LifoQueue()
+        self._todos = set()
+        self._lock = threading.Lock()
+        self.criados = 0
+        self.substituidos = 0
+        self.reciclados = 0
+
+    def adquirir(self, timeout=None):
+        """Retira um navegador saudável do pool (cria sob demanda até o limite)"""
+        while True:
+            try:
+                driver = self._livres.get_nowait()
+            except queue.Empty:
+                driver = self._criar_se_houver_vaga()
+                if driver is None:
+                    try:
+                        driver = self._livres.get(timeout=timeout)
+                    except queue.Empty:
+                        raise TimeoutError("Nenhum navegador livre no pool")
+
+            if self.saudavel(driver):
+                return driver
+
+            print("Navegador do pool nao responde - substituindo")
+            self._descartar(driver)
+            self.substituidos += 1
+
+    def devolver(self, driver, quebrado=False):
+        """Devolve o navegador ao pool (ou descarta se quebrou)"""
+        with self._lock:
+            conhecido = driver in self._todos
+        if not conhecido:
+            # Pool foi fechado enquanto o navegador estava emprestado
+            self._descartar(driver)
+            return
+        if quebrado or not self.saudavel(driver):
+            self._descartar(driver)
+            self.substituidos += 1
+            return
+        if self.reciclar and self.reciclar(driver):
+            self._descartar(driver)
+            self.reciclados += 1
+            return
+        self._livres.put(driver)
+
+    @contextmanager
+    def usar(self, timeout=None):
+        """Empresta um navegador durante o bloco with"""
+        driver = self.adquirir(timeout)
+        quebrado = False
+        try:
+            yield driver
+        except WebDriverException:
+            quebrado = True
+            raise
+        finally:
+            self.devolver(driver, quebrado)
+
+    def mapear(self, funcao, itens):
+        """Executa funcao(driver, item) em paralelo e devolve os resultados na ordem dos itens
+
+        Exceções de cada item são devolvidas no lugar do resultado.
+        """
+        itens = list(itens)
+        if not itens:
+            return []
+
+        def tarefa(item):
+            try:
+                with self.usar() as driver:
+                    return funcao(driver, item)
+            except Exception as e:
+                return e
+
+        if self.tamanho == 1 or len(itens) == 1:
+            return [tarefa(item) for item in itens]
+
+        with ThreadPoolExecutor(max_workers=min(self.tamanho, len(itens))) as executor:
+            return list(executor.map(tarefa, itens))
+
+    def verificar_saude(self):
+        """Remove do pool os navegadores livres que não respondem"""
+        saudaveis = []
+        removidos = 0
+        while True:
+            try:
+                driver = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            if self.saudavel(driver):
+                saudaveis.append(driver)
+            else:
+                self._descartar(driver)
+                removidos += 1
+        for driver in saudaveis:
+            self._livres.put(driver)
+        self.substituidos += removidos
+        return removidos
+
+    def fechar(self):
+        """Encerra todos os navegadores do pool"""
+        with self._lock:
+            drivers = [d for d in self._todos if hasattr(d, "quit")]
+            self._todos.clear()
+        while True:
+            try:
+                self._livres.get_nowait()
+            except queue.Empty:
+                break
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                print(f" Erro ao fechar driver do pool: {e}")
+
+    def status(self):
+        with self._lock:
+            ativos = len(self._todos)
+        return {
+            "tamanho": self.tamanho,
+            "ativos": ativos,
+            "livres": self._livres.qsize(),
+            "criados": self.criados,
+            "substituidos": self.substituidos,
+            "reciclados": self.reciclados
+        }
+
+    @staticmethod
+    def saudavel(driver):
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _criar_se_houver_vaga(self):
+        with self._lock:
+            if len(self._todos) >= self.tamanho:
+                return None
+            # Reserva a vaga antes de criar (criação do Chrome é lenta)
+            marcador = object()
+            self._todos.add(marcador)
+
+        driver = None
+        try:
+            driver = self.fabrica()
+        finally:
+            with self._lock:
+                self._todos.discard(marcador)
+                if driver is not None:
+                    self._todos.add(driver)
+                    self.criados += 1
+
+        if driver is None:
+            raise WebDriverException("Nao foi possivel iniciar o navegador")
+        return driver
+
+    def _descartar(self, driver):
+        with self._lock:
+            self._todos.discard(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
@@ -0,0 +1,142 @@
+"""
+Detecção de prontidão de páginas no Selenium (substitui pausas fixas)
+"""
+
+import time
+import threading
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from .config import settings
+
+
+# Listagem pronta: containers renderizados ou mensagem de lista vazia
+JS_LISTAGEM_PRONTA = """
+if (document.readyState !== 'complete') { return -1; }
+var itens = document.querySelectorAll('a.br-item').length;
+if (itens > 0) { return itens; }
+var texto = document.body ? document.body.innerText : '';
+return /Nenhum (resultado|registro|edital)/i.test(texto) ? 0 : -1;
+"""
+
+# Detalhe pronto: rótulos principais do edital já estão no DOM
+JS_DETALHE_PRONTO = """
+if (document.readyState !== 'complete') { return false; }
+var texto = document.body ? document.body.innerText : '';
+return /Id contrata[çc][ãa]o PNCP/i.test(texto) || /Data de divulga[çc][ãa]o no PNCP/i.test(texto);
+"""
+
+# Rede ociosa: nenhum recurso novo carregado desde a última verificação
+JS_TOTAL_RECURSOS = """
+return document.readyState === 'complete' ? performance.getEntriesByType('resource').length : -1;
+"""
+
+
+class MetricasProntidao:
+    """Acumula o tempo até a página ficar pronta, por tipo de página"""
+
+    def __init__(self, max_amostras=5000):
+        self.max_amostras = max_amostras
+        self._amostras = {}
+        self._timeouts = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, tipo, segundos, pronto=True):
+        with self._lock:
+            amostras = self._amostras.setdefault(tipo, [])
+            amostras.append(segundos)
+            if len(amostras) > self.max_amostras:
+                del amostras[:len(amostras) - self.max_amostras]
+            if not pronto:
+                self._timeouts[tipo] = self._timeouts.get(tipo, 0) + 1
+
+    def resumo(self):
+        """Distribuição de latência (segundos) por tipo de página"""
+        with self._lock:
+            resultado = {}
+            for tipo, amostras in self._amostras.items():
+                ordenadas = sorted(amostras)
+                resultado[tipo] = {
+                    "paginas": len(ordenadas),
+                    "timeouts": self._timeouts.get(tipo, 0),
+                    "media": round(sum(ordenadas) / len(ordenadas), 3),
+                    "p50": round(self._percentil(ordenadas, 50), 3),
+                    "p90": round(self._percentil(ordenadas, 90), 3),
+                    "p99": round(self._percentil(ordenadas, 99), 3),
+                    "max": round(ordenadas[-1], 3)
+                }
+            return resultado
+
+    def limpar(self):
+        with self._lock:
+            self._amostras.clear()
+            self._timeouts.clear()
+
+    @staticmethod
+    def _percentil(ordenadas, p):
+        indice = min(len(ordenadas) - 1, max(0, int(round(p / 100 * (len(ordenadas) - 1)))))
+        return ordenadas[indice]
+
+
+class _RedeOciosa:
+    """Condição: contagem de recursos estável por uma janela de tempo"""
+
+    def __init__(self, janela):
+        self.janela = janela
+        self._ultimo_total = None
+        self._desde = None
+
+    def __call__(self, driver):
+        total = driver.execute_script(JS_TOTAL_RECURSOS)
+        agora = time.monotonic()
+        if total is None or total < 0 or total != self._ultimo_total:
+            self._ultimo_total = total
+            self._desde = agora
+            return False
+        return agora - self._desde >= self.janela
+
+
+class _ListagemEstavel:
+    """Condição: containers presentes e quantidade estável entre duas verificações"""
+
+    def __init__(self):
+        self._anterior = None
+
+    def __call__(self, driver):
+        total = driver.execute_script(JS_LISTAGEM_PRONTA)
+        if total is None or total < 0:
+            self._anterior = None
+            return False
+        estavel = total == self._anterior
+        self._anterior = total
+        return estavel
+
+
+def aguardar_pagina(driver, tipo, metricas=None, timeout=None, modo=None):
+    """Aguarda a página ficar pronta e devolve True (pronta) ou False (atingiu o teto)"""
+    timeout = timeout if timeout is not None else settings.SELENIUM_READY_TIMEOUT
+    modo = (modo or settings.SELENIUM_READY_MODE).lower()
+
+    if modo == "rede":
+        condicao = _RedeOciosa(settings.SELENIUM_READY_IDLE)
+    elif tipo == "listagem":
+        condicao = _ListagemEstavel()
+    else:
+        condicao = lambda d: bool(d.execute_script(JS_DETALHE_PRONTO))
+
+    inicio = time.monotonic()
+    pronto = True
+    try:
+        WebDriverWait(
+            driver, timeout,
+            poll_frequency=settings.SELENIUM_READY_POLL,
+            ignored_exceptions=(WebDriverException,)
+        ).until(condicao)
+    except TimeoutException:
+        pronto = False
+        print(f"Pagina ({tipo}) nao ficou pronta em {timeout}s - seguindo com o conteudo atual")
+
+    if metricas is not None:
+        metricas.registrar(tipo, time.monotonic() - inicio, pronto)
+    return pronto
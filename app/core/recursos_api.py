@@ -0,0 +1,179 @@
+"""
+Consulta concorrente das APIs de um edital (itens, histórico, arquivos e órgão)
+
+As quatro chamadas são independentes: disparadas juntas num pool de threads compartilhado,
+o tempo por edital cai para o da chamada mais lenta. Erros e timeouts ficam por endpoint, e cada
+endpoint tem seu disjuntor: com ele aberto a chamada falha na hora, sem esperar o timeout.
+"""
+
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+
+from .config import settings
+from .itens_api import ResumoItens, ler_itens
+
+
+RECURSOS = ("itens", "historico", "arquivos", "orgao")
+
+# Com o registro da compra (extração em camadas)
+RECURSOS_COMPRA = ("compra",) + RECURSOS
+
+# Valor usado quando o endpoint falha
+VAZIOS = {"compra": dict, "itens": list, "historico": list, "arquivos": list, "orgao": dict}
+
+
+def inalterado(recursos):
+    """Todos os recursos do edital (exceto órgão) responderam 304 e nenhum falhou"""
+    buscados = [r for r in recursos["tempos"] if r != "orgao"]
+    return bool(buscados) and not recursos["erros"] and set(buscados) <= set(recursos["nao_modificados"])
+
+
+class ConsultaRecursos:
+    """Chamadas em andamento de um edital; resultado() espera todas"""
+
+    def __init__(self, futuros, inicio):
+        self.futuros = futuros
+        self.inicio = inicio
+
+    def resultado(self):
+        """Dict com os dados de cada recurso, mais "erros", "tempos" e "nao_modificados" (304)"""
+        dados = {"erros": {}, "tempos": {}, "nao_modificados": []}
+        for recurso, futuro in self.futuros.items():
+            valor, erro, segundos, nao_modificado = futuro.result()
+            if nao_modificado:
+                dados["nao_modificados"].append(recurso)
+            if isinstance(valor, ResumoItens):
+                # Itens: lista limitada + totais calculados sobre todas as páginas
+                dados["resumo_itens"] = valor.como_dict()
+                valor = valor.itens
+            dados[recurso] = valor
+            dados["tempos"][recurso] = round(segundos, 3)
+            if erro:
+                dados["erros"][recurso] = erro
+        dados["tempo_total"] = round(time.perf_counter() - self.inicio, 3)
+        return dados
+
+
+class ClienteRecursos:
+    """Dispara as APIs de um edital em paralelo usando a session do extrator"""
+
+    _executor = None
+    _lock = threading.Lock()
+
+    def __init__(self, session, api_url=None, timeout=15, cache_orgaos=None, disjuntores=None):
+        self.session = session
+        self.api_url = api_url or settings.PNCP_API_URL
+        self.timeout = timeout
+        self.cache_orgaos = cache_orgaos
+        self.disjuntores = disjuntores
+        # CNPJ -> chamada de órgão em andamento (editais do mesmo órgão em paralelo esperam a mesma)
+        self._orgaos_em_andamento = {}
+        self._lock_orgaos = threading.Lock()
+
+    @classmethod
+    def executor(cls):
+        """Pool de threads compartilhado por todos os extratores do processo"""
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=settings.PNCP_API_WORKERS,
+                    thread_name_prefix="pncp-api"
+                )
+            return cls._executor
+
+    def urls(self, cnpj, ano, numero):
+        base_url = f"{self.api_url}/orgaos/{cnpj}/compras/{ano}/{numero}"
+        return {
+            "compra": base_url,
+            "itens": f"{base_url}/itens",
+            "historico": f"{base_url}/historico",
+            "arquivos": f"{base_url}/arquivos",
+            "orgao": f"{self.api_url}/orgaos/{cnpj}"
+        }
+
+    def iniciar(self, cnpj, ano, numero, recursos=RECURSOS, timeout=None):
+        """Dispara as chamadas e retorna sem esperar (o chamador pode fazer outro trabalho)"""
+        urls = self.urls(cnpj, ano, numero)
+        timeout = timeout or self.timeout
+        executor = self.executor()
+        futuros = {}
+        for recurso in recursos:
+            if recurso == "orgao":
+                futuros[recurso] = self._futuro_orgao(cnpj, urls[recurso], timeout)
+            elif recurso == "itens":
+                futuros[recurso] = executor.submit(self._buscar_itens, urls[recurso], timeout)
+            else:
+                futuros[recurso] = executor.submit(self._buscar, recurso, urls[recurso], timeout)
+        return ConsultaRecursos(futuros, time.perf_counter())
+
+    def buscar(self, cnpj, ano, numero, recursos=RECURSOS, timeout=None):
+        """Busca os recursos e espera todos"""
+        return self.iniciar(cnpj, ano, numero, recursos, timeout).resultado()
+
+    def _futuro_orgao(self, cnpj, url, timeout):
+        """Órgão do cache quando possível; senão uma única chamada por CNPJ"""
+        if self.cache_orgaos is None:
+            return self.executor().submit(self._buscar, "orgao", url, timeout)
+
+        dados = self.cache_orgaos.obter(cnpj)
+        if dados is not None:
+            futuro = Future()
+            futuro.set_result((dados, None, 0.0, False))
+            return futuro
+
+        with self._lock_orgaos:
+            futuro = self._orgaos_em_andamento.get(cnpj)
+            if futuro is None:
+                futuro = self.executor().submit(self._buscar_orgao, cnpj, url, timeout)
+                self._orgaos_em_andamento[cnpj] = futuro
+            return futuro
+
+    def _buscar_orgao(self, cnpj, url, timeout):
+        try:
+            dados, erro, segundos, nao_modificado = self._buscar("orgao", url, timeout)
+            if not erro:
+                self.cache_orgaos.guardar(cnpj, dados)
+            return dados, erro, segundos, nao_modificado
+        finally:
+            with self._lock_orgaos:
+                self._orgaos_em_andamento.pop(cnpj, None)
+
+    def _disjuntor(self, recurso):
+        """Disjuntor do endpoint, ou None se a chamada pode seguir sem ele"""
+        return self.disjuntores.obter(recurso) if self.disjuntores is not None else None
+
+    def _buscar_itens(self, url, timeout):
+        disjuntor = self._disjuntor("itens")
+        if disjuntor and not disjuntor.permitir():
+            return ResumoItens(), "circuito aberto (itens)", 0.0, False
+        inicio = time.perf_counter()
+        resumo, erro = ler_itens(self.session, url, timeout)
+        if disjuntor:
+            disjuntor.registrar(erro)
+        return resumo, erro, time.perf_counter() - inicio, resumo.nao_modificado and not erro
+
+    def _buscar(self, recurso, url, timeout):
+        """Retorna (dados, erro, segundos, nao_modificado); nunca levanta exceção"""
+        disjuntor = self._disjuntor(recurso)
+        if disjuntor and not disjuntor.permitir():
+            return VAZIOS[recurso](), f"circuito aberto ({recurso})", 0.0, False
+        dados, erro, segundos, nao_modificado = self._chamar(recurso, url, timeout)
+        if disjuntor:
+            disjuntor.registrar(erro)
+        return dados, erro, segundos, nao_modificado
+
+    def _chamar(self, recurso, url, timeout):
+        inicio = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=timeout)
+            if response.status_code == 200:
+                return response.json(), None, time.perf_counter() - inicio, getattr(response, "nao_modificado", False)
+            erro = f"status {response.status_code}"
+        except requests.Timeout:
+            erro = "timeout"
+        except Exception as e:
+            erro = str(e) or e.__class__.__name__
+        return VAZIOS[recurso](), erro, time.perf_counter() - inicio, False
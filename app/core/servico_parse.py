@@ -0,0 +1,100 @@
+"""
+Parse das páginas (listagem e detalhe) em processos separados
+
+BeautifulSoup/lxml e a extração dos campos são CPU puro: em threads disputam o GIL com o event
+loop do FastAPI e com as demais threads da extração. O serviço recebe o page_source cru e devolve
+os dicionários já extraídos, usando um ProcessPoolExecutor (PARSE_WORKERS=0 faz tudo na thread).
+"""
+
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .config import settings
+from .parsers import extrair_containers_listagem
+from .campos_detalhe import extrair_campos_detalhe
+from .campos_listagem import dados_do_container
+
+
+def editais_da_listagem(html, base_url=""):
+    """Dados básicos de cada a.br-item da página de listagem (executado no processo de parse)"""
+    editais = []
+    for container in extrair_containers_listagem(html):
+        try:
+            dados = dados_do_container(container, base_url)
+            if dados:
+                editais.append(dados)
+        except Exception as e:
+            print(f"Erro ao processar container: {e}")
+    return editais
+
+
+class ServicoParse:
+    """Pool de processos para o parse de HTML, criado na primeira página"""
+
+    def __init__(self, workers=None):
+        self.workers = settings.PARSE_WORKERS if workers is None else workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._lock_metricas = threading.Lock()
+        self.limpar()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: o processo principal tem threads (Selenium, requests) e fork com threads é inseguro
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def executar(self, funcao, html, *args):
+        """funcao(html, *args) num processo de parse (ou na thread, sem workers/pool quebrado)"""
+        inicio = time.perf_counter()
+        remoto = bool(self.workers)
+        if remoto:
+            try:
+                resultado = self._pool().submit(funcao, html, *args).result()
+            except BrokenProcessPool:
+                # Processo morto (OOM, kill): recria o pool na próxima chamada e resolve esta aqui
+                print("Pool de parse quebrado - recriando")
+                self._descartar_pool()
+                remoto = False
+        if not remoto:
+            resultado = funcao(html, *args)
+
+        with self._lock_metricas:
+            self.metricas["paginas"] += 1
+            self.metricas["em_processo" if remoto else "na_thread"] += 1
+            self.metricas["bytes"] += len(html)
+            self.metricas["segundos"] += time.perf_counter() - inicio
+        return resultado
+
+    def campos_detalhe(self, html):
+        return self.executar(extrair_campos_detalhe, html)
+
+    def editais_listagem(self, html):
+        return self.executar(editais_da_listagem, html, settings.PNCP_BASE_URL)
+
+    def _descartar_pool(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def fechar(self):
+        self._descartar_pool()
+
+    def limpar(self):
+        with self._lock_metricas:
+            self.metricas = {"paginas": 0, "em_processo": 0, "na_thread": 0, "bytes": 0, "segundos": 0.0}
+
+    def resumo(self):
+        with self._lock_metricas:
+            m = dict(self.metricas)
+        m["workers"] = self.workers
+        m["media_ms"] = round(1000 * m["segundos"] / m["paginas"], 2) if m["paginas"] else None
+        m["segundos"] = round(m["segundos"], 2)
+        return m
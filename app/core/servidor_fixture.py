@@ -0,0 +1,371 @@
+"""
+Servidor local que imita as APIs do PNCP para testes offline
+
+Uso:
+    python -m app.core.servidor_fixture --editais 5000
+
+Depois aponte PNCP_SEARCH_URL / PNCP_API_URL (e PNCP_BASE_URL, para o Selenium)
+para as URLs impressas.
+"""
+
+import json
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+MODALIDADES = ["Pregão - Eletrônico", "Dispensa", "Concorrência - Eletrônica", "Inexigibilidade"]
+UFS = [("São Paulo", "SP"), ("Curitiba", "PR"), ("Recife", "PE"), ("Belo Horizonte", "MG")]
+
+
+def gerar_editais(total, editais_por_dia=300, referencia=None):
+    """Gera editais sintéticos ordenados do mais recente para o mais antigo"""
+    referencia = referencia or datetime.now().replace(microsecond=0)
+    editais = []
+    for i in range(total):
+        data = referencia - timedelta(days=i // editais_por_dia, seconds=i % editais_por_dia)
+        # Poucos órgãos compradores publicam muitos editais (como no PNCP real)
+        cnpj = f"{10000000000000 + (i % 250):014d}"
+        municipio, uf = UFS[i % len(UFS)]
+        editais.append({
+            "item_url": f"/compras/{cnpj}/{data.year}/{i + 1}",
+            "title": f"Edital nº {i + 1}/{data.year}",
+            "description": f"Aquisição de material de consumo - lote {i + 1}",
+            "orgao_cnpj": cnpj,
+            "orgao_nome": f"MUNICIPIO FIXTURE {i % 250}",
+            "municipio_nome": municipio,
+            "uf": uf,
+            "ano": str(data.year),
+            "numero_sequencial": str(i + 1),
+            "modalidade_licitacao_nome": MODALIDADES[i % len(MODALIDADES)],
+            "data_publicacao_pncp": data.isoformat(),
+            "data_atualizacao_pncp": data.isoformat()
+        })
+    return editais
+
+
+_CABECALHO_HTML = """<!DOCTYPE html><html lang="pt-br"><head><meta charset="utf-8"><title>Portal Nacional de Contratações Públicas</title>
+<link rel="stylesheet" href="/styles.css"><script src="/runtime.js" type="module"></script><script src="/main.js" type="module"></script>
+<style>.br-item{display:block}</style></head><body><app-root ng-version="16.2.0"><!----><header class="br-header"><nav class="br-menu">
+<a href="/app/editais">Editais</a><a href="/app/atas">Atas</a><a href="/app/contratos">Contratos</a></nav></header><main id="main">"""
+
+_RODAPE_HTML = """</main><footer class="br-footer"><p>Portal Nacional de Contratações Públicas</p></footer></app-root>
+<script>window.__config = {"api": "/api/pncp"};</script></body></html>"""
+
+
+def gerar_html_listagem(editais):
+    """Página /app/editais com um a.br-item por edital (mesma estrutura do SPA)"""
+    itens = []
+    for edital in editais:
+        cnpj, ano, seq = edital["item_url"].split("/compras/")[-1].split("/")
+        data = datetime.fromisoformat(edital["data_atualizacao_pncp"]).strftime("%d/%m/%Y")
+        itens.append(f"""<a class="br-item" href="/app/editais/{cnpj}/{ano}/{seq}" role="listitem"><!---->
+<div class="row align-items-center"><div class="col-sm-12 col-md-8">
+<div class="title"><strong>{edital['title']}</strong></div>
+<div><strong>Id contratação PNCP: </strong><span>{cnpj}-1-{int(seq):06d}/{ano}</span></div>
+<div><strong>Modalidade da Contratação: </strong><span>{edital['modalidade_licitacao_nome']}</span></div>
+<div><strong>Última Atualização: </strong><span>{data}</span></div>
+<div><strong>Órgão: </strong><span>{edital['orgao_nome']}</span></div>
+<div><strong>Local: </strong><span>{edital['municipio_nome']}/{edital['uf']}</span></div>
+<div><strong>Objeto: </strong><span>{edital['description']}</span></div>
+</div><div class="col-sm-12 col-md-4 text-right"><span class="br-tag">Divulgada no PNCP</span></div></div></a>""")
+    return (_CABECALHO_HTML + '<div class="br-list" role="list">' + "".join(itens)
+            + '</div><nav class="br-pagination"><span>Página 1</span></nav>' + _RODAPE_HTML)
+
+
+def gerar_html_detalhe(edital, itens=50):
+    """Página /app/editais/{id} com os blocos rótulo/valor e a tabela de itens da tela de detalhe"""
+    cnpj, ano, seq = edital["item_url"].split("/compras/")[-1].split("/")
+    data = datetime.fromisoformat(edital["data_atualizacao_pncp"])
+    campos = [
+        ("Id contratação PNCP", f"{cnpj}-1-{int(seq):06d}/{ano}"),
+        ("Fonte", "Compras.gov.br"),
+        ("Data de divulgação no PNCP", data.strftime("%d/%m/%Y")),
+        ("Situação", "Divulgada no PNCP"),
+        ("Última atualização", data.strftime("%d/%m/%Y")),
+        ("Local", f"{edital['municipio_nome']}/{edital['uf']}"),
+        ("Órgão", edital["orgao_nome"]),
+        ("Unidade compradora", "SECRETARIA MUNICIPAL DE ADMINISTRAÇÃO"),
+        ("Modalidade da contratação", edital["modalidade_licitacao_nome"]),
+        ("Amparo legal", "Lei 14.133/2021, Art. 28, I"),
+        ("Tipo", "Edital"),
+        ("Modo de disputa", "Aberto"),
+        ("Registro de preço", "Sim"),
+        ("Fonte orçamentária", "Não se aplica"),
+        ("Data de início de recebimento de propostas", (data + timedelta(days=1)).strftime("%d/%m/%Y 08:00")),
+        ("Data fim de recebimento de propostas", (data + timedelta(days=10)).strftime("%d/%m/%Y 09:00")),
+        ("Objeto", edital["description"]),
+    ]
+    blocos = "".join(
+        f'<div class="col-sm-12 col-md-4"><p><strong>{rotulo}:</strong> <span>{valor}</span></p></div><!---->'
+        for rotulo, valor in campos
+    )
+    linhas = "".join(
+        f'<tr class="ng-star-inserted"><td>{i}</td><td>Item {i} - material de consumo conforme termo de referência</td>'
+        f'<td>10</td><td>R$ 2,50</td><td>R$ 25,00</td><td><button class="br-button circle" title="Detalhar">'
+        f'<i class="fas fa-eye"></i></button></td></tr><!---->'
+        for i in range(1, itens + 1)
+    )
+    return (_CABECALHO_HTML + f'<div class="container"><h1>{edital["title"]}</h1><div class="row">{blocos}</div>'
+            + '<div class="br-tab"><button>Itens</button><button>Arquivos</button><button>Histórico</button></div>'
+            + '<table class="br-table"><thead><tr><th>Número</th><th>Descrição</th><th>Quantidade</th>'
+            + f'<th>Valor unitário estimado</th><th>Valor total estimado</th><th></th></tr></thead><tbody>{linhas}</tbody></table>'
+            + "</div>" + _RODAPE_HTML)
+
+
+class _HandlerFixture(BaseHTTPRequestHandler):
+    """Responde às rotas de busca e consulta do PNCP"""
+
+    server_version = "PNCPFixture/1.0"
+    protocol_version = "HTTP/1.1"  # keep-alive, como o servidor real
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.server.total_requisicoes += 1
+
+        if url.path.rstrip("/") == "/api/search":
+            return self._responder(200, self._busca(params))
+
+        if url.path.rstrip("/") == "/app/editais":
+            busca = self._busca({"pagina": params.get("pagina", 1), "tam_pagina": params.get("tam_pagina", 10)})
+            return self._responder_html(gerar_html_listagem(busca["items"]))
+
+        partes = [p for p in url.path.split("/") if p]
+        # /app/editais/{cnpj}/{ano}/{seq}
+        if partes[:2] == ["app", "editais"] and len(partes) == 5:
+            edital = self.server.por_id.get("/".join(partes[2:]))
+            if edital:
+                return self._responder_html(gerar_html_detalhe(edital))
+            return self._responder(404, {"message": "not found"})
+
+        # /api/pncp/v1/orgaos/{cnpj}[/compras/{ano}/{seq}[/recurso]]
+        if partes[:4] == ["api", "pncp", "v1", "orgaos"] and len(partes) >= 5:
+            return self._consulta(partes[4:], params)
+
+        self._responder(404, {"message": "not found"})
+
+    def _busca(self, params):
+        pagina = max(int(params.get("pagina", 1)), 1)
+        tam = max(int(params.get("tam_pagina", 10)), 1)
+        editais = self.server.editais
+        inicio = (pagina - 1) * tam
+        return {"items": editais[inicio:inicio + tam], "total": len(editais)}
+
+    def _consulta(self, partes, params):
+        if self.server.latencia_api:
+            time.sleep(self.server.latencia_api)
+        with self.server.lock:
+            self.server.consultas_api += 1
+            falhar = self.server.falhas_api and self.server.consultas_api % self.server.falhas_api == 0
+        if falhar:
+            # Falha transitória (sobrecarga), com a espera sugerida ao cliente
+            self.server.respostas_503 += 1
+            return self._responder(503, {"message": "service unavailable"},
+                                   {"Retry-After": str(self.server.retry_after)})
+        cnpj = partes[0]
+        if len(partes) == 1:
+            return self._responder(200, {
+                "cnpj": cnpj,
+                "razaoSocial": f"ORGAO FIXTURE {cnpj[-3:]}",
+                "municipio": "São Paulo",
+                "uf": "SP"
+            })
+
+        if len(partes) < 4 or partes[1] != "compras":
+            return self._responder(404, {"message": "not found"})
+
+        ano, seq = partes[2], partes[3]
+        recurso = partes[4] if len(partes) > 4 else ""
+        n = int(seq) if seq.isdigit() else 1
+
+        if recurso == "":
+            edital = self.server.por_id.get(f"{cnpj}/{ano}/{seq}") or {}
+            data = datetime.fromisoformat(edital.get("data_atualizacao_pncp") or f"{ano}-01-01T10:00:00")
+            compra = {
+                "numeroControlePNCP": f"{cnpj}-1-{n:06d}/{ano}",
+                "modalidadeNome": MODALIDADES[n % len(MODALIDADES)],
+                "situacaoCompraNome": "Divulgada no PNCP",
+                "objetoCompra": f"Aquisição de material de consumo - lote {n}",
+                "orgaoEntidade": {"cnpj": cnpj, "razaoSocial": f"ORGAO FIXTURE {cnpj[-3:]}"},
+                "unidadeOrgao": {"municipioNome": "São Paulo", "ufSigla": "SP", "nomeUnidade": "SECRETARIA"},
+                "amparoLegal": {"nome": "Lei 14.133/2021, Art. 28, I"},
+                "tipoInstrumentoConvocatorioNome": "Edital",
+                "modoDisputaNome": "Aberto",
+                "srp": True,
+                "usuarioNome": "Compras.gov.br",
+                "dataPublicacaoPncp": data.isoformat(),
+                "dataAtualizacao": data.isoformat(),
+                "dataAberturaProposta": (data + timedelta(days=1)).replace(hour=8, minute=0, second=0).isoformat(),
+                "dataEncerramentoProposta": (data + timedelta(days=10)).replace(hour=9, minute=0, second=0).isoformat()
+            }
+            # Parte dos registros vem incompleta (como no PNCP real) e exige a página
+            if self.server.compras_incompletas and n % self.server.compras_incompletas == 0:
+                compra.pop("modoDisputaNome")
+            return self._responder(200, compra)
+        if recurso == "itens":
+            # Paginação como na API (pagina/tamanhoPagina); sem parâmetros devolve tudo
+            total = self.server.itens_por_edital
+            if "tamanhoPagina" in params:
+                tam = max(int(params["tamanhoPagina"]), 1)
+                inicio = (max(int(params.get("pagina", 1)), 1) - 1) * tam
+                faixa = range(inicio, min(inicio + tam, total))
+            else:
+                faixa = range(total)
+            return self._responder(200, [
+                {
+                    "numeroItem": i + 1,
+                    "descricao": f"Item {i + 1} do edital {n}",
+                    "quantidade": 10,
+                    "valorUnitarioEstimado": 2.5,
+                    "valorTotal": 25.0,
+                    "criterioJulgamentoNome": "Menor preço",
+                    "situacaoCompraItemNome": "Em andamento",
+                    "orcamentoSigiloso": False
+                } for i in faixa
+            ])
+        if recurso == "historico":
+            return self._responder(200, [
+                {"logManutencaoDataInclusao": f"{ano}-01-01T10:00:00", "usuarioNome": "fixture",
+                 "tipoLogManutencaoNome": "Inclusão"}
+            ])
+        if recurso == "arquivos":
+            base = f"{self.server.url_api}/orgaos/{cnpj}/compras/{ano}/{seq}/arquivos"
+            if len(partes) > 5:
+                # Download de um arquivo: alguns KB de conteúdo fixo
+                return self._responder_arquivo(f"%PDF-1.4 arquivo {partes[5]} do edital {n}\n".encode() * 200)
+            return self._responder(200, [
+                {
+                    "sequencialDocumento": i + 1,
+                    "titulo": f"documento_{i + 1}.pdf",
+                    "tipoDocumentoNome": "Edital" if i == 0 else "Termo de Referência",
+                    "url": f"{base}/{i + 1}",
+                    "statusAtivo": True
+                } for i in range(self.server.arquivos_por_edital)
+            ])
+
+        self._responder(404, {"message": "not found"})
+
+    def _responder_html(self, html):
+        dados = html.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _responder_arquivo(self, dados):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _responder(self, status, corpo, headers=None):
+        dados = json.dumps(corpo).encode("utf-8")
+        etag = f'"{hashlib.md5(dados).hexdigest()}"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            # Revalidação condicional: conteúdo igual ao que o cliente já tem
+            self.server.respostas_304 += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.server.bytes_enviados += len(dados)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        if status == 200:
+            self.send_header("ETag", etag)
+        for nome, valor in (headers or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+
+class ServidorFixturePNCP:
+    """Sobe o servidor fixture numa thread; pode ser usado como context manager"""
+
+    def __init__(self, total_editais=5000, editais_por_dia=300, itens_por_edital=5, host="127.0.0.1", porta=0,
+                 latencia_api=0.0, compras_incompletas=10, falhas_api=0, retry_after=0, arquivos_por_edital=0):
+        self.httpd = ThreadingHTTPServer((host, porta), _HandlerFixture)
+        self.httpd.daemon_threads = True
+        self.httpd.editais = gerar_editais(total_editais, editais_por_dia)
+        self.httpd.por_id = {e["item_url"].split("/compras/")[-1]: e for e in self.httpd.editais}
+        self.httpd.itens_por_edital = itens_por_edital
+        self.httpd.arquivos_por_edital = arquivos_por_edital
+        self.httpd.url_api = self.url_api
+        self.httpd.latencia_api = latencia_api
+        self.httpd.compras_incompletas = compras_incompletas
+        # A cada falhas_api consultas da API v1, uma responde 503 (0 = nunca)
+        self.httpd.falhas_api = falhas_api
+        self.httpd.retry_after = retry_after
+        self.httpd.lock = threading.Lock()
+        self.httpd.consultas_api = 0
+        self.httpd.respostas_503 = 0
+        self.httpd.total_requisicoes = 0
+        self.httpd.respostas_304 = 0
+        self.httpd.bytes_enviados = 0
+        self._thread = None
+
+    @property
+    def url_base(self):
+        host, porta = self.httpd.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    @property
+    def url_busca(self):
+        return f"{self.url_base}/api/search/"
+
+    @property
+    def url_api(self):
+        return f"{self.url_base}/api/pncp/v1"
+
+    @property
+    def total_requisicoes(self):
+        return self.httpd.total_requisicoes
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Servidor fixture do PNCP")
+    parser.add_argument("--editais", type=int, default=5000)
+    parser.add_argument("--por-dia", type=int, default=300)
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--latencia-api", type=float, default=0.0, help="segundos por chamada da API v1")
+    parser.add_argument("--falhas-api", type=int, default=0, help="uma chamada da API v1 a cada N responde 503")
+    parser.add_argument("--arquivos", type=int, default=0, help="arquivos (anexos) por edital")
+    args = parser.parse_args()
+
+    servidor = ServidorFixturePNCP(args.editais, args.por_dia, porta=args.porta, latencia_api=args.latencia_api,
+                                   falhas_api=args.falhas_api, arquivos_por_edital=args.arquivos)
+    print(f"PNCP_BASE_URL={servidor.url_base}")
+    print(f"PNCP_SEARCH_URL={servidor.url_busca}")
+    print(f"PNCP_API_URL={servidor.url_api}")
+    try:
+        servidor.httpd.serve_forever()
+    except KeyboardInterrupt:
+        servidor.parar()
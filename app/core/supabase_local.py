@@ -0,0 +1,532 @@
+"""
+Banco e storage locais que imitam o cliente do Supabase para testes e benchmarks offline
+
+Uso:
+    SUPABASE_BACKEND=local python run.py
+
+Cada tabela (editais_completos, tabelas filhas, scheduler_horario, scheduler_execucoes...) é uma
+tabela SQLite criada na primeira escrita, com colunas acrescentadas conforme aparecem; listas e
+objetos são guardados como JSON. O cliente aceita o subconjunto do PostgREST usado no projeto:
+select (com count="exact"), insert, upsert(on_conflict), update, delete, filtros eq/neq/gt/gte/
+lt/lte/in_/is_/like/ilike, order, limit, range e single. O storage guarda os arquivos em memória
+ou num diretório.
+
+Latência (SUPABASE_LOCAL_LATENCIA_MS) e taxa de falhas (SUPABASE_LOCAL_TAXA_FALHA, erros 503)
+são injetadas em cada chamada para medir vazão e resiliência sem rede.
+"""
+
+import os
+import re
+import json
+import time
+import random
+import sqlite3
+import threading
+from datetime import datetime
+
+from .config import settings
+
+
+# Chaves únicas das tabelas conhecidas (upsert por id_pncp e pelas posições das filhas)
+CHAVES_UNICAS = {
+    "editais_completos": ("id_pncp",),
+    "editais_itens": ("id_pncp", "posicao"),
+    "editais_anexos": ("id_pncp", "posicao"),
+    "editais_historico": ("id_pncp", "posicao")
+}
+
+URL_PUBLICA = "http://supabase.local/storage/v1/object/public"
+
+_NOME_VALIDO = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class ErroLocal(Exception):
+    """Erro devolvido pelo banco local (mesmas mensagens e códigos que o PostgREST/Storage usariam)"""
+
+    def __init__(self, mensagem, code=None):
+        super().__init__(mensagem)
+        self.message = mensagem
+        self.code = code
+
+
+class RespostaLocal:
+    """Como a APIResponse do postgrest: data e count"""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def _like_para_glob(padrao):
+    """Padrão do like do PostgREST (% ou *, _ e escape com \\) no equivalente do GLOB"""
+    glob, escapado = [], False
+    for caractere in padrao:
+        if escapado:
+            glob.append(f"[{caractere}]" if caractere in "*?[" else caractere)
+            escapado = False
+        elif caractere == "\\":
+            escapado = True
+        else:
+            glob.append({"%": "*", "*": "*", "_": "?", "?": "[?]", "[": "[[]"}.get(caractere, caractere))
+    return "".join(glob)
+
+
+def _nome(nome):
+    if not _NOME_VALIDO.match(nome):
+        raise ErroLocal(f"invalid identifier: {nome}", "42602")
+    return f'"{nome}"'
+
+
+class ClienteLocal:
+    """Substituto de supabase.Client: table(), rpc() e storage sobre um SQLite em processo"""
+
+    def __init__(self, arquivo=None, latencia_ms=None, taxa_falha=None, diretorio_storage=None, semente=None):
+        arquivo = settings.SUPABASE_LOCAL_FILE if arquivo is None else arquivo
+        self.arquivo = os.path.expanduser(arquivo) if arquivo else ":memory:"
+        if self.arquivo != ":memory:":
+            os.makedirs(os.path.dirname(self.arquivo) or ".", exist_ok=True)
+        self.latencia = (settings.SUPABASE_LOCAL_LATENCIA_MS if latencia_ms is None else latencia_ms) / 1000
+        self.taxa_falha = settings.SUPABASE_LOCAL_TAXA_FALHA if taxa_falha is None else taxa_falha
+        self._aleatorio = random.Random(semente)
+        self._lock = threading.RLock()
+        self._conexao = sqlite3.connect(self.arquivo, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        if self.arquivo != ":memory:":
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("CREATE TABLE IF NOT EXISTS _colunas (tabela TEXT, coluna TEXT, tipo TEXT, PRIMARY KEY (tabela, coluna))")
+        self._conexao.commit()
+        self._tipos = {}
+        for tabela, coluna, tipo in self._conexao.execute("SELECT tabela, coluna, tipo FROM _colunas"):
+            self._tipos.setdefault(tabela, {})[coluna] = tipo
+        self.funcoes = {}
+        self.chamadas = 0
+        self.falhas = 0
+        diretorio = settings.SUPABASE_LOCAL_STORAGE_DIR if diretorio_storage is None else diretorio_storage
+        self.storage = StorageLocal(self, os.path.expanduser(diretorio) if diretorio else None)
+
+    # === API do cliente ===
+
+    def table(self, nome):
+        return ConsultaLocal(self, nome)
+
+    def from_(self, nome):
+        return ConsultaLocal(self, nome)
+
+    def rpc(self, nome, parametros=None):
+        """Funções registradas em funcoes[nome](cliente, **parametros)"""
+        return ChamadaLocal(self, nome, parametros or {})
+
+    def status(self):
+        return {"arquivo": self.arquivo, "latencia_ms": self.latencia * 1000, "taxa_falha": self.taxa_falha,
+                "chamadas": self.chamadas, "falhas": self.falhas}
+
+    # === Latência e falhas injetadas ===
+
+    def simular(self):
+        """Espera a latência da chamada (fora da trava, como a rede) e às vezes falha com 503"""
+        with self._lock:
+            self.chamadas += 1
+            espera = self.latencia * self._aleatorio.uniform(0.5, 1.5) if self.latencia else 0
+            falhou = self.taxa_falha and self._aleatorio.random() < self.taxa_falha
+            if falhou:
+                self.falhas += 1
+        if espera:
+            time.sleep(espera)
+        if falhou:
+            raise ErroLocal("503 Service Unavailable (falha simulada)", 503)
+
+    # === Esquema dinâmico ===
+
+    def _garantir_tabela(self, tabela):
+        if tabela in self._tipos:
+            return
+        self._conexao.execute(f"CREATE TABLE IF NOT EXISTS {_nome(tabela)} (id INTEGER PRIMARY KEY AUTOINCREMENT, created_at TEXT)")
+        self._tipos[tabela] = {}
+        chaves = CHAVES_UNICAS.get(tabela)
+        if chaves:
+            self._garantir_colunas(tabela, {chave: None for chave in chaves})
+            self._garantir_indice(tabela, chaves)
+
+    def _garantir_colunas(self, tabela, linha):
+        self._garantir_tabela(tabela)
+        tipos = self._tipos[tabela]
+        for coluna, valor in linha.items():
+            if coluna in ("id", "created_at"):
+                continue
+            if coluna not in tipos:
+                self._conexao.execute(f"ALTER TABLE {_nome(tabela)} ADD COLUMN {_nome(coluna)}")
+                tipos[coluna] = None
+            if tipos[coluna] is None and valor is not None:
+                tipos[coluna] = "json" if isinstance(valor, (dict, list)) else "bool" if isinstance(valor, bool) else "valor"
+                self._conexao.execute("INSERT OR REPLACE INTO _colunas VALUES (?, ?, ?)", (tabela, coluna, tipos[coluna]))
+
+    def _garantir_indice(self, tabela, colunas):
+        self._garantir_colunas(tabela, {coluna: None for coluna in colunas})
+        nome = "__".join((tabela,) + tuple(colunas))
+        self._conexao.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {_nome(nome)} ON {_nome(tabela)} ({', '.join(map(_nome, colunas))})"
+        )
+
+    @staticmethod
+    def _para_sqlite(valor):
+        if isinstance(valor, (dict, list)):
+            return json.dumps(valor, ensure_ascii=False, default=str)
+        if isinstance(valor, bool):
+            return int(valor)
+        if isinstance(valor, (str, int, float)) or valor is None:
+            return valor
+        return str(valor)
+
+    def _da_linha(self, tabela, linha):
+        tipos = self._tipos.get(tabela, {})
+        dados = {}
+        for coluna in linha.keys():
+            valor = linha[coluna]
+            tipo = tipos.get(coluna)
+            if valor is not None and tipo == "json":
+                valor = json.loads(valor)
+            elif valor is not None and tipo == "bool":
+                valor = bool(valor)
+            dados[coluna] = valor
+        return dados
+
+    def executar(self, comandos, tabela=None):
+        """Executa [(sql, parâmetros)] numa transação e devolve as linhas convertidas (tipos da tabela)"""
+        linhas = []
+        with self._lock:
+            try:
+                for sql, parametros in comandos:
+                    cursor = self._conexao.execute(sql, parametros)
+                    linhas.extend(self._da_linha(tabela, linha) for linha in cursor.fetchall())
+                self._conexao.commit()
+            except sqlite3.IntegrityError as e:
+                self._conexao.rollback()
+                raise ErroLocal(f"duplicate key value violates unique constraint ({e})", "23505")
+            except sqlite3.Error as e:
+                self._conexao.rollback()
+                raise ErroLocal(f"invalid query ({e})", "42601")
+        return linhas
+
+
+class ChamadaLocal:
+    """rpc(): chama a função registrada no execute()"""
+
+    def __init__(self, cliente, nome, parametros):
+        self.cliente = cliente
+        self.nome = nome
+        self.parametros = parametros
+
+    def execute(self):
+        self.cliente.simular()
+        funcao = self.cliente.funcoes.get(self.nome)
+        if funcao is None:
+            raise ErroLocal(f"Could not find the function {self.nome}", "PGRST202")
+        return RespostaLocal(funcao(self.cliente, **self.parametros))
+
+
+class ConsultaLocal:
+    """Construtor de consulta no estilo do postgrest-py; a ida ao banco acontece no execute()"""
+
+    def __init__(self, cliente, tabela):
+        self.cliente = cliente
+        self.tabela = tabela
+        self.operacao = "select"
+        self.colunas = "*"
+        self.contar = None
+        self.dados = None
+        self.conflito = None
+        self.ignorar_duplicados = False
+        self.filtros = []
+        self.ordem = []
+        self.limite = None
+        self.inicio = 0
+        self.unico = False
+
+    # === Operações ===
+
+    def select(self, *colunas, count=None):
+        self.operacao = "select"
+        self.colunas = ",".join(colunas) or "*"
+        self.contar = count
+        return self
+
+    def insert(self, dados, count=None, upsert=False, **_):
+        self.operacao = "upsert" if upsert else "insert"
+        self.dados = dados if isinstance(dados, list) else [dados]
+        self.conflito = ("id",)
+        return self
+
+    def upsert(self, dados, on_conflict="", ignore_duplicates=False, **_):
+        self.operacao = "upsert"
+        self.dados = dados if isinstance(dados, list) else [dados]
+        self.conflito = tuple(c.strip() for c in on_conflict.split(",") if c.strip()) or ("id",)
+        self.ignorar_duplicados = ignore_duplicates
+        return self
+
+    def update(self, dados, **_):
+        self.operacao = "update"
+        self.dados = dados
+        return self
+
+    def delete(self, **_):
+        self.operacao = "delete"
+        return self
+
+    # === Filtros e modificadores ===
+
+    def _filtro(self, coluna, operador, valor):
+        self.filtros.append((coluna, operador, valor))
+        return self
+
+    def eq(self, coluna, valor):
+        return self._filtro(coluna, "=", valor)
+
+    def neq(self, coluna, valor):
+        return self._filtro(coluna, "!=", valor)
+
+    def gt(self, coluna, valor):
+        return self._filtro(coluna, ">", valor)
+
+    def gte(self, coluna, valor):
+        return self._filtro(coluna, ">=", valor)
+
+    def lt(self, coluna, valor):
+        return self._filtro(coluna, "<", valor)
+
+    def lte(self, coluna, valor):
+        return self._filtro(coluna, "<=", valor)
+
+    def like(self, coluna, padrao):
+        # LIKE do SQLite ignora maiúsculas/minúsculas; GLOB diferencia, como o LIKE do Postgres
+        return self._filtro(coluna, "GLOB", _like_para_glob(padrao))
+
+    def ilike(self, coluna, padrao):
+        return self._filtro(coluna, "LIKE", padrao.replace("*", "%"))
+
+    def in_(self, coluna, valores):
+        return self._filtro(coluna, "IN", list(valores))
+
+    def is_(self, coluna, valor):
+        return self._filtro(coluna, "IS", None if valor in (None, "null") else valor)
+
+    def order(self, coluna, desc=False, nullsfirst=False, **_):
+        self.ordem.append((coluna, desc))
+        return self
+
+    def limit(self, tamanho, **_):
+        self.limite = tamanho
+        return self
+
+    def range(self, inicio, fim, **_):
+        self.inicio = inicio
+        self.limite = fim - inicio + 1
+        return self
+
+    def single(self):
+        self.unico = True
+        return self
+
+    # === Execução ===
+
+    def _where(self):
+        partes, parametros = [], []
+        for coluna, operador, valor in self.filtros:
+            if operador == "IN":
+                if not valor:
+                    partes.append("0")
+                    continue
+                partes.append(f"{_nome(coluna)} IN ({', '.join('?' * len(valor))})")
+                parametros.extend(ClienteLocal._para_sqlite(v) for v in valor)
+            elif operador == "IS":
+                partes.append(f"{_nome(coluna)} IS ?")
+                parametros.append(ClienteLocal._para_sqlite(valor))
+            else:
+                partes.append(f"{_nome(coluna)} {operador} ?")
+                parametros.append(ClienteLocal._para_sqlite(valor))
+        return (" WHERE " + " AND ".join(partes) if partes else ""), parametros
+
+    def execute(self):
+        self.cliente.simular()
+        with self.cliente._lock:
+            # Colunas usadas em filtros/ordem existem mesmo antes da primeira escrita
+            self.cliente._garantir_colunas(self.tabela, {coluna: None for coluna, _, _ in self.filtros})
+            self.cliente._garantir_colunas(self.tabela, {coluna: None for coluna, _ in self.ordem})
+            resposta = getattr(self, f"_{self.operacao}")()
+        if self.unico:
+            if len(resposta.data) != 1:
+                raise ErroLocal(f"JSON object requested, multiple (or no) rows returned ({len(resposta.data)})", "PGRST116")
+            resposta.data = resposta.data[0]
+        return resposta
+
+    def _projetar(self, linhas):
+        if self.colunas.strip() == "*":
+            return linhas
+        colunas = [coluna.strip() for coluna in self.colunas.split(",") if coluna.strip()]
+        return [{coluna: linha.get(coluna) for coluna in colunas} for linha in linhas]
+
+    def _select(self):
+        where, parametros = self._where()
+        sql = f"SELECT * FROM {_nome(self.tabela)}{where}"
+        if self.ordem:
+            sql += " ORDER BY " + ", ".join(f"{_nome(coluna)}{' DESC' if desc else ''}" for coluna, desc in self.ordem)
+        paginado = sql
+        if self.limite is not None:
+            paginado += f" LIMIT {int(self.limite)} OFFSET {int(self.inicio)}"
+        linhas = self.cliente.executar([(paginado, parametros)], self.tabela)
+        total = None
+        if self.contar:
+            total = self.cliente.executar([(f"SELECT COUNT(*) AS total FROM {_nome(self.tabela)}{where}", parametros)])[0]["total"]
+        return RespostaLocal(self._projetar(linhas), total)
+
+    def _valores(self, linha):
+        agora = datetime.now().isoformat()
+        linha = {"created_at": agora, **linha}
+        colunas = list(linha)
+        return colunas, [ClienteLocal._para_sqlite(linha[coluna]) for coluna in colunas]
+
+    def _insert(self):
+        comandos = []
+        for linha in self.dados:
+            self.cliente._garantir_colunas(self.tabela, linha)
+            colunas, valores = self._valores(linha)
+            comandos.append((f"INSERT INTO {_nome(self.tabela)} ({', '.join(map(_nome, colunas))}) "
+                             f"VALUES ({', '.join('?' * len(colunas))}) RETURNING *", valores))
+        return RespostaLocal(self.cliente.executar(comandos, self.tabela))
+
+    def _upsert(self):
+        if self.conflito == ("id",) and not any("id" in linha for linha in self.dados):
+            return self._insert()
+        if self.conflito != ("id",):
+            self.cliente._garantir_indice(self.tabela, self.conflito)
+        comandos = []
+        for linha in self.dados:
+            self.cliente._garantir_colunas(self.tabela, linha)
+            colunas, valores = self._valores(linha)
+            atualizar = [coluna for coluna in linha if coluna not in self.conflito]
+            if self.ignorar_duplicados or not atualizar:
+                acao = "DO NOTHING"
+            else:
+                acao = "DO UPDATE SET " + ", ".join(f"{_nome(c)} = excluded.{_nome(c)}" for c in atualizar)
+            comandos.append((f"INSERT INTO {_nome(self.tabela)} ({', '.join(map(_nome, colunas))}) "
+                             f"VALUES ({', '.join('?' * len(colunas))}) "
+                             f"ON CONFLICT ({', '.join(map(_nome, self.conflito))}) {acao} RETURNING *", valores))
+        return RespostaLocal(self.cliente.executar(comandos, self.tabela))
+
+    def _update(self):
+        self.cliente._garantir_colunas(self.tabela, self.dados)
+        colunas = [coluna for coluna in self.dados if coluna != "id"]
+        if not colunas:
+            return self._select()
+        where, parametros = self._where()
+        valores = [ClienteLocal._para_sqlite(self.dados[coluna]) for coluna in colunas]
+        linhas = self.cliente.executar([(
+            f"UPDATE {_nome(self.tabela)} SET {', '.join(f'{_nome(c)} = ?' for c in colunas)}{where} RETURNING *",
+            valores + parametros
+        )], self.tabela)
+        return RespostaLocal(linhas)
+
+    def _delete(self):
+        where, parametros = self._where()
+        return RespostaLocal(self.cliente.executar([(f"DELETE FROM {_nome(self.tabela)}{where} RETURNING *", parametros)], self.tabela))
+
+
+class StorageLocal:
+    """supabase.storage: buckets em memória ou em subdiretórios de diretorio"""
+
+    def __init__(self, cliente, diretorio=None):
+        self.cliente = cliente
+        self.diretorio = diretorio
+        self._buckets = {}
+
+    def from_(self, bucket):
+        if bucket not in self._buckets:
+            caminho = os.path.join(self.diretorio, bucket) if self.diretorio else None
+            self._buckets[bucket] = BucketLocal(self.cliente, bucket, caminho)
+        return self._buckets[bucket]
+
+    def status(self):
+        return {bucket: len(arquivos.listar_caminhos()) for bucket, arquivos in self._buckets.items()}
+
+
+class BucketLocal:
+    """upload / download / remove / list / get_public_url de um bucket"""
+
+    def __init__(self, cliente, nome, diretorio=None):
+        self.cliente = cliente
+        self.nome = nome
+        self.diretorio = diretorio
+        self._arquivos = {}
+        self._lock = threading.Lock()
+
+    def _caminho(self, path):
+        caminho = os.path.normpath(os.path.join(self.diretorio, path))
+        if not caminho.startswith(os.path.normpath(self.diretorio) + os.sep):
+            raise ErroLocal(f"invalid path: {path}", 400)
+        return caminho
+
+    def _existe(self, path):
+        return os.path.exists(self._caminho(path)) if self.diretorio else path in self._arquivos
+
+    def upload(self, path, file, file_options=None):
+        self.cliente.simular()
+        if isinstance(file, bytes):
+            conteudo = file
+        else:
+            with open(file, "rb") as origem:
+                conteudo = origem.read()
+        opcoes = file_options or {}
+        substituir = str(opcoes.get("upsert", opcoes.get("x-upsert", ""))).lower() == "true"
+        with self._lock:
+            if self._existe(path) and not substituir:
+                raise ErroLocal("Duplicate: The resource already exists", 409)
+            if self.diretorio:
+                caminho = self._caminho(path)
+                os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                with open(caminho, "wb") as arquivo:
+                    arquivo.write(conteudo)
+            else:
+                self._arquivos[path] = conteudo
+        return {"Key": f"{self.nome}/{path}"}
+
+    def download(self, path):
+        self.cliente.simular()
+        with self._lock:
+            if not self._existe(path):
+                raise ErroLocal(f"Object not found: {path}", 404)
+            if self.diretorio:
+                with open(self._caminho(path), "rb") as arquivo:
+                    return arquivo.read()
+            return self._arquivos[path]
+
+    def remove(self, paths):
+        self.cliente.simular()
+        removidos = []
+        with self._lock:
+            for path in paths:
+                if not self._existe(path):
+                    continue
+                if self.diretorio:
+                    os.remove(self._caminho(path))
+                else:
+                    del self._arquivos[path]
+                removidos.append({"name": path})
+        return removidos
+
+    def listar_caminhos(self):
+        with self._lock:
+            if not self.diretorio:
+                return sorted(self._arquivos)
+            if not os.path.isdir(self.diretorio):
+                return []
+            return sorted(
+                os.path.relpath(os.path.join(raiz, nome), self.diretorio)
+                for raiz, _, nomes in os.walk(self.diretorio) for nome in nomes
+            )
+
+    def list(self, path=None, options=None):
+        self.cliente.simular()
+        prefixo = f"{path.rstrip('/')}/" if path else ""
+        return [{"name": caminho[len(prefixo):]} for caminho in self.listar_caminhos() if caminho.startswith(prefixo)]
+
+    def get_public_url(self, path):
+        return f"{URL_PUBLICA}/{self.nome}/{path}"
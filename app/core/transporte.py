@@ -0,0 +1,189 @@
+"""
+Camada de transporte HTTP da session do extrator
+
+Pool de conexões do tamanho da concorrência (threads da API + workers de extração), novas
+tentativas com backoff exponencial e jitter para GETs (5xx, 429, conexão recusada), respeitando
+Retry-After, e contadores por host de requisições, conexões abertas e tentativas. Chamadas aos
+hosts do PNCP passam pelo limitador de taxa adaptativo, quando há um.
+"""
+
+import time
+import random
+import threading
+from collections import Counter
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .config import settings
+
+
+class RetryPNCP(Retry):
+    """Retry com backoff exponencial "equal jitter" e Retry-After limitado
+
+    Com limitador, cada nova tentativa a um host do PNCP é registrada nele e espera um token
+    depois do backoff, como uma requisição nova.
+    """
+
+    def __init__(self, *args, limitador=None, hosts_limitados=frozenset(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limitador = limitador
+        self.hosts_limitados = hosts_limitados
+        self.host = None
+
+    def new(self, **kw):
+        # O urllib3 recria o Retry a cada tentativa só com os parâmetros dele
+        novo = super().new(**kw)
+        novo.limitador = self.limitador
+        novo.hosts_limitados = self.hosts_limitados
+        novo.host = self.host
+        return novo
+
+    def _limitado(self):
+        return self.limitador is not None and self.host in self.hosts_limitados
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        novo = super().increment(method, url, response, error, _pool, _stacktrace)
+        if _pool is not None:
+            novo.host = _pool.host
+        if novo._limitado():
+            # Tentativa que falhou é sinal de sobrecarga já, antes da próxima sair
+            novo.limitador.registrar("api", status=response.status if response else None, sucesso=error is None)
+        return novo
+
+    def sleep(self, response=None):
+        super().sleep(response)
+        if self._limitado():
+            self.limitador.adquirir()
+
+    def get_backoff_time(self):
+        tentativas = len(self.history)
+        if tentativas == 0 or not self.backoff_factor:
+            return 0
+        base = min(self.backoff_max, self.backoff_factor * (2 ** (tentativas - 1)))
+        # Metade fixa + metade aleatória: workers que falharam juntos não voltam juntos
+        return base / 2 + random.uniform(0, base / 2)
+
+    def get_retry_after(self, response):
+        segundos = super().get_retry_after(response)
+        if segundos is None:
+            return None
+        return min(segundos, settings.HTTP_RETRY_AFTER_MAX)
+
+
+def criar_retry(tentativas=None, backoff=None, limitador=None):
+    """Política de novas tentativas só para métodos idempotentes"""
+    tentativas = settings.HTTP_RETRY_TOTAL if tentativas is None else tentativas
+    return RetryPNCP(
+        total=tentativas,
+        connect=tentativas,
+        read=min(tentativas, 1),  # timeout de leitura já custou o timeout inteiro
+        status=tentativas,
+        other=0,
+        redirect=False,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        status_forcelist=(429, 500, 502, 503, 504),
+        backoff_factor=settings.HTTP_RETRY_BACKOFF if backoff is None else backoff,
+        backoff_max=settings.HTTP_RETRY_BACKOFF_MAX,
+        respect_retry_after_header=True,
+        raise_on_status=False,  # esgotadas as tentativas, o status chega ao chamador como erro
+        limitador=limitador,
+        hosts_limitados=hosts_pncp() if limitador else frozenset()
+    )
+
+
+def hosts_pncp():
+    """Hosts do portal, da busca e da API v1 (os que passam pelo limitador)"""
+    return frozenset(
+        urlsplit(url).hostname for url in (settings.PNCP_BASE_URL, settings.PNCP_API_URL, settings.PNCP_SEARCH_URL)
+    )
+
+
+def tamanho_pool():
+    """Conexões por host: threads da API + workers de extração (que também baixam arquivos)"""
+    return settings.HTTP_POOL_MAXSIZE or settings.PNCP_API_WORKERS + settings.EXTRACAO_WORKERS
+
+
+class AdaptadorTransporte(HTTPAdapter):
+    """HTTPAdapter com pool dimensionado, retry com jitter e contadores de reuso por host"""
+
+    def __init__(self, pool_connections=None, pool_maxsize=None, max_retries=None, limitador=None, **kwargs):
+        super().__init__(
+            pool_connections=pool_connections or settings.HTTP_POOL_HOSTS,
+            pool_maxsize=pool_maxsize or tamanho_pool(),
+            max_retries=criar_retry(limitador=limitador) if max_retries is None else max_retries,
+            **kwargs
+        )
+        self.limitador = limitador
+        self.hosts_limitados = hosts_pncp()
+        self._lock_transporte = threading.Lock()
+        self.limpar_conexoes()
+
+    def send(self, request, **kwargs):
+        host = urlsplit(request.url).hostname
+        limitador = self.limitador if host in self.hosts_limitados else None
+        if limitador:
+            limitador.adquirir()
+        inicio = time.monotonic()
+        try:
+            response = super().send(request, **kwargs)
+        except Exception:
+            if limitador:
+                limitador.registrar("api", time.monotonic() - inicio, sucesso=False)
+            raise
+
+        retries = getattr(response.raw, "retries", None)
+        historico = retries.history if retries is not None else ()
+        tentativas = len(historico)
+        if limitador:
+            # As tentativas repetidas pelo urllib3 já passaram pelo limitador (RetryPNCP);
+            # a latência só vale sem tentativas (as esperas do backoff não são do servidor)
+            segundos = None if historico else time.monotonic() - inicio
+            limitador.registrar("api", segundos, status=response.status_code)
+        with self._lock_transporte:
+            self._tentativas[host] += tentativas
+            if response.status_code >= 500 or response.status_code == 429:
+                self._falhas[host] += 1
+        return response
+
+    def _contadores_pools(self):
+        """(requisições, conexões abertas) acumuladas pelos pools do urllib3, por host"""
+        contadores = {}
+        pools = self.poolmanager.pools
+        for chave in pools.keys():
+            pool = pools.get(chave)
+            if pool is None:
+                continue
+            requisicoes, conexoes = contadores.get(pool.host, (0, 0))
+            contadores[pool.host] = (requisicoes + pool.num_requests, conexoes + pool.num_connections)
+        return contadores
+
+    def limpar_conexoes(self):
+        """Zera os contadores (os do urllib3 são acumulados; guarda a base para subtrair)"""
+        with self._lock_transporte:
+            self._base = self._contadores_pools()
+            self._tentativas = Counter()
+            self._falhas = Counter()
+
+    def conexoes(self):
+        """Por host: requisições, conexões novas, taxa de reuso, novas tentativas e falhas finais"""
+        with self._lock_transporte:
+            base = dict(self._base)
+            tentativas = Counter(self._tentativas)
+            falhas = Counter(self._falhas)
+
+        resumo = {}
+        for host, (requisicoes, conexoes) in self._contadores_pools().items():
+            requisicoes -= base.get(host, (0, 0))[0]
+            conexoes -= base.get(host, (0, 0))[1]
+            if requisicoes <= 0:
+                continue
+            resumo[host] = {
+                "requisicoes": requisicoes,
+                "conexoes_novas": conexoes,
+                "reuso": round(1 - conexoes / requisicoes, 3),
+                "novas_tentativas": tentativas.get(host, 0),
+                "falhas": falhas.get(host, 0)
+            }
+        return resumo
@@ -11,6 +11,7 @@ from apscheduler.triggers.cron import CronTrigger
 
 from .core.config import settings
 from .core.extractor import PNCPExtractor
+from .core.filhas import TABELAS_FILHAS, consultar_filhas
 from .models.schemas import (
     ConfigScheduler, 
     ExtrairDiaRequest, 
@@ -348,11 +349,48 @@ def clear_extraction_events(task_id=None):
     else:
         extraction_events.clear()
 
+def notificador_eventos(task_id):
+    """Converte os eventos do pipeline de extração em eventos da tarefa (tempo real)"""
+    def notificar(evento, id_pncp, **info):
+        if evento == "verificando":
+            active_extractions[task_id]["total_editais"] = info["total"]
+            add_extraction_event(task_id, "progress", f"📋 Processando {info['atual']}/{info['total']}: {id_pncp}", {
+                "progresso": round(info["atual"] / info["total"] * 100, 1) if info["total"] else 0,
+                "atual": info["atual"],
+                "total": info["total"],
+                "id_pncp": id_pncp
+            })
+        elif evento == "verificado":
+            motivo = info["motivo"]
+            if motivo == "inalterado":
+                add_extraction_event(task_id, "info", f"⏭️ {id_pncp} não mudou desde a última coleta - pulando")
+                return
+            elif motivo == "alterado":
+                add_extraction_event(task_id, "info", f"🔄 {id_pncp} será atualizado")
+            elif motivo == "conferir":
+                add_extraction_event(task_id, "info", f"🔄 {id_pncp} será conferido (hash do conteúdo)")
+            else:
+                add_extraction_event(task_id, "info", f"✨ {id_pncp} é um novo edital")
+            add_extraction_event(task_id, "info", f"🔍 Extraindo dados completos de {id_pncp}...")
+        elif evento == "inalterado":
+            add_extraction_event(task_id, "info", f"⏭️ {id_pncp} sem alterações - gravação pulada")
+        elif evento == "extraido":
+            add_extraction_event(task_id, "success", f"✅ Dados extraídos de {id_pncp}")
+        elif evento == "salvo":
+            acao = "atualizado" if info["atualizado"] else "inserido"
+            add_extraction_event(task_id, "success", f"💾 {id_pncp} {acao} (ID: {info['supabase_id']})")
+        elif evento == "erro":
+            alvo = id_pncp or info["etapa"]
+            add_extraction_event(task_id, "error", f"❌ Erro ao processar {alvo}: {info['erro']}")
+    return notificar
+
+
 async def executar_extracao_com_eventos(extrator, task_id, dias_retroativos=1, salvar_arquivos=False):
     """Executa extração com feedback em tempo real"""
     try:
         # Atualiza status
         active_extractions[task_id]["status"] = "buscando_editais"
+        extrator.iniciar_metricas_execucao()
         
         # Busca editais
         add_extraction_event(task_id, "info", f"📅 Buscando editais dos últimos {dias_retroativos} dia(s)...")
@@ -362,25 +400,30 @@ async def executar_extracao_com_eventos(extrator, task_id, dias_retroativos=1, s
         
         add_extraction_event(task_id, "info", f"📊 Período: {data_inicial} a {data_final}")
         
-        # Busca editais para cada dia
-        todos_editais = []
-        for dia_offset in range(dias_retroativos, -1, -1):
-            data_extracao = data_final - timedelta(days=dia_offset)
-            add_extraction_event(task_id, "info", f"🔍 Buscando editais de {data_extracao}...")
-            
-            editais_encontrados = extrator.buscar_editais_recentes(
-                data_filtro=data_extracao,
-                max_paginas=50,
-                limit_por_pagina=100
-            )
-            
+        # Uma única varredura da listagem para todo o período; as páginas já seguem para
+        # verificação, extração e gravação enquanto as próximas são lidas
+        add_extraction_event(task_id, "info", f"🔍 Buscando editais de {data_inicial} a {data_final}...")
+        active_extractions[task_id]["status"] = "processando_editais"
+        
+        execucao = await extrator.executar_pipeline(
+            lambda ao_encontrar: extrator.buscar_editais_periodo(
+                data_inicial,
+                data_final,
+                max_paginas=50 * (dias_retroativos + 1),
+                limit_por_pagina=100,
+                ao_encontrar=ao_encontrar
+            ),
+            salvar_arquivos,
+            notificar=notificador_eventos(task_id)
+        )
+        
+        for data_extracao, editais_encontrados in (execucao.descoberta or {}).items():
             if editais_encontrados:
-                todos_editais.extend(editais_encontrados)
                 add_extraction_event(task_id, "success", f"✅ Encontrados {len(editais_encontrados)} editais em {data_extracao}")
             else:
                 add_extraction_event(task_id, "warning", f"⚠️ Nenhum edital encontrado em {data_extracao}")
         
-        if not todos_editais:
+        if not execucao.encontrados:
             add_extraction_event(task_id, "warning", "⚠️ Nenhum edital encontrado no período")
             return {
                 "success": False,
@@ -388,118 +431,48 @@ async def executar_extracao_com_eventos(extrator, task_id, dias_retroativos=1, s
                 "total_encontrados": 0,
                 "total_novos": 0,
                 "total_atualizados": 0,
-                "total_erros": 0,
-                "tempo_execucao": 0
+                "total_erros": len(execucao.erros),
+                "tempo_execucao": round(execucao.tempo_execucao, 2),
+                "reprocessamento": execucao.backlog,
+                "aguardando_banco": execucao.aguardando_banco
             }
         
-        # Atualiza status
-        active_extractions[task_id]["status"] = "processando_editais"
-        active_extractions[task_id]["total_editais"] = len(todos_editais)
-        
-        add_extraction_event(task_id, "info", f"🚀 Iniciando processamento de {len(todos_editais)} editais...")
-        
-        # Processa cada edital
-        novos_total = []
-        atualizados_total = []
-        erros_total = []
-        
-        for i, edital_basico in enumerate(todos_editais, 1):
-            try:
-                id_pncp = edital_basico.get("id_pncp")
-                if not id_pncp:
-                    continue
-                
-                # Atualiza progresso
-                progresso = (i / len(todos_editais)) * 100
-                add_extraction_event(task_id, "progress", f"📋 Processando {i}/{len(todos_editais)}: {id_pncp}", {
-                    "progresso": round(progresso, 1),
-                    "atual": i,
-                    "total": len(todos_editais),
-                    "id_pncp": id_pncp
-                })
-                
-                # Verifica se já existe
-                existing = extrator.supabase.table("editais_completos")\
-                    .select("id, ultima_atualizacao, data_coleta")\
-                    .eq("id_pncp", id_pncp)\
-                    .execute()
-                
-                edital_existente = None
-                deve_extrair = True
-                
-                if existing.data:
-                    edital_existente = existing.data[0]
-                    ultima_coleta = edital_existente.get("data_coleta")
-                    
-                    if ultima_coleta:
-                        data_coleta = datetime.fromisoformat(ultima_coleta.replace('Z', '+00:00'))
-                        hoje = datetime.now()
-                        
-                        if data_coleta.date() == hoje.date():
-                            add_extraction_event(task_id, "info", f"⏭️ {id_pncp} já foi coletado hoje - pulando")
-                            deve_extrair = False
-                        else:
-                            add_extraction_event(task_id, "info", f"🔄 {id_pncp} será atualizado")
-                    else:
-                        add_extraction_event(task_id, "info", f"🔄 {id_pncp} será atualizado (sem data de coleta)")
-                else:
-                    add_extraction_event(task_id, "info", f"✨ {id_pncp} é um novo edital")
-                
-                # Extrai se necessário
-                if deve_extrair:
-                    add_extraction_event(task_id, "info", f"🔍 Extraindo dados completos de {id_pncp}...")
-                    
-                    dados_completos = extrator.extrair_edital_completo_hibrido(id_pncp, salvar_arquivos=salvar_arquivos)
-                    
-                    if dados_completos:
-                        add_extraction_event(task_id, "success", f"✅ Dados extraídos de {id_pncp}")
-                        
-                        # Salva no banco
-                        supabase_id = extrator.salvar_supabase(dados_completos)
-                        if supabase_id:
-                            if edital_existente:
-                                atualizados_total.append(id_pncp)
-                                add_extraction_event(task_id, "success", f"💾 {id_pncp} atualizado (ID: {supabase_id})")
-                            else:
-                                novos_total.append(id_pncp)
-                                add_extraction_event(task_id, "success", f"💾 {id_pncp} inserido (ID: {supabase_id})")
-                        else:
-                            add_extraction_event(task_id, "error", f"❌ Falha ao salvar {id_pncp}")
-                            erros_total.append({"id_pncp": id_pncp, "erro": "Falha ao salvar no Supabase"})
-                    else:
-                        add_extraction_event(task_id, "error", f"❌ Falha na extração de {id_pncp}")
-                        erros_total.append({"id_pncp": id_pncp, "erro": "Falha na extração de dados"})
-                
-                await asyncio.sleep(0.2)  # Pausa entre editais
-                
-            except Exception as e:
-                add_extraction_event(task_id, "error", f"❌ Erro ao processar {id_pncp}: {str(e)}")
-                erros_total.append({"id_pncp": id_pncp, "erro": str(e)})
-        
         # Resultado final
         add_extraction_event(task_id, "success", f"🎉 Processamento concluído!", {
-            "total_encontrados": len(todos_editais),
-            "total_novos": len(novos_total),
-            "total_atualizados": len(atualizados_total),
-            "total_erros": len(erros_total)
+            "total_encontrados": len(execucao.encontrados),
+            "total_novos": len(execucao.novos),
+            "total_atualizados": len(execucao.atualizados),
+            "total_inalterados": len(execucao.inalterados),
+            "total_erros": len(execucao.erros)
         })
+        if execucao.aguardando_banco:
+            add_extraction_event(task_id, "warning", f"⏳ {len(execucao.aguardando_banco)} editais aguardando o banco (na outbox)")
         
         return {
             "success": True,
-            "message": f"Extração concluída: {len(novos_total)} novos, {len(atualizados_total)} atualizados, {len(erros_total)} erros",
-            "total_encontrados": len(todos_editais),
-            "total_novos": len(novos_total),
-            "total_atualizados": len(atualizados_total),
-            "total_erros": len(erros_total),
-            "tempo_execucao": 0,  # Será calculado pelo extrator
-            "editais_novos": novos_total,
-            "editais_atualizados": atualizados_total,
-            "erros": erros_total
+            "message": f"Extração concluída: {len(execucao.novos)} novos, {len(execucao.atualizados)} atualizados, {len(execucao.erros)} erros",
+            "total_encontrados": len(execucao.encontrados),
+            "total_novos": len(execucao.novos),
+            "total_atualizados": len(execucao.atualizados),
+            "total_inalterados": len(execucao.inalterados),
+            "total_pulados": len(execucao.pulados),
+            "total_erros": len(execucao.erros),
+            "tempo_execucao": round(execucao.tempo_execucao, 2),
+            "editais_novos": execucao.novos,
+            "editais_atualizados": execucao.atualizados,
+            "erros": execucao.erros,
+            **extrator.metricas_execucao(),
+            "pipeline": execucao.metricas(),
+            "reprocessamento": execucao.backlog,
+            "aguardando_banco": execucao.aguardando_banco
         }
         
     except Exception as e:
         add_extraction_event(task_id, "error", f"❌ Erro geral na extração: {str(e)}")
         raise e
+    finally:
+        # Libera o driver Selenium (mantém aquecido entre execuções) e salva cache de órgãos e backlog
+        await asyncio.to_thread(extrator.liberar_driver)
 
 
 # ========================================
@@ -550,25 +523,46 @@ async def dashboard():
 async def health():
     # Testa conexão com Supabase
     supabase_status = "disconnected"
+    selenium_status = " disponível"
+    navegadores = None
+    cache_orgaos = None
+    disjuntores = {}
+    abertos = []
+    backlog = None
+    outbox = None
     try:
         ext = get_extrator()
+        pool = ext.pool.status()
+        selenium_status = f" disponível (pool {pool['ativos']}/{pool['tamanho']}, substituídos: {pool['substituidos']})"
+        navegadores = {**pool, **ext.gerenciador.status()}
+        cache_orgaos = ext.cache_orgaos.status()
+        disjuntores = ext.disjuntores.status()
+        abertos = ext.disjuntores.abertos()
+        backlog = ext.backlog.status()
+        outbox = ext.outbox.status()
         result = ext.supabase.table("editais_completos").select("id").limit(1).execute()
         supabase_status = "connected"
     except:
         supabase_status = "error"
     
     return HealthResponse(
-        status="healthy" if supabase_status == "connected" else " degraded",
+        status="healthy" if supabase_status == "connected" and not abertos else " degraded",
         timestamp=datetime.now().isoformat(),
         services={
             "supabase": f" {supabase_status}" if supabase_status == "connected" else f"{supabase_status}",
-            "selenium": " disponível",
-            "storage_bucket": settings.STORAGE_BUCKET
+            "selenium": selenium_status,
+            "storage_bucket": settings.STORAGE_BUCKET,
+            "disjuntores": disjuntores
         },
         environment={
             "python_version": "3.11+",
             "fastapi_version": "0.104+",
-            "supabase_configured": settings.is_configured()
+            "supabase_configured": settings.is_configured(),
+            "supabase_backend": settings.SUPABASE_BACKEND,
+            "navegadores": navegadores,
+            "cache_orgaos": cache_orgaos,
+            "backlog": backlog,
+            "outbox": outbox
         }
     )
 
@@ -796,7 +790,7 @@ async def listar_editais(limit: int = 20, offset: int = 0):
         ext = get_extrator()
         
         result = ext.supabase.table("editais_completos")\
-            .select("id, id_pncp, edital, modalidade, valor, orgao, situacao, data_divulgacao_pncp, created_at, total_itens, total_anexos, total_historico, itens, anexos, historico, cnpj_orgao, ano, numero, local, objeto, link_licitacao")\
+            .select("id, id_pncp, edital, modalidade, valor, orgao, situacao, data_divulgacao_pncp, created_at, total_itens, total_anexos, total_historico, cnpj_orgao, ano, numero, local, objeto, link_licitacao")\
             .order("created_at", desc=True)\
             .range(offset, offset + limit - 1)\
             .execute()
@@ -813,8 +807,12 @@ async def listar_editais(limit: int = 20, offset: int = 0):
 
 
 @app.get("/editais/{id_pncp}")
-async def buscar_edital_individual(id_pncp: str):
-    """Retorna dados completos de um edital específico"""
+async def buscar_edital_individual(id_pncp: str, incluir: str = "", limit: int = 100):
+    """Retorna dados completos de um edital específico
+    
+    incluir: listas carregadas das tabelas filhas, até limit elementos cada (vazio = só o resumo,
+    com total_itens, total_anexos e total_historico); o resto vem de /itens, /historico e /documentos
+    """
     try:
         ext = get_extrator()
         
@@ -827,6 +825,9 @@ async def buscar_edital_individual(id_pncp: str):
             raise HTTPException(status_code=404, detail="Edital não encontrado")
         
         edital = result.data[0]
+        for grupo in incluir.split(","):
+            if grupo.strip() in TABELAS_FILHAS:
+                edital[grupo.strip()] = consultar_filhas(ext.supabase, grupo.strip(), id_pncp, limit)
         
         return {
             "success": True,
@@ -840,27 +841,65 @@ async def buscar_edital_individual(id_pncp: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/editais/{id_pncp}/itens")
+async def listar_itens_edital(id_pncp: str, limit: int = 100, offset: int = 0):
+    """Retorna os itens do edital, página a página"""
+    try:
+        ext = get_extrator()
+        itens, total = consultar_filhas(ext.supabase, "itens", id_pncp, limit, offset, contar=True)
+        
+        return {
+            "id_pncp": id_pncp,
+            "itens": itens,
+            "total": total,
+            "limit": limit,
+            "offset": offset
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/editais/{id_pncp}/historico")
+async def listar_historico_edital(id_pncp: str, limit: int = 100, offset: int = 0):
+    """Retorna os eventos do histórico do edital, página a página"""
+    try:
+        ext = get_extrator()
+        historico, total = consultar_filhas(ext.supabase, "historico", id_pncp, limit, offset, contar=True)
+        
+        return {
+            "id_pncp": id_pncp,
+            "historico": historico,
+            "total": total,
+            "limit": limit,
+            "offset": offset
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/editais/{id_pncp}/documentos")
-async def listar_documentos_edital(id_pncp: str):
-    """Retorna lista de documentos do edital"""
+async def listar_documentos_edital(id_pncp: str, limit: int = 100, offset: int = 0):
+    """Retorna lista de documentos do edital, página a página (indice é o documento_id do download)"""
     try:
         ext = get_extrator()
         
         result = ext.supabase.table("editais_completos")\
-            .select("anexos, id_pncp")\
+            .select("id_pncp")\
             .eq("id_pncp", id_pncp)\
             .execute()
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Edital não encontrado")
         
-        edital = result.data[0]
-        anexos = edital.get("anexos", [])
+        anexos, total = consultar_filhas(ext.supabase, "anexos", id_pncp, limit, offset, contar=True)
         
         documentos = []
         if anexos:
-            for anexo in anexos:
+            for posicao, anexo in enumerate(anexos):
                 documentos.append({
+                    "indice": offset + posicao,
                     "nome": anexo.get("nome", "Documento"),
                     "url": anexo.get("url", ""),
                     "tamanho": anexo.get("tamanho", "N/A"),
@@ -870,7 +909,9 @@ async def listar_documentos_edital(id_pncp: str):
         return {
             "id_pncp": id_pncp,
             "documentos": documentos,
-            "total": len(documentos)
+            "total": total,
+            "limit": limit,
+            "offset": offset
         }
         
     except HTTPException:
@@ -885,21 +926,12 @@ async def download_documento(id_pncp: str, documento_id: int):
     try:
         ext = get_extrator()
         
-        result = ext.supabase.table("editais_completos")\
-            .select("anexos")\
-            .eq("id_pncp", id_pncp)\
-            .execute()
-        
-        if not result.data:
-            raise HTTPException(status_code=404, detail="Edital não encontrado")
-        
-        edital = result.data[0]
-        anexos = edital.get("anexos", [])
+        anexos = consultar_filhas(ext.supabase, "anexos", id_pncp, 1, documento_id) if documento_id >= 0 else []
         
-        if documento_id >= len(anexos):
+        if not anexos:
             raise HTTPException(status_code=404, detail="Documento não encontrado")
         
-        documento = anexos[documento_id]
+        documento = anexos[0]
         
         if documento.get("url"):
             return {
@@ -1017,4 +1049,6 @@ async def shutdown_event():
     global scheduler
     if scheduler and scheduler.scheduler.running:
         scheduler.scheduler.shutdown()
+    if extrator:
+        extrator.fechar_driver()
     print("PNCP Extrator finalizado!")
\ No newline at end of file
@@ -43,5 +43,5 @@ class HealthResponse(BaseModel):
     """Response do health check"""
     status: str
     timestamp: str
-    services: Dict[str, str]
+    services: Dict[str, Any]
     environment: Optional[Dict[str, Any]] = None
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Benchmark da extração de campos dos containers da listagem (regex por campo x passada única)
+
+Uso:
+    python benchmarks/bench_container.py [--containers 5000]
+
+Os textos dos containers são gravados a partir da listagem renderizada pelo servidor fixture.
+O caminho "atual" reproduz o extrator antigo: seis re.search, normalizar_data e a cascata de strptime.
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.campos_listagem import extrair_campos_container
+from app.core.parsers import extrair_containers_listagem
+from app.core.servidor_fixture import gerar_editais, gerar_html_listagem
+
+
+def normalizar_data_atual(data_str):
+    if not data_str:
+        return ""
+    data_str = data_str.strip()
+    for padrao in [r'(\d{1,2})/(\d{1,2})/(\d{4})', r'(\d{1,2})-(\d{1,2})-(\d{4})', r'(\d{4})-(\d{1,2})-(\d{1,2})']:
+        match = re.search(padrao, data_str)
+        if match:
+            if len(match.group(1)) == 4:
+                return f"{match.group(3)}/{match.group(2)}/{match.group(1)}"
+            return f"{match.group(1)}/{match.group(2)}/{match.group(3)}"
+    return data_str
+
+
+def extrair_atual(texto_completo):
+    dados = {}
+    edital_match = re.search(r'Edital\s+n[°º]?\s*(\d+/\d+)', texto_completo, re.IGNORECASE)
+    dados["edital"] = edital_match.group(0) if edital_match else ""
+    modalidade_match = re.search(r'Modalidade[^:]*:\s*\|?\s*([^|]+)', texto_completo, re.IGNORECASE)
+    dados["modalidade"] = modalidade_match.group(1).strip() if modalidade_match else ""
+    data_match = re.search(r'Última\s+Atualização[^:]*:\s*\|?\s*(\d{2}/\d{2}/\d{4})', texto_completo, re.IGNORECASE)
+    dados["ultima_atualizacao"] = normalizar_data_atual(data_match.group(1).strip() if data_match else "")
+    orgao_match = re.search(r'Órgão[^:]*:\s*\|?\s*([^|]+)', texto_completo, re.IGNORECASE)
+    dados["orgao"] = orgao_match.group(1).strip() if orgao_match else ""
+    local_match = re.search(r'Local[^:]*:\s*\|?\s*([^|]+)', texto_completo, re.IGNORECASE)
+    dados["local"] = local_match.group(1).strip() if local_match else ""
+    objeto_match = re.search(r'Objeto[^:]*:\s*\|?\s*([^|]+)', texto_completo, re.IGNORECASE)
+    dados["objeto"] = objeto_match.group(1).strip() if objeto_match else ""
+
+    data_edital = None
+    for formato in ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d"):
+        try:
+            data_edital = datetime.strptime(dados["ultima_atualizacao"], formato).date()
+            break
+        except ValueError:
+            continue
+    return dados, data_edital
+
+
+def gravar_containers(total):
+    editais = gerar_editais(total)
+    textos = []
+    for inicio in range(0, total, 100):
+        html = gerar_html_listagem(editais[inicio:inicio + 100])
+        textos.extend(c.get_text(separator=" | ", strip=True) for c in extrair_containers_listagem(html))
+    return textos
+
+
+def medir(funcao, textos):
+    inicio = time.perf_counter()
+    for texto in textos:
+        funcao(texto)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--containers", type=int, default=5000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    textos = gravar_containers(args.containers)
+
+    divergentes = sum(1 for t in textos if extrair_atual(t) != extrair_campos_container(t))
+    print(f"Containers: {len(textos)} | saidas divergentes: {divergentes}")
+
+    atual = min(medir(extrair_atual, textos) for _ in range(args.repeticoes))
+    novo = min(medir(extrair_campos_container, textos) for _ in range(args.repeticoes))
+
+    print(f"{'caminho':<14}{'us/container':>14}{'ganho':>10}")
+    print(f"{'atual':<14}{atual / len(textos) * 1e6:>14.2f}{'1.0x':>10}")
+    print(f"{'passada unica':<14}{novo / len(textos) * 1e6:>14.2f}{atual / novo:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark dos campos da página de detalhe (bateria de regex x índice de rótulos)
+
+Uso:
+    python benchmarks/bench_detalhe.py [--paginas 200]
+
+As páginas vêm de fixtures/detalhe.html e do servidor fixture; o valor esperado de cada campo é o
+que o gerador escreveu na página. O caminho "atual" reproduz o extrator antigo: texto da página
+inteira e um re.search(IGNORECASE) por campo.
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.campos_detalhe import ROTULOS, extrair_campos_detalhe
+from app.core.parsers import texto_detalhe, extrair_blocos_detalhe
+from app.core.servidor_fixture import gerar_editais, gerar_html_detalhe
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Mesma ordem e mesmos padrões da bateria antiga de extrair_edital_completo_hibrido
+PADROES_ATUAIS = (
+    ("data_divulgacao_pncp", r'Data\s+de\s+divulgação\s+no\s+PNCP[:\s]*(\d{2}/\d{2}/\d{4})', None),
+    ("ultima_atualizacao", r'Última\s+atualização[:\s]*(\d{2}/\d{2}/\d{4})', None),
+    ("orgao", r'Órgão[:\s]*([^\n\r]{1,200})', ""),
+    ("local", r'Local[:\s]*([^\n\r]{1,100})', ""),
+    ("modalidade", r'Modalidade\s+da\s+contratação[:\s]*([^\n\r]{1,100})', ""),
+    ("amparo_legal", r'Amparo\s+legal[:\s]*([^\n\r]{1,200})', ""),
+    ("tipo", r'Tipo[:\s]*([^\n\r]{1,100})', ""),
+    ("modo_disputa", r'Modo\s+de\s+disputa[:\s]*([^\n\r]{1,100})', ""),
+    ("data_inicio_propostas", r'Data\s+de\s+início\s+de\s+recebimento\s+de\s+propostas[:\s]*(\d{2}/\d{2}/\d{4}\s+\d{2}:\d{2})', ""),
+    ("data_fim_propostas", r'Data\s+fim\s+de\s+recebimento\s+de\s+propostas[:\s]*(\d{2}/\d{2}/\d{4}\s+\d{2}:\d{2})', ""),
+    ("data_abertura", r'Data\s+de\s+abertura\s+das?\s+propostas[:\s]*(\d{2}/\d{2}/\d{4}(?:\s+\d{2}:\d{2})?)', None),
+    ("situacao", r'Situação[:\s]*([^\n\r]{1,100})', ""),
+    ("objeto", r'Objeto[:\s]*([^\n\r]{1,500})', ""),
+    ("registro_preco", r'Registro\s+de\s+preço[:\s]*([^\n\r]{1,50})', ""),
+    ("fonte_orcamentaria", r'Fonte\s+orçamentária[:\s]*([^\n\r]{1,200})', ""),
+    ("unidade_compradora", r'Unidade\s+compradora[:\s]*([^\n\r]{1,200})', ""),
+    ("id_contratacao_pncp", r'Id\s+contratação\s+PNCP[:\s]*([^\n\r]{1,100})', ""),
+    ("fonte", r'Fonte[:\s]*([^\n\r]{1,200})', ""),
+)
+
+AUSENTES = {campo: ausente for campo, _, ausente in PADROES_ATUAIS}
+
+
+def extrair_atual(html):
+    texto_pagina = texto_detalhe(html, "bs4")
+    dados = {}
+    for campo, padrao, ausente in PADROES_ATUAIS:
+        match = re.search(padrao, texto_pagina, re.IGNORECASE)
+        dados[campo] = match.group(1).strip() if match else ausente
+    return dados
+
+
+def esperado(html):
+    """Valores escritos pelo gerador em cada bloco rótulo/valor da página"""
+    blocos = dict(extrair_blocos_detalhe(html, "bs4"))
+    return {campo: next((blocos[r] for r in rotulos if r in blocos), AUSENTES[campo]) for campo, rotulos in ROTULOS}
+
+
+def medir(funcao, paginas):
+    inicio = time.perf_counter()
+    for html in paginas:
+        funcao(html)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paginas", type=int, default=200)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(os.path.join(FIXTURES, "detalhe.html"), encoding="utf-8") as f:
+        paginas = [f.read()]
+    paginas += [gerar_html_detalhe(edital) for edital in gerar_editais(args.paginas - 1)]
+
+    erros = {"atual": {}, "indice": {}}
+    for html in paginas:
+        correto = esperado(html)
+        for nome, funcao in (("atual", extrair_atual), ("indice", extrair_campos_detalhe)):
+            for campo, valor in funcao(html).items():
+                if valor != correto[campo]:
+                    erros[nome][campo] = erros[nome].get(campo, 0) + 1
+
+    print(f"Paginas: {len(paginas)}")
+    for nome, por_campo in erros.items():
+        resumo = ", ".join(f"{campo}={total}" for campo, total in sorted(por_campo.items())) or "nenhum"
+        print(f"campos errados ({nome}): {resumo}")
+
+    exemplo_atual, exemplo_novo = extrair_atual(paginas[0]), extrair_campos_detalhe(paginas[0])
+    print("\nfixtures/detalhe.html (campos divergentes):")
+    for campo, _ in ROTULOS:
+        if exemplo_atual[campo] != exemplo_novo[campo]:
+            print(f"  {campo}:\n    atual : {str(exemplo_atual[campo])[:90]!r}\n    indice: {exemplo_novo[campo]!r}")
+
+    atual = min(medir(extrair_atual, paginas) for _ in range(args.repeticoes))
+    novo = min(medir(extrair_campos_detalhe, paginas) for _ in range(args.repeticoes))
+
+    print(f"\n{'caminho':<14}{'ms/pagina':>12}{'ganho':>10}")
+    print(f"{'atual':<14}{atual / len(paginas) * 1e3:>12.3f}{'1.0x':>10}")
+    print(f"{'indice':<14}{novo / len(paginas) * 1e3:>12.3f}{atual / novo:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
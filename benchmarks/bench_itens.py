@@ -0,0 +1,74 @@
+"""
+Pico de memória e tempo da leitura de /itens (lista inteira x páginas em streaming)
+
+Uso:
+    python benchmarks/bench_itens.py [--itens 12000] [--tamanho-pagina 500]
+
+Sobe o servidor fixture com um edital de --itens itens. O caminho "atual" reproduz o extrator
+antigo: response.json() da lista completa e sum() sobre ela.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import requests
+
+from app.core import itens_api
+from app.core.servidor_fixture import ServidorFixturePNCP
+
+
+def ler_atual(session, url):
+    itens = session.get(url, timeout=60).json()
+    return len(itens), sum(item.get("valorTotal", 0) for item in itens)
+
+
+def ler_paginado(session, url, tamanho_pagina):
+    resumo, erro = itens_api.ler_itens(session, url, 60, tamanho_pagina, max_paginas=10000)
+    if erro:
+        raise RuntimeError(erro)
+    return resumo.total, resumo.valor_total
+
+
+def medir(funcao, *args):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    segundos = time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return resultado, segundos, pico / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--itens", type=int, default=12000)
+    parser.add_argument("--tamanho-pagina", type=int, default=500)
+    args = parser.parse_args()
+
+    with ServidorFixturePNCP(total_editais=1, itens_por_edital=args.itens) as servidor:
+        id_pncp = servidor.httpd.editais[0]["item_url"].split("/compras/")[-1]
+        url = f"{servidor.url_api}/orgaos/{id_pncp.replace('/', '/compras/', 1)}/itens"
+        session = requests.Session()
+
+        ijson = itens_api.ijson
+        casos = [("atual (lista)", ler_atual, (session, url), None)]
+        if ijson is not None:
+            casos.append(("paginado+ijson", ler_paginado, (session, url, args.tamanho_pagina), ijson))
+        casos.append(("paginado", ler_paginado, (session, url, args.tamanho_pagina), None))
+
+        print(f"Itens: {args.itens} | pagina: {args.tamanho_pagina}")
+        print(f"{'caminho':<18}{'itens':>8}{'valor total':>14}{'segundos':>10}{'pico MB':>10}")
+        for nome, funcao, parametros, modulo_ijson in casos:
+            itens_api.ijson = modulo_ijson
+            (total, valor), segundos, pico = medir(funcao, *parametros)
+            print(f"{nome:<18}{total:>8}{valor:>14.2f}{segundos:>10.2f}{pico:>10.1f}")
+        itens_api.ijson = ijson
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Vazão do parse das páginas de detalhe e atraso do event loop (threads x processos)
+
+Uso:
+    python benchmarks/bench_parse.py [--paginas 300] [--itens 200] [--threads 4] [--workers N]
+
+As páginas são geradas pelo servidor fixture (blocos rótulo/valor + tabela de --itens linhas).
+As chamadas partem de --threads threads, como no pipeline; o lag é medido num loop asyncio
+rodando ao mesmo tempo, que é o que o FastAPI sente durante a extração.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.servidor_fixture import gerar_editais, gerar_html_detalhe
+from app.core.servico_parse import ServicoParse
+from app.core.campos_detalhe import extrair_campos_detalhe
+from app.core.monitor_loop import MonitorLoop
+
+
+async def medir(servico, paginas, threads, backend):
+    monitor = MonitorLoop(intervalo=0.01)
+    monitor.iniciar()
+    await asyncio.sleep(0.2)
+    monitor.limpar()
+
+    loop = asyncio.get_running_loop()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        resultados = await asyncio.gather(*(
+            loop.run_in_executor(executor, servico.executar, extrair_campos_detalhe, html, backend) for html in paginas
+        ))
+    segundos = time.perf_counter() - inicio
+    monitor.parar()
+    return resultados, segundos, monitor.resumo()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paginas", type=int, default=300)
+    parser.add_argument("--itens", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=None, help="processos de parse (padrão: PARSE_WORKERS)")
+    parser.add_argument("--backend", default=None, help="bs4, lxml ou selectolax (padrão: o mais rápido instalado)")
+    args = parser.parse_args()
+
+    paginas = [gerar_html_detalhe(edital, args.itens) for edital in gerar_editais(args.paginas)]
+    mb = sum(len(html) for html in paginas) / (1024 * 1024)
+    print(f"Paginas: {args.paginas} ({mb:.1f} MB) | threads: {args.threads} | CPUs: {os.cpu_count()} | "
+          f"backend: {args.backend or 'padrao'}")
+
+    processos = ServicoParse(args.workers)
+    inicio = time.perf_counter()
+    processos.campos_detalhe(paginas[0])  # sobe o pool (spawn) fora da medição
+    print(f"Pool de {processos.workers} processo(s) pronto em {time.perf_counter() - inicio:.2f}s")
+
+    casos = [("thread", ServicoParse(workers=0)), (f"processos ({processos.workers})", processos)]
+    referencia = None
+    print(f"{'parse':<16}{'pag/s':>9}{'lag p50 ms':>12}{'lag p99 ms':>12}{'lag max ms':>12}")
+    for nome, servico in casos:
+        resultados, segundos, lag = asyncio.run(medir(servico, paginas, args.threads, args.backend))
+        if referencia is None:
+            referencia = resultados
+        elif resultados != referencia:
+            print("  ATENCAO: campos diferentes entre os caminhos")
+        print(f"{nome:<16}{len(paginas) / segundos:>9.1f}{lag['p50_ms']:>12}{lag['p99_ms']:>12}{lag['max_ms']:>12}")
+    processos.fechar()
+
+
+if __name__ == "__main__":
+    main()
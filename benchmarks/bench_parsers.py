@@ -0,0 +1,72 @@
+"""
+Micro-benchmark dos backends de parsing (páginas/segundo) sobre as páginas salvas em fixtures/
+
+Uso:
+    python benchmarks/bench_parsers.py [--segundos 2]
+
+"Atual" é o caminho antigo do extrator: BeautifulSoup('html.parser') sobre o DOM inteiro.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bs4 import BeautifulSoup
+
+from app.core import parsers
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def ler_fixture(nome):
+    with open(os.path.join(FIXTURES, nome), encoding="utf-8") as f:
+        return f.read()
+
+
+def paginas_por_segundo(funcao, html, segundos):
+    funcao(html)  # aquecimento
+    total = 0
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < segundos:
+        funcao(html)
+        total += 1
+    return total / (time.perf_counter() - inicio)
+
+
+def listagem_atual(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return [(a.get("href"), a.get_text(separator=" | ", strip=True)) for a in soup.find_all("a", class_="br-item")]
+
+
+def detalhe_atual(html):
+    return BeautifulSoup(html, "html.parser").get_text(separator=" ", strip=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--segundos", type=float, default=2.0, help="tempo por medição")
+    args = parser.parse_args()
+
+    listagem = ler_fixture("listagem.html")
+    detalhe = ler_fixture("detalhe.html")
+
+    casos = [("listagem", listagem, listagem_atual, parsers.extrair_containers_listagem),
+             ("detalhe", detalhe, detalhe_atual, parsers.texto_detalhe)]
+
+    print(f"Backends instalados: {', '.join(parsers.backends_disponiveis())}")
+    print(f"{'pagina':<10}{'backend':<14}{'paginas/s':>12}{'ganho':>10}")
+
+    for nome, html, atual, novo in casos:
+        base = paginas_por_segundo(atual, html, args.segundos)
+        print(f"{nome:<10}{'atual (bs4)':<14}{base:>12.1f}{'1.0x':>10}")
+        for backend in parsers.backends_disponiveis():
+            taxa = paginas_por_segundo(lambda h: novo(h, backend), html, args.segundos)
+            print(f"{nome:<10}{backend:<14}{taxa:>12.1f}{taxa / base:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Vazão da execução completa (descoberta, extração, gravação) sem rede e sem Supabase
+
+Uso:
+    python benchmarks/bench_pipeline.py [--editais 300] [--itens 20] [--latencia-ms 20] [--taxa-falha 0.05] [--arquivos 2]
+
+Sobe o servidor fixture do PNCP e grava no banco local (app/core/supabase_local.py) com a latência
+e a taxa de erros 503 pedidas. A página de detalhe é lida por HTTP do próprio fixture (sem
+navegador). A segunda rodada repete a coleta com os editais já gravados. Com --arquivos, cada edital
+tem anexos que são baixados e enviados ao bucket local; a segunda rodada deve dar tudo inalterado
+mesmo assim (o upload completa os anexos, mas não muda o hash do conteúdo).
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import contextlib
+import io
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import requests
+
+from app.core.servidor_fixture import ServidorFixturePNCP
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--editais", type=int, default=300)
+    parser.add_argument("--itens", type=int, default=20)
+    parser.add_argument("--latencia-ms", type=float, default=20)
+    parser.add_argument("--taxa-falha", type=float, default=0.0)
+    parser.add_argument("--rodadas", type=int, default=2)
+    parser.add_argument("--semente", type=int, default=1)
+    parser.add_argument("--arquivos", type=int, default=0, help="anexos por edital (salva os arquivos no bucket)")
+    args = parser.parse_args()
+
+    with ServidorFixturePNCP(total_editais=args.editais, editais_por_dia=args.editais, itens_por_edital=args.itens,
+                             arquivos_por_edital=args.arquivos) as servidor:
+        # Settings é lido na importação: o ambiente tem de estar pronto antes de importar o extrator
+        os.environ.update(SUPABASE_BACKEND="local", PNCP_API_URL=servidor.url_api, PNCP_BASE_URL=servidor.url_base,
+                          PNCP_SEARCH_URL=servidor.url_busca, DISCOVERY_BACKEND="api")
+        for variavel in ("OUTBOX_FILE", "BACKLOG_FILE", "HTTP_CACHE_FILE", "ORGAO_CACHE_FILE"):
+            os.environ.setdefault(variavel, "")
+        # Com falhas injetadas o backoff da outbox chegaria a minutos (OUTBOX_BACKOFF_MAX)
+        os.environ.setdefault("OUTBOX_BACKOFF_MAX", "5")
+        from app.core.extractor import PNCPExtractor
+        from app.core.supabase_local import ClienteLocal
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            extrator = PNCPExtractor()
+        extrator.supabase = ClienteLocal(latencia_ms=args.latencia_ms, taxa_falha=args.taxa_falha, semente=args.semente)
+        extrator._carregar_pagina_detalhe = lambda url: requests.get(url, timeout=30).text
+        extrator.liberar_driver = lambda: None
+
+        print(f"Editais: {args.editais} | itens/edital: {args.itens} | latencia: {args.latencia_ms} ms | "
+              f"falhas: {args.taxa_falha:.0%}")
+        print(f"{'rodada':<8}{'segundos':>10}{'editais/s':>11}{'gravados':>10}{'inalterados':>13}{'erros':>7}"
+              f"{'idas banco':>12}{'503':>6}{'adiados':>9}")
+        for rodada in range(1, args.rodadas + 1):
+            chamadas, falhas = extrator.supabase.chamadas, extrator.supabase.falhas
+            inicio = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                resultado = asyncio.run(extrator.executar_extracao_inteligente(1, salvar_arquivos=args.arquivos > 0))
+            segundos = time.perf_counter() - inicio
+            gravados = resultado["total_novos"] + resultado["total_atualizados"]
+            print(f"{rodada:<8}{segundos:>10.2f}{resultado['total_encontrados'] / segundos:>11.1f}{gravados:>10}"
+                  f"{resultado['total_inalterados']:>13}{resultado['total_erros']:>7}"
+                  f"{extrator.supabase.chamadas - chamadas:>12}{extrator.supabase.falhas - falhas:>6}"
+                  f"{resultado['escrita']['adiamentos']:>9}")
+
+        # Contagem final sem falhas injetadas e com o que ficou na outbox já gravado
+        extrator.supabase.taxa_falha = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            extrator.envios_storage.descarregar(120)
+            extrator.escritor.descarregar(120)
+        linhas = extrator.supabase.table("editais_completos").select("id", count="exact").execute().count
+        print(f"Linhas em editais_completos: {linhas}")
+        if args.arquivos:
+            anexos = extrator.supabase.table("editais_anexos").select("id_pncp", count="exact").execute().count
+            print(f"Anexos gravados: {anexos} | arquivos no bucket: {len(extrator.supabase.storage.from_(extrator.bucket_name).list())}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            extrator.fechar_driver()
+
+
+if __name__ == "__main__":
+    main()
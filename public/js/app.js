@@ -1735,7 +1735,7 @@ async function carregarDocumentos(cardId) {
                                     <div class="text-xs text-gray-500">${doc.tamanho}</div>
                                 </div>
                             </div>
-                            <button onclick="baixarDocumento('${id_pncp}', ${index})" 
+                            <button onclick="baixarDocumento('${id_pncp}', ${doc.indice ?? index})" 
                                     class="text-blue-600 hover:text-blue-800 text-xs px-2 py-1 border border-blue-300 rounded hover:bg-blue-50">
                                 <i class="fas fa-download"></i>
                             </button>
@@ -1931,6 +1931,8 @@ async function carregarDadosSideover(id_pncp) {
             return;
         }
         
+        await carregarListasEdital(edital);
+        
         // Processar dados JSONB se necessário
         if (typeof edital.anexos === 'string') {
             try {
@@ -4000,6 +4002,23 @@ async function executarHistoricoManual() {
 // FUNÇÕES DO MODAL
 // ========================================
 
+// Itens, anexos e histórico não vêm na listagem: busca no endpoint do edital na primeira abertura
+async function carregarListasEdital(edital) {
+    if (edital.itens !== undefined) return edital;
+    try {
+        const resposta = await window.pncpApp.fazerRequisicao(`/editais/${edital.id_pncp}?incluir=itens,anexos,historico`);
+        edital.itens = resposta.data?.itens || [];
+        edital.anexos = resposta.data?.anexos || [];
+        edital.historico = resposta.data?.historico || [];
+    } catch (error) {
+        console.warn('⚠️ Erro ao carregar itens/anexos/histórico:', error);
+        edital.itens = [];
+        edital.anexos = [];
+        edital.historico = [];
+    }
+    return edital;
+}
+
 async function abrirModalDetalhes(id_pncp) {
     console.log('📋 Abrindo modal de detalhes para:', id_pncp);
     
@@ -4015,6 +4034,7 @@ async function abrirModalDetalhes(id_pncp) {
     document.getElementById('modal-subtitle').textContent = `ID: ${id_pncp}`;
     
     // Carregar documentos (aba padrão)
+    await carregarListasEdital(edital);
     await carregarDocumentosModal(edital.anexos, edital.historico);
     
     // Mostrar modal na aba documentos
@@ -4037,6 +4057,7 @@ async function abrirModalDocumentos(id_pncp) {
     document.getElementById('modal-subtitle').textContent = `ID: ${id_pncp}`;
     
     // Carregar documentos
+    await carregarListasEdital(edital);
     await carregarDocumentosModal(edital.anexos, edital.historico);
     
     // Mostrar modal na aba documentos
@@ -4059,6 +4080,7 @@ async function abrirModalItens(id_pncp) {
     document.getElementById('modal-subtitle').textContent = `ID: ${id_pncp}`;
     
     // Carregar itens
+    await carregarListasEdital(edital);
     await carregarItensModal(edital.itens);
     
     // Mostrar modal na aba itens
@@ -4081,6 +4103,7 @@ async function abrirModalHistorico(id_pncp) {
     document.getElementById('modal-subtitle').textContent = `ID: ${id_pncp}`;
     
     // Carregar histórico
+    await carregarListasEdital(edital);
     await carregarHistoricoModal(edital.historico);
     
     // Mostrar modal na aba histórico
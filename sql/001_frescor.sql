@@ -0,0 +1,9 @@
+-- Detecção de mudança dos editais (ver app/core/frescor.py)
+--   atualizacao_listagem: data de "Última Atualização" da listagem na última coleta
+--   hash_conteudo: SHA-256 do edital extraído, sem os campos que mudam a cada coleta
+
+ALTER TABLE editais_completos ADD COLUMN IF NOT EXISTS atualizacao_listagem date;
+ALTER TABLE editais_completos ADD COLUMN IF NOT EXISTS hash_conteudo text;
+
+-- Upsert em lote (on_conflict=id_pncp) e verificação por in_ dependem deste índice
+CREATE UNIQUE INDEX IF NOT EXISTS editais_completos_id_pncp_key ON editais_completos (id_pncp);
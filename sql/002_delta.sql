@@ -0,0 +1,26 @@
+-- Atualização parcial dos editais (ver montar_delta em app/core/frescor.py)
+--   hashes_grupos: impressão de cada grupo de colunas (principal, itens, anexos, historico)
+--   mais historico_n / historico_eventos para detectar eventos novos no fim do histórico
+
+ALTER TABLE editais_completos ADD COLUMN IF NOT EXISTS hashes_grupos jsonb;
+
+-- Anexa eventos ao histórico de vários editais numa chamada:
+--   lote = [{"id_pncp": "...", "esperados": 3, "eventos": [...]}, ...]
+-- Só anexa onde o histórico ainda tem "esperados" eventos (reenvio do mesmo lote não duplica).
+CREATE OR REPLACE FUNCTION anexar_historico(lote jsonb) RETURNS integer
+LANGUAGE sql AS $$
+    WITH novos AS (
+        SELECT item->>'id_pncp' AS id_pncp,
+               (item->>'esperados')::int AS esperados,
+               item->'eventos' AS eventos
+        FROM jsonb_array_elements(lote) AS item
+    ), atualizados AS (
+        UPDATE editais_completos e
+           SET historico = COALESCE(e.historico, '[]'::jsonb) || n.eventos
+          FROM novos n
+         WHERE e.id_pncp = n.id_pncp
+           AND jsonb_array_length(COALESCE(e.historico, '[]'::jsonb)) = n.esperados
+        RETURNING 1
+    )
+    SELECT count(*)::int FROM atualizados;
+$$;
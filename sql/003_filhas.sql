@@ -0,0 +1,54 @@
+-- Itens, anexos e histórico em tabelas filhas (ver app/core/filhas.py)
+--   editais_completos fica só com o resumo (total_itens, total_anexos, total_historico...)
+--   cada item/anexo/evento é uma linha com chave (id_pncp, posicao) e o objeto em dados
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS editais_itens (
+    id_pncp text NOT NULL REFERENCES editais_completos (id_pncp) ON DELETE CASCADE,
+    posicao integer NOT NULL,
+    dados jsonb NOT NULL,
+    PRIMARY KEY (id_pncp, posicao)
+);
+
+CREATE TABLE IF NOT EXISTS editais_anexos (
+    id_pncp text NOT NULL REFERENCES editais_completos (id_pncp) ON DELETE CASCADE,
+    posicao integer NOT NULL,
+    dados jsonb NOT NULL,
+    PRIMARY KEY (id_pncp, posicao)
+);
+
+CREATE TABLE IF NOT EXISTS editais_historico (
+    id_pncp text NOT NULL REFERENCES editais_completos (id_pncp) ON DELETE CASCADE,
+    posicao integer NOT NULL,
+    dados jsonb NOT NULL,
+    PRIMARY KEY (id_pncp, posicao)
+);
+
+-- Copia as listas já gravadas (posicao começa em 0, como em linhas_filhas)
+INSERT INTO editais_itens (id_pncp, posicao, dados)
+SELECT e.id_pncp, (t.ordem - 1)::int, t.valor
+  FROM editais_completos e, jsonb_array_elements(e.itens) WITH ORDINALITY AS t (valor, ordem)
+ WHERE jsonb_typeof(e.itens) = 'array'
+ON CONFLICT (id_pncp, posicao) DO NOTHING;
+
+INSERT INTO editais_anexos (id_pncp, posicao, dados)
+SELECT e.id_pncp, (t.ordem - 1)::int, t.valor
+  FROM editais_completos e, jsonb_array_elements(e.anexos) WITH ORDINALITY AS t (valor, ordem)
+ WHERE jsonb_typeof(e.anexos) = 'array'
+ON CONFLICT (id_pncp, posicao) DO NOTHING;
+
+INSERT INTO editais_historico (id_pncp, posicao, dados)
+SELECT e.id_pncp, (t.ordem - 1)::int, t.valor
+  FROM editais_completos e, jsonb_array_elements(e.historico) WITH ORDINALITY AS t (valor, ordem)
+ WHERE jsonb_typeof(e.historico) = 'array'
+ON CONFLICT (id_pncp, posicao) DO NOTHING;
+
+-- Eventos novos do histórico agora são linhas de editais_historico (sql/002_delta.sql)
+DROP FUNCTION IF EXISTS anexar_historico(jsonb);
+
+ALTER TABLE editais_completos DROP COLUMN IF EXISTS itens;
+ALTER TABLE editais_completos DROP COLUMN IF EXISTS anexos;
+ALTER TABLE editais_completos DROP COLUMN IF EXISTS historico;
+
+COMMIT;
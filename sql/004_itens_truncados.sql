@@ -0,0 +1,5 @@
+-- Itens além de ITENS_MAX_ARMAZENADOS (ver app/core/itens_api.py)
+--   os excedentes esperam a gravação em arquivo e vão para editais_itens em lotes;
+--   itens_truncados marca o edital cujos itens não foram todos gravados (sem ITENS_EXCEDENTES_DIR)
+
+ALTER TABLE editais_completos ADD COLUMN IF NOT EXISTS itens_truncados boolean NOT NULL DEFAULT false;